@@ -0,0 +1,86 @@
+"""
+Bot Inference Benchmark
+
+Measures MicroModel predictions per second for N symbols through the
+scheduler's scoring call, score_symbols():
+- snapshot: one indicator snapshot and predict() per symbol
+- per-bot: one score_symbols() call per symbol
+- per-tick: one score_symbols() call for all symbols, as a scheduler
+  tick makes
+
+Usage (from the repository root):
+    python -m api.bench_model [n_symbols]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from api.bot_api import MicroModel, model_features, score_symbols
+from api.services.indicators import (
+    FEATURE_FIELDS, MAX_STATES, update_indicators, get_indicators, clear_indicators
+)
+
+INTERVAL = 'bench'
+WARMUP_BARS = 60
+ROUNDS = 20
+
+
+def seed(symbols, bars=WARMUP_BARS):
+    """Feed each symbol a random walk long enough to warm up every indicator."""
+    rng = np.random.default_rng(0)
+    times = list(range(bars))
+    for symbol in symbols:
+        close = (100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))).tolist()
+        update_indicators(symbol, INTERVAL, {
+            'time': times, 'open': close, 'high': [c * 1.001 for c in close],
+            'low': [c * 0.999 for c in close], 'close': close, 'volume': [1000] * bars
+        })
+
+
+def snapshot(model, symbols):
+    predictions = []
+    for symbol in symbols:
+        values = get_indicators(symbol, INTERVAL)
+        raw = np.array([[np.nan if values[f] is None else values[f] for f in FEATURE_FIELDS]])
+        X, _ = model_features(raw)
+        predictions.append(model.predict(X[0]))
+    return predictions
+
+
+def per_bot(model, symbols):
+    return [int(score_symbols([symbol], INTERVAL, model)[0] >= 0.5) for symbol in symbols]
+
+
+def per_tick(model, symbols):
+    return [int(p >= 0.5) for p in score_symbols(symbols, INTERVAL, model)]
+
+
+def predictions_per_second(fn, model, symbols, rounds=ROUNDS):
+    fn(model, symbols)  # warm-up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(model, symbols)
+    return rounds * len(symbols) / (time.perf_counter() - start)
+
+
+def run(n_symbols=500):
+    # More series than MAX_STATES would evict the first ones
+    n_symbols = min(n_symbols, MAX_STATES)
+    symbols = [f'SYM{i:05d}' for i in range(n_symbols)]
+    clear_indicators()
+    seed(symbols)
+    model = MicroModel()
+
+    assert snapshot(model, symbols) == per_bot(model, symbols) == per_tick(model, symbols)
+
+    print(f"{n_symbols} symbols, {ROUNDS} rounds")
+    for name, fn in [('snapshot', snapshot), ('per-bot', per_bot), ('per-tick', per_tick)]:
+        rate = predictions_per_second(fn, model, symbols)
+        print(f"  {name:<10} {rate:14,.0f} predictions/s")
+    clear_indicators()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,60 @@
+"""
+BVC Parser Benchmark
+
+Measures parse time per page for each parser backend over the saved
+fixture pages in fixtures/bvc/.
+
+Usage (from the repository root):
+    python -m api.bench_scraper [iterations]
+"""
+
+import os
+import sys
+import time
+
+from api.services.bvc_parser import (
+    HAS_LXML, _extract_price_regex, _extract_price_lxml, _extract_price_bs4, extract_listing_rows
+)
+from api.services.morocco_scraper import parse_bvc_listing
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'bvc')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def time_per_page(fn, html, iterations):
+    """Average seconds per call over `iterations` runs."""
+    fn(html)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(html)
+    return (time.perf_counter() - start) / iterations
+
+
+def run(iterations=200):
+    quote_html = load_fixture('quote_iam.html')
+    listing_html = load_fixture('listing.html')
+
+    quote_parsers = [('regex', _extract_price_regex), ('bs4', _extract_price_bs4)]
+    listing_parsers = [('bs4', lambda html: parse_bvc_listing(html, backend='bs4'))]
+    if HAS_LXML:
+        quote_parsers.insert(1, ('lxml', _extract_price_lxml))
+        listing_parsers.insert(0, ('lxml', lambda html: parse_bvc_listing(html, backend='lxml')))
+
+    print(f"Quote page ({len(quote_html) // 1024} KB), {iterations} iterations")
+    for name, fn in quote_parsers:
+        elapsed = time_per_page(fn, quote_html, iterations)
+        print(f"  {name:<6} {elapsed * 1000:8.3f} ms/page  -> {fn(quote_html)}")
+
+    print(f"\nListing page ({len(listing_html) // 1024} KB, "
+          f"{len(extract_listing_rows(listing_html))} rows), {iterations} iterations")
+    for name, fn in listing_parsers:
+        elapsed = time_per_page(fn, listing_html, iterations)
+        print(f"  {name:<6} {elapsed * 1000:8.3f} ms/page  -> {len(fn(listing_html))} stocks")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -1,12 +1,22 @@
+import json
+import os
+import random
 import threading
 import time
 import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, Dict, List
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+import numpy as np
 from pydantic import BaseModel
 from flask_cors import CORS
 # from contextlib import asynccontextmanager
+from api.services.indicators import update_indicators, feature_matrix
+from api.services.ticket_store import store as TICKET_STORE
 
 # ==========================================
 # 1. MOCK / IMPORT YOUR EXISTING CLASSES
@@ -15,9 +25,48 @@ from flask_cors import CORS
 # from LIVE_XAUUSD_Botv2_vf import MicroModel, EnhancedTradingAssistant, main_enhanced_trading_loop
 
 # --- MOCK CLASSES (REPLACE WITH YOUR ACTUAL CODE) ---
+MODEL_FEATURES = ("sma_gap", "ema_gap", "rsi", "atr_pct", "band_position", "vwap_gap")
+
+
+def model_features(raw):
+    """
+    Model inputs from an indicator feature matrix (columns in
+    indicators.FEATURE_FIELDS order), computed column-wise for all rows
+    at once. Returns (X, valid) where valid marks rows with every
+    feature available.
+    """
+    close, sma, ema, rsi, atr, bb_upper, bb_middle, bb_lower, vwap = raw.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        X = np.column_stack([
+            close / sma - 1,
+            close / ema - 1,
+            (rsi - 50) / 50,
+            atr / close,
+            (close - bb_middle) / (bb_upper - bb_middle),
+            close / vwap - 1
+        ])
+    valid = np.isfinite(X).all(axis=1)
+    X[~valid] = 0.0
+    return X, valid
+
+
 class MicroModel:
+    """Mock logistic model over MODEL_FEATURES (1=Buy, 0=Sell)."""
+
+    WEIGHTS = np.array([40.0, 25.0, -1.5, 0.0, -0.8, 10.0])
+    BIAS = 0.0
+
+    def predict_proba_batch(self, X):
+        """Probability of a long signal for each row of X, in one call."""
+        return 1.0 / (1.0 + np.exp(-(np.asarray(X, dtype=np.float64) @ self.WEIGHTS + self.BIAS)))
+
+    def predict_batch(self, X):
+        return (self.predict_proba_batch(X) >= 0.5).astype(np.int8)
+
     def predict(self, data):
-        return 1  # 1=Buy, 0=Sell
+        """Single feature vector (kept for one-off calls)."""
+        return int(self.predict_batch(np.atleast_2d(data))[0])
+
 
 class EnhancedTradingAssistant:
     def __init__(self):
@@ -48,69 +97,337 @@ BOT_STATUS = {
     "is_running": False,
     "mt5_connected": False,
     "account_info": {},
-    "last_update": None
+    "last_update": None,
+    "bots": {}
 }
 
+# Tickets kept for subscribers resuming after a reconnect
+TICKET_RING_SIZE = 256
+MAX_TICKET_SUBSCRIBERS = 1000
+TICKET_HEARTBEAT_SECONDS = 15
+
+
+class TicketChannel:
+    """
+    Pub/sub for bot tickets. Every published ticket gets the next
+    sequence number and goes into a bounded ring buffer; subscribers
+    are woken immediately and read everything after the last sequence
+    they saw, so they can resume after a reconnect (as long as the
+    ticket is still in the ring).
+    publish() may be called from any thread.
+    """
+
+    def __init__(self, maxlen=TICKET_RING_SIZE):
+        self._ring = deque(maxlen=maxlen)
+        self._seq = 0
+        self._lock = threading.Lock()
+        # (event loop, asyncio.Event) per subscriber
+        self._waiters = set()
+
+    @property
+    def last_seq(self):
+        with self._lock:
+            return self._seq
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._waiters)
+
+    def publish(self, ticket):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._ring.append((seq, ticket))
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+        return seq
+
+    def since(self, seq):
+        """(seq, ticket) pairs newer than `seq` still in the ring."""
+        with self._lock:
+            return [(s, t) for s, t in self._ring if s > seq]
+
+    async def listen(self, last_seq, heartbeat=TICKET_HEARTBEAT_SECONDS):
+        """
+        Yield (seq, ticket) for every ticket after `last_seq`, waiting
+        for new ones; yields None after `heartbeat` seconds of silence.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            while True:
+                waiter[1].clear()
+                items = self.since(last_seq)
+                if items:
+                    for seq, ticket in items:
+                        last_seq = seq
+                        yield seq, ticket
+                    continue
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+TICKETS = TicketChannel()
+
 # ==========================================
-# 3. BACKGROUND TRADING LOOP
+# 3. BOT SCHEDULER (asyncio)
 # ==========================================
-def main_enhanced_trading_loop():
+# Bots with the same interval share one task on the API's event loop.
+# Each tick fetches the due bots' bars concurrently (each bounded by
+# BOT_FETCH_TIMEOUT_SECONDS) and scores them with one batched model
+# call; ticks and backoffs are jittered. The blocking work (data fetch, model
+# inference, indicators, ticket history) runs in an executor; state is
+# only replaced on the event loop, never mutated in place, so endpoints
+# always read a consistent snapshot.
+#
+# BOT_SYMBOLS=XAUUSD,EURUSD,BTCUSD  BOT_INTERVAL_SECONDS=10
+BOT_SYMBOLS = [s.strip().upper() for s in os.getenv("BOT_SYMBOLS", "XAUUSD").split(",") if s.strip()]
+BOT_INTERVAL_SECONDS = float(os.getenv("BOT_INTERVAL_SECONDS", 10))
+BOT_MAX_BACKOFF_SECONDS = 300
+# Sleeps and backoffs vary by +/- this fraction so bots don't run in lockstep
+BOT_JITTER = 0.1
+# A data fetch slower than this counts as a failure (and backs off)
+BOT_FETCH_TIMEOUT_SECONDS = float(os.getenv("BOT_FETCH_TIMEOUT_SECONDS", 5))
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", 4))
+
+# Mock base prices per symbol for the demo ticket generator
+MOCK_BASE_PRICES = {"XAUUSD": 2030.0, "EURUSD": 1.08, "BTCUSD": 43000.0}
+
+# symbol -> latest ticket (replaced as a whole on every update)
+LATEST_TICKETS = {}
+
+
+@dataclass
+class BotConfig:
+    symbol: str
+    interval: float = BOT_INTERVAL_SECONDS
+    max_backoff: float = BOT_MAX_BACKOFF_SECONDS
+    jitter: float = BOT_JITTER
+    fetch_timeout: float = BOT_FETCH_TIMEOUT_SECONDS
+
+    @property
+    def indicator_key(self):
+        # Bar interval used as the indicator state key, e.g. "10s"
+        return f"{int(self.interval)}s"
+
+
+MODEL = MicroModel()
+
+
+def fetch_bar(symbol, indicator_key):
     """
-    This behaves like your original 'while True' loop, 
-    but it updates the global LATEST_TICKET variable instead of just printing.
+    Blocking data fetch for one symbol (runs in the executor): feeds the
+    new bar into the shared streaming indicators and returns
+    (price, indicators). Replace the mock with your data fetch.
     """
-    global LATEST_TICKET, BOT_STATUS
-    
-    print(">>> BOT LOOP STARTED")
-    BOT_STATUS["is_running"] = True
-    BOT_STATUS["mt5_connected"] = True # Assume connection success for this demo
-    
-    # Simulate your bot initialization
-    # assistant = EnhancedTradingAssistant()
-    # model = MicroModel()
-    
-    while True:
+    # --- SIMULATE YOUR BOT LOGIC HERE ---
+    # df = assistant.get_latest_data()
+    base = MOCK_BASE_PRICES.get(symbol, 100.0)
+    price = base + random.uniform(-0.005, 0.005) * base
+
+    bar_time = int(time.time())
+    indicators = update_indicators(symbol, indicator_key, {
+        "time": [bar_time], "open": [price], "high": [price],
+        "low": [price], "close": [price], "volume": [0]
+    })
+    return price, indicators
+
+
+def score_symbols(symbols, indicator_key, model=MODEL):
+    """
+    Long probability for each symbol from one batched model call over
+    the indicator feature matrix (None where indicators are not warm).
+    """
+    X, valid = model_features(feature_matrix(symbols, indicator_key))
+    proba = model.predict_proba_batch(X)
+    return [float(p) if ok else None for p, ok in zip(proba, valid)]
+
+
+def build_ticket(symbol, price, indicators, proba):
+    """Ticket dict for one bar and its model probability."""
+    base = MOCK_BASE_PRICES.get(symbol, 100.0)
+    risk = base * 0.0025
+    rsi = indicators["rsi_14"]
+    digits = 5 if base < 10 else 2
+
+    if proba is None:
+        signal_type, status, confidence = "WAIT", "WAITING_FOR_DATA", 0.0
+        sl = tp = price
+    else:
+        is_long = proba >= 0.5
+        signal_type, status = ("LONG" if is_long else "SHORT"), "SIGNAL_GENERATED"
+        confidence = max(proba, 1 - proba) * 100
+        sl = price - risk if is_long else price + risk
+        tp = price + 2 * risk if is_long else price - 2 * risk
+
+    # This follows the structure you likely have in your 'ticket' dict
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "symbol": symbol,
+        "signal_type": signal_type,
+        "entry_price": round(price, digits),
+        "sl": round(sl, digits),
+        "tp": round(tp, digits),
+        "confidence": round(confidence, 2),
+        "indicators": {
+            "rsi": round(rsi, 2) if rsi is not None else None,
+            "sma_20": round(indicators["sma_20"], digits) if indicators["sma_20"] is not None else None,
+            "volatility": "MEDIUM"
+        },
+        "status": status
+    }
+
+
+def store_tickets(tickets):
+    """Append tickets to the history (blocking: may spill to SQLite)."""
+    for ticket in tickets:
+        TICKET_STORE.append(ticket)
+
+
+def _publish_ticket(ticket):
+    """
+    Swap in the new ticket and status snapshots (event loop only).
+    The ticket must already be stored with store_tickets(), which runs
+    in the executor.
+    """
+    global LATEST_TICKET, LATEST_TICKETS, BOT_STATUS
+
+    LATEST_TICKETS = dict(LATEST_TICKETS, **{ticket["symbol"]: ticket})
+    LATEST_TICKET = ticket
+    TICKETS.publish(ticket)
+    _set_bot_status(ticket["symbol"], last_update=ticket["timestamp"], failures=0, last_error=None)
+
+
+def _set_bot_status(symbol, **changes):
+    """Replace BOT_STATUS with a copy that has one bot's fields changed."""
+    global BOT_STATUS
+
+    bots = dict(BOT_STATUS.get("bots", {}))
+    bots[symbol] = dict(bots.get(symbol, {}), **changes)
+    last_update = changes.get("last_update") or BOT_STATUS.get("last_update")
+    BOT_STATUS = dict(
+        BOT_STATUS,
+        bots=bots,
+        last_update=last_update,
+        is_running=any(b.get("running") for b in bots.values())
+    )
+
+
+class BotScheduler:
+    """
+    Runs one asyncio task per bot interval, starting at a random offset
+    and ticking with jitter. Every tick scores all due bots of that
+    interval with one score_symbols() call. A fetch that fails or times
+    out backs its bot off exponentially without delaying the others.
+    """
+
+    def __init__(self, configs, workers=BOT_WORKERS):
+        self.configs = list(configs)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bot-inference")
+        self.tasks = []
+
+    def start(self):
+        global BOT_STATUS
+        BOT_STATUS = dict(BOT_STATUS, mt5_connected=True)  # Assume connection success for this demo
+        groups = {}
+        for config in self.configs:
+            _set_bot_status(config.symbol, running=True, interval=config.interval, failures=0)
+            groups.setdefault(config.interval, []).append(config)
+        for interval, configs in groups.items():
+            self.tasks.append(asyncio.create_task(self._run(interval, configs), name=f"bots-{interval:g}s"))
+        print(f">>> BOT SCHEDULER STARTED: {', '.join(c.symbol for c in self.configs)}")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.executor.shutdown(wait=False)
+        for config in self.configs:
+            _set_bot_status(config.symbol, running=False)
+
+    async def _run(self, interval, configs):
+        loop = asyncio.get_running_loop()
+        jitter = max(config.jitter for config in configs)
+        # symbol -> consecutive failures / loop time it may run again
+        failures = {config.symbol: 0 for config in configs}
+        next_due = {config.symbol: 0.0 for config in configs}
+
+        # Stagger the interval groups
+        await asyncio.sleep(random.uniform(0, interval * jitter))
+        next_tick = loop.time()
+
+        while True:
+            due = [config for config in configs if next_due[config.symbol] <= loop.time()]
+            if due:
+                await self._tick(loop, due, failures, next_due)
+
+            # Jittered cadence; ticks that overran are skipped, not queued
+            next_tick = max(next_tick + interval * (1 + random.uniform(-jitter, jitter)), loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+    async def _tick(self, loop, due, failures, next_due):
+        """Fetch the due bots' bars, score them in one call, publish the tickets."""
+        indicator_key = due[0].indicator_key
+        bars = await asyncio.gather(*(
+            self._fetch(loop, config, indicator_key) for config in due
+        ), return_exceptions=True)
+
+        fetched = []
+        for config, bar in zip(due, bars):
+            if isinstance(bar, Exception):
+                self._failed(loop, config, bar, failures, next_due)
+            else:
+                fetched.append((config, bar))
+        if not fetched:
+            return
+
         try:
-            # --- SIMULATE YOUR BOT LOGIC HERE ---
-            # 1. Get Data
-            # df = assistant.get_latest_data()
-            
-            # 2. Generate Signal (Mocking your 'generate_signal_with_micro')
-            # ticket = assistant.generate_signal_with_micro(...)
-            
-            # MOCKING THE RESULT FOR DEMO:
-            import random
-            is_long = random.choice([True, False])
-            price = 2030.0 + random.uniform(-10, 10)
-            
-            # This follows the structure you likely have in your 'ticket' dict
-            new_ticket = {
-                "timestamp": datetime.now().isoformat(),
-                "symbol": "XAUUSD",
-                "signal_type": "LONG" if is_long else "SHORT",
-                "entry_price": round(price, 2),
-                "sl": round(price - 5 if is_long else price + 5, 2),
-                "tp": round(price + 10 if is_long else price - 10, 2),
-                "confidence": round(random.uniform(70, 95), 2),
-                "indicators": {
-                    "rsi": round(random.uniform(30, 70), 2),
-                    "volatility": "MEDIUM"
-                },
-                "status": "SIGNAL_GENERATED"
-            }
-            
-            # Update Global State
-            LATEST_TICKET = new_ticket
-            BOT_STATUS["last_update"] = datetime.now().isoformat()
-            
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] New Signal Generated: {new_ticket['signal_type']}")
-            
-            # Sleep like in your original loop (e.g., time.sleep(10))
-            time.sleep(10) 
-            
+            scores = await loop.run_in_executor(
+                self.executor, score_symbols, [config.symbol for config, _ in fetched], indicator_key
+            )
+            tickets = [
+                build_ticket(config.symbol, price, indicators, proba)
+                for (config, (price, indicators)), proba in zip(fetched, scores)
+            ]
+            await loop.run_in_executor(self.executor, store_tickets, tickets)
         except Exception as e:
-            print(f"Error in bot loop: {e}")
-            time.sleep(5)
+            for config, _ in fetched:
+                self._failed(loop, config, e, failures, next_due)
+            return
+
+        for (config, _), ticket in zip(fetched, tickets):
+            failures[config.symbol] = 0
+            _publish_ticket(ticket)
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] New Signal Generated: {config.symbol} {ticket['signal_type']}")
+
+    async def _fetch(self, loop, config, indicator_key):
+        """fetch_bar() in the executor, bounded by the bot's fetch timeout."""
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.executor, fetch_bar, config.symbol, indicator_key),
+                config.fetch_timeout
+            )
+        except asyncio.TimeoutError:
+            # The worker thread finishes on its own; its bar is discarded
+            raise TimeoutError(f"data fetch timed out after {config.fetch_timeout:g}s")
+
+    def _failed(self, loop, config, error, failures, next_due):
+        failures[config.symbol] += 1
+        backoff = min(config.interval * 2 ** failures[config.symbol], config.max_backoff)
+        next_due[config.symbol] = loop.time() + backoff * (1 + random.uniform(-config.jitter, config.jitter))
+        _set_bot_status(config.symbol, failures=failures[config.symbol], last_error=str(error))
+        print(f"Error in bot {config.symbol}: {error}")
+
+
+scheduler = BotScheduler(BotConfig(symbol) for symbol in BOT_SYMBOLS)
 
 # ==========================================
 # 4. FASTAPI BACKEND
@@ -148,19 +465,103 @@ class TicketOut(BaseModel):
 
 @app.on_event("startup")
 async def startup_event():
-    """Start the bot loop in a background thread when API starts."""
-    bot_thread = threading.Thread(target=main_enhanced_trading_loop, daemon=True)
-    bot_thread.start()
+    """Start the bot scheduler on the API's event loop."""
+    scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await scheduler.stop()
 
 @app.get("/api/status")
-def get_status():
+async def get_status():
     """Return bot connectivity and account status."""
     return BOT_STATUS
 
 @app.get("/api/latest-ticket", response_model=TicketOut)
-def get_latest_ticket():
-    """Return the current/latest trading signal."""
-    return LATEST_TICKET
+async def get_latest_ticket(symbol: Optional[str] = None):
+    """Return the latest trading signal (of any bot, or of `symbol`)."""
+    if symbol is None:
+        return LATEST_TICKET
+    ticket = LATEST_TICKETS.get(symbol.upper())
+    if ticket is None:
+        raise HTTPException(status_code=404, detail=f"No ticket for {symbol}")
+    return ticket
+
+@app.get("/api/tickets")
+def get_tickets(
+    symbol: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """
+    Ticket history, oldest first. `since` / `until` are epoch seconds or
+    ISO timestamps; pass the returned next_cursor as `cursor` for the
+    next page. A plain def: FastAPI runs it in its threadpool, since a
+    query can read spilled tickets from SQLite.
+    """
+    try:
+        tickets, next_cursor = TICKET_STORE.query(
+            symbol=symbol,
+            since=_parse_ts(since),
+            until=_parse_ts(until),
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"tickets": tickets, "next_cursor": next_cursor}
+
+def _parse_ts(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}")
+
+@app.get("/api/tickets/stream")
+async def stream_tickets(request: Request, since: Optional[int] = None):
+    """
+    Server-Sent Events stream of new tickets. Each event's id is the
+    ticket's sequence number: reconnecting with Last-Event-ID (sent
+    automatically by EventSource) or ?since= replays the tickets missed
+    in between. Without either, the stream starts with the latest ticket.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    if since is None:
+        since = max(TICKETS.last_seq - 1, 0)
+
+    if TICKETS.subscriber_count() >= MAX_TICKET_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many ticket subscribers")
+
+    async def events():
+        listener = TICKETS.listen(since)
+        try:
+            yield "retry: 3000\n\n"
+            async for item in listener:
+                if await request.is_disconnected():
+                    break
+                if item is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                seq, ticket = item
+                yield f"id: {seq}\nevent: ticket\ndata: {json.dumps(ticket)}\n\n"
+        finally:
+            await listener.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/api/execute-trade")
 def execute_trade(action: str):
@@ -171,7 +572,7 @@ def execute_trade(action: str):
     # In real code: call bot.execute_order(LATEST_TICKET)
     return {"status": "Trade execution queued", "action": action}
 
-# If running directly for testing
+# If running directly for testing (from the repository root: python -m api.bot_api)
 if __name__ == "__main__":
     import uvicorn
     # run on port 8000 to avoid conflict with your existing flask app on 5000
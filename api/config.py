@@ -10,6 +10,14 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET', 'tradesense-super-secret-key-2024')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Background quote pre-warmer (off by default, e.g. on serverless)
+    QUOTE_PREWARM = os.getenv('QUOTE_PREWARM', 'false').lower() == 'true'
+    QUOTE_PREWARM_SYMBOLS = [s for s in os.getenv('QUOTE_PREWARM_SYMBOLS', '').split(',') if s]
+    # Re-check all active challenges after each pre-warm refresh
+    RULE_SWEEP_ON_REFRESH = os.getenv('RULE_SWEEP_ON_REFRESH', 'true').lower() == 'true'
+    # Orders execute in the request (sync) or on a background worker
+    # pool (queue, long-running single-process deploys only)
+    ORDER_EXECUTION = os.getenv('ORDER_EXECUTION', 'sync').lower()
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -30,6 +30,25 @@ def create_app(config_name=None):
     db.init_app(app)
     JWTManager(app)
     
+    if app.config.get('QUOTE_PREWARM'):
+        from api.services.prewarm import start_prewarmer
+        from api.services.rule_sweep import sweep_active_challenges
+        from api.services.positions import refresh_marks, unrealized_by_challenge
+        
+        def sweep_rules(symbols):
+            # Price moved: re-mark open positions and re-check every
+            # active challenge in bulk
+            with app.app_context():
+                try:
+                    refresh_marks()
+                    sweep_active_challenges(unrealized=unrealized_by_challenge())
+                except Exception as e:
+                    db.session.rollback()
+                    print(f">>> WARNING: Rule sweep failed: {e}")
+        
+        on_refresh = sweep_rules if app.config.get('RULE_SWEEP_ON_REFRESH') else None
+        start_prewarmer(app.config.get('QUOTE_PREWARM_SYMBOLS', []), on_refresh=on_refresh)
+    
     @app.route('/api/health')
     def health():
         return {'status': 'ok', 'message': 'TradeSense API is running'}
@@ -44,6 +63,9 @@ with app.app_context():
     try:
         db.create_all()
         print(">>> Database tables created (or already exist).")
+        if app.config.get('ORDER_EXECUTION') == 'queue':
+            from api.services.orders import fail_abandoned_orders
+            fail_abandoned_orders()
     except Exception as e:
         print(f">>> WARNING: Database connection failed or not configured. App running in 'No-DB' mode. Error: {e}")
 
@@ -60,7 +60,7 @@ class Challenge(db.Model):
     start_balance = db.Column(db.Float, default=5000)
     equity = db.Column(db.Float, default=5000)
     status = db.Column(db.String(20), default='active')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     passed_at = db.Column(db.DateTime, nullable=True)
     failed_at = db.Column(db.DateTime, nullable=True)
     trades = db.relationship('Trade', backref='challenge', lazy=True)
@@ -77,6 +77,10 @@ class Challenge(db.Model):
 
 class Trade(db.Model):
     __tablename__ = 'trades'
+    __table_args__ = (
+        # Backs the keyset-paginated trade history (newest first)
+        db.Index('idx_trades_challenge_executed', 'challenge_id', 'executed_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=False)
     symbol = db.Column(db.String(20), nullable=False)
@@ -96,3 +100,87 @@ class Trade(db.Model):
             'pnl': self.pnl,
             'executed_at': self.executed_at.isoformat()
         }
+
+class DailyMetrics(db.Model):
+    __tablename__ = 'daily_metrics'
+    __table_args__ = (
+        db.Index('idx_daily_metrics_challenge_date', 'challenge_id', 'date'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    day_start_equity = db.Column(db.Float, nullable=False)
+    day_end_equity = db.Column(db.Float, nullable=True)
+    day_pnl = db.Column(db.Float, default=0)
+    max_intraday_drawdown_pct = db.Column(db.Float, default=0)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'challenge_id': self.challenge_id,
+            'date': self.date.isoformat(),
+            'day_start_equity': self.day_start_equity,
+            'day_end_equity': self.day_end_equity,
+            'day_pnl': self.day_pnl,
+            'max_intraday_drawdown_pct': self.max_intraday_drawdown_pct
+        }
+
+class Position(db.Model):
+    __tablename__ = 'positions'
+    __table_args__ = (
+        db.UniqueConstraint('challenge_id', 'symbol', name='uq_positions_challenge_symbol'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=False, index=True)
+    symbol = db.Column(db.String(20), nullable=False)
+    qty = db.Column(db.Float, default=0)  # Signed: > 0 long, < 0 short
+    avg_price = db.Column(db.Float, default=0)
+    realized_pnl = db.Column(db.Float, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'challenge_id': self.challenge_id,
+            'symbol': self.symbol,
+            'qty': self.qty,
+            'avg_price': self.avg_price,
+            'realized_pnl': self.realized_pnl,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class Order(db.Model):
+    __tablename__ = 'orders'
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    symbol = db.Column(db.String(20), nullable=False)
+    side = db.Column(db.String(10), nullable=False)
+    qty = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued | filled | rejected | failed
+    error = db.Column(db.Text, nullable=True)
+    result_json = db.Column(db.Text, nullable=True)  # Fill result (trade, position, challenge, rule_result)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    executed_at = db.Column(db.DateTime, nullable=True)
+    
+    @property
+    def pending(self):
+        return self.status == 'queued'
+    
+    @property
+    def result(self):
+        import json
+        return json.loads(self.result_json) if self.result_json else None
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'challenge_id': self.challenge_id,
+            'symbol': self.symbol,
+            'side': self.side,
+            'qty': self.qty,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'executed_at': self.executed_at.isoformat() if self.executed_at else None
+        }
@@ -4,6 +4,7 @@ from flask_jwt_extended import jwt_required
 from api.services.ai_advisor import get_ai_analysis, get_ai_chat_response
 from api.services.market import get_quote
 from api.services.morocco_scraper import get_morocco_quote
+from api.services.indicators import get_indicators
 
 ai_bp = Blueprint('ai', __name__)
 
@@ -60,6 +61,11 @@ def analyze_market():
     except Exception as e:
         return jsonify({'error': f'Data fetch error: {str(e)}'}), 500
         
+    # Attach the shared indicator snapshot (no recomputation here)
+    indicators = get_indicators(symbol, '1h')
+    if indicators:
+        quote = dict(quote, indicators=indicators)
+    
     # Generate analysis
     analysis = get_ai_analysis(
         symbol=symbol,
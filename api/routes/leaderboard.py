@@ -1,7 +1,7 @@
-from flask import Blueprint, jsonify
-from api.models import db, Challenge, User
-from sqlalchemy import func, extract
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from api.services import leaderboard
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
 
@@ -9,39 +9,46 @@ leaderboard_bp = Blueprint('leaderboard', __name__)
 def monthly_top10():
     """Get top 10 traders of the current month by profit percentage."""
     now = datetime.utcnow()
-    current_month = now.month
-    current_year = now.year
     
-    # Query challenges created this month, calculate profit %
-    results = db.session.query(
-        User.id,
-        User.name,
-        Challenge.id.label('challenge_id'),
-        Challenge.start_balance,
-        Challenge.equity,
-        Challenge.status,
-        ((Challenge.equity - Challenge.start_balance) / Challenge.start_balance * 100).label('profit_pct')
-    ).join(User, Challenge.user_id == User.id).filter(
-        extract('month', Challenge.created_at) == current_month,
-        extract('year', Challenge.created_at) == current_year
-    ).order_by(
-        ((Challenge.equity - Challenge.start_balance) / Challenge.start_balance * 100).desc()
-    ).limit(10).all()
+    return jsonify({
+        'month': now.strftime('%B %Y'),
+        'leaderboard': leaderboard.top('monthly', 10)
+    }), 200
+
+
+@leaderboard_bp.route('/top', methods=['GET'])
+def top():
+    """Get the top traders of a period (daily, weekly, monthly, all-time)."""
+    period = request.args.get('period', leaderboard.DEFAULT_PERIOD)
     
-    leaderboard = []
-    for i, row in enumerate(results, 1):
-        leaderboard.append({
-            'rank': i,
-            'user_id': row.id,
-            'name': row.name,
-            'challenge_id': row.challenge_id,
-            'start_balance': row.start_balance,
-            'equity': row.equity,
-            'profit_pct': round(row.profit_pct, 2),
-            'status': row.status
-        })
+    try:
+        start = leaderboard.period_start(period)
+        limit = int(request.args.get('limit', 10))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
-        'month': now.strftime('%B %Y'),
-        'leaderboard': leaderboard
+        'period': period,
+        'period_start': start.isoformat() if start else None,
+        'leaderboard': leaderboard.top(period, limit)
+    }), 200
+
+
+@leaderboard_bp.route('/my-rank', methods=['GET'])
+@jwt_required()
+def my_rank():
+    """Get the current user's best rank in a period."""
+    period = request.args.get('period', leaderboard.DEFAULT_PERIOD)
+    
+    try:
+        leaderboard.period_start(period)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    entry, total = leaderboard.rank_of_user(int(get_jwt_identity()), period)
+    
+    return jsonify({
+        'period': period,
+        'entry': entry,
+        'total': total
     }), 200
@@ -1,10 +1,15 @@
-from flask import Blueprint, request, jsonify
-from api.services.market import get_quote, get_series
-from api.services.morocco_scraper import get_morocco_quote
+import json
+import time
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from api.services.market import get_quote, get_series, get_multiple_quotes
+from api.services.quote_stream import hub, HubFull, HEARTBEAT_SECONDS, STREAM_MAX_SECONDS
+from api.services.morocco_scraper import get_morocco_quote, MOROCCO_STOCKS
 from api.services.calendar_service import get_economic_calendar
 
 market_bp = Blueprint('market', __name__)
 
+MAX_BATCH_SYMBOLS = 50
+
 @market_bp.route('/quote', methods=['GET'])
 def quote():
     """Get real-time quote for a symbol via yfinance."""
@@ -20,15 +25,93 @@ def quote():
         }), 500
 
 
+@market_bp.route('/quotes', methods=['GET'])
+def quotes():
+    """Get quotes for several symbols in one request."""
+    symbols_param = request.args.get('symbols', '')
+    symbols = [s.strip() for s in symbols_param.split(',') if s.strip()]
+    
+    if not symbols:
+        return jsonify({'error': 'symbols is required'}), 400
+    
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return jsonify({'error': f'At most {MAX_BATCH_SYMBOLS} symbols per request'}), 400
+    
+    try:
+        morocco = [s for s in symbols if s.upper() in MOROCCO_STOCKS]
+        others = [s for s in symbols if s.upper() not in MOROCCO_STOCKS]
+        
+        data = get_multiple_quotes(others) if others else {}
+        for symbol in morocco:
+            data[symbol] = get_morocco_quote(symbol)
+        
+        return jsonify({'quotes': data}), 200
+    except Exception as e:
+        return jsonify({
+            'error': f'Failed to fetch quotes: {str(e)}',
+            'symbols': symbols
+        }), 500
+
+
+@market_bp.route('/stream', methods=['GET'])
+def stream():
+    """
+    Stream quotes for several symbols as Server-Sent Events.
+    The first `quote` event per symbol is the full quote; later ones
+    only carry the fields that changed (null = field removed). The
+    stream ends after STREAM_MAX_SECONDS; EventSource reconnects.
+    """
+    symbols_param = request.args.get('symbols', '')
+    symbols = [s.strip().upper() for s in symbols_param.split(',') if s.strip()]
+    
+    if not symbols:
+        return jsonify({'error': 'symbols is required'}), 400
+    
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return jsonify({'error': f'At most {MAX_BATCH_SYMBOLS} symbols per request'}), 400
+    
+    try:
+        subscription, snapshot = hub.subscribe(symbols)
+    except HubFull as e:
+        return jsonify({'error': str(e)}), 503
+    
+    def events():
+        try:
+            yield 'retry: 3000\n\n'
+            for quote_data in snapshot.values():
+                yield f'event: quote\ndata: {json.dumps(quote_data)}\n\n'
+            deadline = time.time() + STREAM_MAX_SECONDS
+            while time.time() < deadline:
+                pending = subscription.wait(min(HEARTBEAT_SECONDS, max(deadline - time.time(), 0)))
+                if not pending:
+                    # Keep proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                for delta in pending.values():
+                    yield f'event: quote\ndata: {json.dumps(delta)}\n\n'
+        finally:
+            hub.unsubscribe(subscription)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @market_bp.route('/series', methods=['GET'])
 def series():
     """Get historical OHLCV data for charting."""
     symbol = request.args.get('symbol', 'BTC-USD')
     interval = request.args.get('interval', '1m')
     range_param = request.args.get('range', '1d')
+    fmt = request.args.get('format', 'rows')
+    
+    if fmt not in ('rows', 'columns'):
+        return jsonify({'error': 'format must be rows or columns'}), 400
     
     try:
-        data = get_series(symbol, interval, range_param)
+        data = get_series(symbol, interval, range_param, fmt)
         return jsonify(data), 200
     except Exception as e:
         return jsonify({
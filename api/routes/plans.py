@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from api.models import db, Plan, Challenge, PayPalSettings
+from api.services import leaderboard
 
 plans_bp = Blueprint('plans', __name__)
 
@@ -65,6 +66,7 @@ def mock_checkout():
     
     db.session.add(challenge)
     db.session.commit()
+    leaderboard.update_challenge(challenge)
     
     return jsonify({
         'message': 'Payment successful! Challenge started.',
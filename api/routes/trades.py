@@ -1,19 +1,26 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from api.models import db, Trade, Challenge
-from api.services.market import get_quote
-from api.services.morocco_scraper import get_morocco_quote
-from api.services.rules import evaluate_challenge_rules
-import random
+from api.models import Challenge
+from api.services.orders import (
+    submit_order, get_order, wait_for_order, OrderQueueFull
+)
+from api.services.positions import get_portfolio
+from api.services.trade_history import list_trades, count_trades, parse_fields, DEFAULT_PAGE_SIZE
+from api.services.trade_io import (
+    import_trades, iter_csv_rows, iter_parquet_rows, export_csv, export_parquet, HAS_PYARROW
+)
 
 trades_bp = Blueprint('trades', __name__)
 
-MOROCCO_SYMBOLS = ['IAM', 'ATW', 'BCP', 'LHM', 'CIH']
-
 @trades_bp.route('/trades', methods=['POST'])
 @jwt_required()
 def create_trade():
-    """Execute a trade and update challenge equity."""
+    """
+    Place a trade. Executes immediately (ORDER_EXECUTION=sync) or is
+    queued (ORDER_EXECUTION=queue): a queued order returns 202 unless it
+    fills within `wait` seconds.
+    """
     data = request.get_json()
     
     if not data:
@@ -50,61 +57,203 @@ def create_trade():
     if challenge.status != 'active':
         return jsonify({'error': f'Challenge is {challenge.status}. Cannot trade.'}), 400
     
-    # Get current price
     try:
-        if symbol.upper() in MOROCCO_SYMBOLS:
-            quote_data = get_morocco_quote(symbol)
-        else:
-            quote_data = get_quote(symbol)
-        
-        price = quote_data.get('price', 0)
-        if not price:
-            return jsonify({'error': 'Could not get price for symbol'}), 500
-    except Exception as e:
-        return jsonify({'error': f'Failed to get price: {str(e)}'}), 500
-    
-    # Calculate trade value and simulate PnL
-    trade_value = price * qty
-    
-    # Simulate PnL: random between -3% and +3% of trade value
-    pnl_pct = random.uniform(-0.03, 0.03)
-    pnl = trade_value * pnl_pct
-    
-    # For sell trades, invert the logic slightly
-    if side == 'sell':
-        pnl = -pnl
-    
-    # Create trade
-    trade = Trade(
-        challenge_id=challenge_id,
-        symbol=symbol.upper(),
-        side=side,
-        qty=qty,
-        price=price,
-        pnl=round(pnl, 2)
-    )
+        order_id = submit_order(
+            current_app._get_current_object(),
+            challenge.id, challenge.user_id, symbol, side, qty
+        )
+    except OrderQueueFull as e:
+        return jsonify({'error': str(e)}), 429
     
-    # Update challenge equity
-    challenge.equity = round(challenge.equity + pnl, 2)
+    order = wait_for_order(order_id, _wait_seconds(data.get('wait')))
+    return _order_response(order, filled_status=201)
+
+
+@trades_bp.route('/trades/orders/<order_id>', methods=['GET'])
+@jwt_required()
+def get_order_status(order_id):
+    """
+    Poll an order. Pass `wait` (seconds) to long-poll until it executes.
+    """
+    order = get_order(order_id)
     
-    db.session.add(trade)
-    db.session.commit()
+    if not order:
+        return jsonify({'error': 'Order not found'}), 404
     
-    # Evaluate rules
-    rule_result = evaluate_challenge_rules(challenge)
+    if str(order.user_id) != str(get_jwt_identity()):
+        return jsonify({'error': 'Unauthorized'}), 403
     
-    return jsonify({
-        'message': 'Trade executed successfully',
-        'trade': trade.to_dict(),
-        'challenge': challenge.to_dict(),
-        'rule_result': rule_result
-    }), 201
+    order = wait_for_order(order.id, _wait_seconds(request.args.get('wait')))
+    return _order_response(order)
+
+
+def _wait_seconds(value):
+    try:
+        return max(float(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _order_response(order, filled_status=200):
+    """Pending: 202 with the order. Filled: the trade result. Else: the error."""
+    if order.pending:
+        return jsonify({
+            'message': 'Order queued',
+            'order': order.to_dict()
+        }), 202
+    
+    if order.status == 'filled':
+        return jsonify(dict(
+            order.result,
+            message='Trade executed successfully',
+            order=order.to_dict()
+        )), filled_status
+    
+    status_code = 400 if order.status == 'rejected' else 500
+    return jsonify({'error': order.error, 'order': order.to_dict()}), status_code
 
 
 @trades_bp.route('/trades', methods=['GET'])
 @jwt_required()
 def get_trades():
-    """Get trades for a challenge."""
+    """
+    Get a page of a challenge's trades, newest first.
+    Query params: limit, cursor (from next_cursor), fields (comma-separated),
+    symbol, from / to (ISO dates). The first page (no cursor) also
+    carries the total number of matching trades.
+    """
+    challenge_id = request.args.get('challenge_id')
+    
+    if not challenge_id:
+        return jsonify({'error': 'challenge_id is required'}), 400
+    
+    user_id = get_jwt_identity()
+    claims = get_jwt()
+    challenge = Challenge.query.get(challenge_id)
+    
+    if not challenge:
+        return jsonify({'error': 'Challenge not found'}), 404
+    
+    if challenge.user_id != user_id and claims.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        start = _parse_datetime(request.args.get('from'))
+        end = _parse_datetime(request.args.get('to'))
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        trades, next_cursor = list_trades(
+            challenge.id,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            fields=fields,
+            symbol=request.args.get('symbol'),
+            start=start,
+            end=end
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = {
+        'trades': trades,
+        'next_cursor': next_cursor
+    }
+    if not request.args.get('cursor'):
+        response['total'] = count_trades(
+            challenge.id, symbol=request.args.get('symbol'), start=start, end=end
+        )
+    return jsonify(response), 200
+
+
+def _parse_datetime(value):
+    """ISO date or datetime query param (None if absent)."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+
+
+@trades_bp.route('/trades/positions', methods=['GET'])
+@jwt_required()
+def get_positions():
+    """Get a challenge's open positions marked to market."""
+    challenge_id = request.args.get('challenge_id')
+    
+    if not challenge_id:
+        return jsonify({'error': 'challenge_id is required'}), 400
+    
+    user_id = get_jwt_identity()
+    claims = get_jwt()
+    challenge = Challenge.query.get(challenge_id)
+    
+    if not challenge:
+        return jsonify({'error': 'Challenge not found'}), 404
+    
+    if challenge.user_id != user_id and claims.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(get_portfolio(challenge)), 200
+
+
+@trades_bp.route('/trades/import', methods=['POST'])
+@jwt_required()
+def import_trade_history():
+    """
+    Import fills for a challenge from CSV (or Parquet) with columns
+    symbol, side, qty, price, executed_at, oldest first. Send the file
+    as multipart `file` or as the raw request body (CSV only).
+    """
+    challenge_id = request.args.get('challenge_id')
+    
+    if not challenge_id:
+        return jsonify({'error': 'challenge_id is required'}), 400
+    
+    user_id = get_jwt_identity()
+    claims = get_jwt()
+    challenge = Challenge.query.get(challenge_id)
+    
+    if not challenge:
+        return jsonify({'error': 'Challenge not found'}), 404
+    
+    if challenge.user_id != user_id and claims.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if challenge.status != 'active':
+        return jsonify({'error': f'Challenge is {challenge.status}. Cannot import trades.'}), 400
+    
+    upload = request.files.get('file')
+    fmt = request.args.get('format')
+    if not fmt:
+        filename = upload.filename if upload else ''
+        fmt = 'parquet' if filename.lower().endswith('.parquet') else 'csv'
+    
+    try:
+        if fmt == 'csv':
+            rows = iter_csv_rows(upload.stream if upload else request.stream)
+        elif fmt == 'parquet':
+            if not upload:
+                return jsonify({'error': 'Parquet imports must be sent as a multipart file'}), 400
+            rows = iter_parquet_rows(upload.stream)
+        else:
+            return jsonify({'error': 'format must be csv or parquet'}), 400
+        
+        result = import_trades(challenge.id, rows)
+    except ValueError as e:
+        # Bad row or inactive challenge: the import was rolled back
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result), 201
+
+
+@trades_bp.route('/trades/export', methods=['GET'])
+@jwt_required()
+def export_trade_history():
+    """
+    Stream a challenge's trades as CSV (default) or Parquet.
+    Accepts the same fields / symbol / from / to params as GET /trades.
+    """
     challenge_id = request.args.get('challenge_id')
     
     if not challenge_id:
@@ -120,10 +269,29 @@ def get_trades():
     if challenge.user_id != user_id and claims.get('role') != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
-    trades = Trade.query.filter_by(challenge_id=challenge_id).order_by(
-        Trade.executed_at.desc()
-    ).all()
+    fmt = request.args.get('format', 'csv')
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        filters = {
+            'symbol': request.args.get('symbol'),
+            'start': _parse_datetime(request.args.get('from')),
+            'end': _parse_datetime(request.args.get('to'))
+        }
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'trades': [t.to_dict() for t in trades]
-    }), 200
+    if fmt == 'csv':
+        body, mimetype = export_csv(challenge.id, fields, **filters), 'text/csv'
+    elif fmt == 'parquet':
+        if not HAS_PYARROW:
+            return jsonify({'error': 'Parquet support requires pyarrow'}), 400
+        body, mimetype = export_parquet(challenge.id, fields, **filters), 'application/vnd.apache.parquet'
+    else:
+        return jsonify({'error': 'format must be csv or parquet'}), 400
+    
+    filename = f'trades_challenge_{challenge.id}.{fmt}'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
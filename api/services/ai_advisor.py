@@ -84,10 +84,18 @@ def _generate_mock_analysis(symbol, price_data):
         target = "Wait for breakout"
         stop = "N/A"
         
+    technical_setup = f"Price is {bias.lower()}. Volatility is {'high' if abs(change) > 2 else 'moderate'}."
+    
+    indicators = price_data.get('indicators') or {}
+    if indicators.get('rsi_14') is not None:
+        technical_setup += f" RSI(14) at {indicators['rsi_14']:.1f}."
+    if indicators.get('sma_20') is not None:
+        technical_setup += f" 20-period SMA at {indicators['sma_20']:.2f}."
+    
     return {
         "market_bias": bias,
         "news_impact": "Neutral - No major catalysts identified.",
-        "technical_setup": f"Price is {bias.lower()}. Volatility is {'high' if abs(change) > 2 else 'moderate'}.",
+        "technical_setup": technical_setup,
         "best_scenario": f"{bias} continuation towards targets.",
         "recommendation": rec,
         "entry_zone": f"{price}",
@@ -0,0 +1,205 @@
+"""
+Signal Backtesting Engine
+
+Replays stored OHLCV candles through the rule-based signal generator
+bar by bar, simulates fills and reports hit rate, PnL and drawdown.
+
+Runs fully offline: candles come from the local candle store
+(services/candle_store.py) or from CSV files named
+{SYMBOL}_{interval}.csv with time,open,high,low,close,volume columns.
+Symbol x parameter-set jobs are spread over a process pool.
+
+Usage (from the repository root):
+    python -m api.services.backtest --symbols BTC-USD,AAPL --interval 1h
+    python -m api.services.backtest --symbols BTC-USD --csv-dir data/ --grid
+"""
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from api.services import candle_store
+from api.services.signals import score_signals, SMA_PERIOD
+
+# Simulation settings, tunable alongside the rule thresholds
+DEFAULT_BACKTEST_PARAMS = {
+    'hold_bars': 5,        # Bars a position is held after the fill
+    'min_confidence': 65,  # Only trade signals at or above this confidence
+    'day_bars': 24,        # Bars per "day" for change %, daily range and volume
+    'fee_pct': 0.05        # Round-trip cost per trade, in %
+}
+
+
+def load_candles(symbol, interval, csv_dir=None):
+    """
+    Load columnar OHLCV arrays for a symbol from CSV or the candle store.
+    """
+    if csv_dir:
+        path = os.path.join(csv_dir, f"{symbol.upper()}_{interval}.csv")
+        data = np.genfromtxt(path, delimiter=',', names=True, dtype=np.float64)
+        return {field: np.atleast_1d(data[field]) for field in data.dtype.names}
+
+    columns = candle_store.load(symbol, interval)
+    return {field: np.asarray(values, dtype=np.float64) for field, values in columns.items()}
+
+
+def _rolling(values, window, reducer):
+    """Trailing-window reduction; the first window-1 entries use what is available."""
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    return reducer(windows, axis=1)
+
+
+def build_features(candles, day_bars, sma_period=SMA_PERIOD):
+    """
+    Rebuild, for every bar, the quote fields the rules read
+    (price, change %, daily high/low/volume) and the SMA, using only
+    data available at that bar.
+    """
+    close = candles['close']
+    n = close.size
+
+    prev_close = np.full(n, np.nan)
+    if n > day_bars:
+        prev_close[day_bars:] = close[:-day_bars]
+    change_pct = np.where(np.isnan(prev_close), 0.0, (close / prev_close - 1) * 100)
+
+    high = _rolling(candles['high'], day_bars, np.nanmax)
+    low = _rolling(candles['low'], day_bars, np.nanmin)
+    volume = _rolling(np.nan_to_num(candles['volume']), day_bars, np.nansum)
+    # Full windows only, like the live rule (needs 20 closes)
+    sma = _rolling(close, sma_period, np.mean)
+
+    return close, change_pct, high, low, volume, sma
+
+
+def simulate(candles, rule_params=None, backtest_params=None):
+    """
+    Score every bar, enter on the next bar's open for BUY/SELL signals
+    above min_confidence and exit at the close hold_bars later.
+    Every qualifying bar opens its own trade (trades may overlap), each
+    sized at one unit of notional, so PnL is the sum of per-trade
+    returns in % and drawdown is measured on that running sum.
+    """
+    bp = dict(DEFAULT_BACKTEST_PARAMS, **(backtest_params or {}))
+    hold = int(bp['hold_bars'])
+    n = candles['close'].size
+
+    price, change_pct, high, low, volume, sma = build_features(candles, int(bp['day_bars']))
+    scored = score_signals(price, change_pct, high, low, volume, sma, rule_params)
+
+    signal = np.asarray(scored['signal'])
+    direction = np.where(signal == 'BUY', 1, np.where(signal == 'SELL', -1, 0))
+    active = (direction != 0) & (scored['confidence'] >= bp['min_confidence'])
+
+    # Need a next bar to fill and hold_bars to exit
+    entry_idx = np.arange(n) + 1
+    exit_idx = np.arange(n) + hold
+    active &= exit_idx < n
+
+    bars = np.flatnonzero(active)
+    entry = candles['open'][entry_idx[bars]]
+    exit_ = candles['close'][exit_idx[bars]]
+    returns = direction[bars] * (exit_ / entry - 1) * 100 - bp['fee_pct']
+
+    equity = np.cumsum(returns)
+    peak = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:]
+    drawdown = equity - peak
+
+    trades = int(returns.size)
+    wins = int(np.count_nonzero(returns > 0))
+    return {
+        'bars': int(n),
+        'trades': trades,
+        'wins': wins,
+        'hit_rate': round(wins / trades * 100, 2) if trades else 0,
+        'total_pnl_pct': round(float(equity[-1]), 2) if trades else 0,
+        'avg_trade_pct': round(float(returns.mean()), 4) if trades else 0,
+        'max_drawdown_pct': round(float(drawdown.min()), 2) if trades else 0,
+        'long_trades': int(np.count_nonzero(direction[bars] > 0)),
+        'short_trades': int(np.count_nonzero(direction[bars] < 0))
+    }
+
+
+def _run_job(job):
+    """Process-pool worker: one symbol with one parameter set."""
+    symbol, interval, csv_dir, rule_params, backtest_params = job
+    result = {
+        'symbol': symbol,
+        'interval': interval,
+        'rule_params': rule_params,
+        'backtest_params': backtest_params
+    }
+    try:
+        candles = load_candles(symbol, interval, csv_dir)
+        if candles['close'].size == 0:
+            result['error'] = 'No stored candles'
+            return result
+        result.update(simulate(candles, rule_params, backtest_params))
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def run_backtests(symbols, interval='1h', param_sets=None, csv_dir=None, processes=None):
+    """
+    Backtest every symbol against every (rule_params, backtest_params)
+    pair in param_sets. Jobs run in parallel in a process pool.
+    Returns one result dict per job.
+    """
+    param_sets = param_sets or [({}, {})]
+    jobs = [
+        (symbol.upper(), interval, csv_dir, rule_params, backtest_params)
+        for symbol in symbols
+        for rule_params, backtest_params in param_sets
+    ]
+
+    if processes == 1 or len(jobs) == 1:
+        return [_run_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_run_job, jobs, chunksize=max(1, len(jobs) // 32)))
+
+
+def param_grid(rule_grid=None, backtest_grid=None):
+    """
+    Expand {name: [values]} grids into a list of
+    (rule_params, backtest_params) pairs.
+    """
+    def expand(grid):
+        if not grid:
+            return [{}]
+        keys = list(grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+    return [(r, b) for r in expand(rule_grid) for b in expand(backtest_grid)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest the rule-based signal generator.')
+    parser.add_argument('--symbols', required=True, help='Comma-separated symbols')
+    parser.add_argument('--interval', default='1h')
+    parser.add_argument('--csv-dir', help='Read {SYMBOL}_{interval}.csv files instead of the candle store')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--grid', action='store_true', help='Sweep a default parameter grid')
+    args = parser.parse_args()
+
+    param_sets = None
+    if args.grid:
+        param_sets = param_grid(
+            {'move_pct': [0.25, 0.5, 1.0], 'sma_band': [0.01, 0.02]},
+            {'hold_bars': [3, 5, 10], 'min_confidence': [65, 80]}
+        )
+
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    results = run_backtests(symbols, args.interval, param_sets, args.csv_dir, args.processes)
+    results.sort(key=lambda r: r.get('total_pnl_pct', float('-inf')), reverse=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from datetime import datetime
 import random
+from api.services.ticket_store import store as ticket_store
 
 # Mock Global State
 LATEST_TICKET = {
@@ -35,4 +36,5 @@ def generate_signal():
     }
     
     LATEST_TICKET = new_ticket
+    ticket_store.append(new_ticket)
     return new_ticket
@@ -0,0 +1,106 @@
+"""
+BVC Page Parsers
+
+Extracts prices from Bourse de Casablanca pages without building a
+full BeautifulSoup tree when possible.
+
+Backends, fastest first:
+- 'regex': targeted extractor for the price element only
+- 'lxml': lxml.html tree + XPath (if lxml is installed)
+- 'bs4': BeautifulSoup with html.parser (always available)
+"""
+
+import re
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - lxml is optional
+    HAS_LXML = False
+
+DEFAULT_BACKEND = 'lxml' if HAS_LXML else 'bs4'
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_PRICE_SPAN_RE = re.compile(
+    r'<span\b[^>]*\bid\s*=\s*["\']cours["\'][^>]*>(.*?)</span>',
+    re.IGNORECASE | re.DOTALL
+)
+_PRICE_TD_RE = re.compile(
+    r'<td\b[^>]*\bclass\s*=\s*["\'](?:[^"\']*\s)?cours(?:\s[^"\']*)?["\'][^>]*>(.*?)</td>',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def extract_price_text(html, backend=None):
+    """
+    Return the raw text of the price element (span#cours or td.cours),
+    or None if the page has none.
+    The regex pass runs first; tree parsers are the fallback.
+    """
+    text = _extract_price_regex(html)
+    if text is not None:
+        return text
+
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'lxml' and HAS_LXML:
+        return _extract_price_lxml(html)
+    return _extract_price_bs4(html)
+
+
+def _extract_price_regex(html):
+    match = _PRICE_SPAN_RE.search(html) or _PRICE_TD_RE.search(html)
+    if match is None:
+        return None
+    return _TAG_RE.sub('', match.group(1)).strip()
+
+
+def _extract_price_lxml(html):
+    doc = lxml.html.fromstring(html)
+    elems = doc.xpath(
+        '//span[@id="cours"] | //td[contains(concat(" ", normalize-space(@class), " "), " cours ")]'
+    )
+    if not elems:
+        return None
+    return elems[0].text_content().strip()
+
+
+def _extract_price_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    price_elem = soup.find('span', {'id': 'cours'}) or soup.find('td', {'class': 'cours'})
+    if price_elem is None:
+        return None
+    return price_elem.get_text().strip()
+
+
+def extract_listing_rows(html, backend=None):
+    """
+    Return table rows as (cell_texts, cours_text) tuples, where
+    cours_text is the text of the row's td.cours cell (or None).
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'lxml' and HAS_LXML:
+        return _listing_rows_lxml(html)
+    return _listing_rows_bs4(html)
+
+
+def _listing_rows_lxml(html):
+    rows = []
+    for row in lxml.html.fromstring(html).iter('tr'):
+        cells = row.findall('td')
+        texts = [c.text_content().strip() for c in cells]
+        cours = next(
+            (t for c, t in zip(cells, texts) if 'cours' in (c.get('class') or '').split()),
+            None
+        )
+        rows.append((texts, cours))
+    return rows
+
+
+def _listing_rows_bs4(html):
+    rows = []
+    for row in BeautifulSoup(html, 'html.parser').find_all('tr'):
+        texts = [c.get_text().strip() for c in row.find_all('td')]
+        price_cell = row.find('td', class_='cours')
+        rows.append((texts, price_cell.get_text().strip() if price_cell else None))
+    return rows
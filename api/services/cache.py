@@ -0,0 +1,262 @@
+"""
+Cache Layer
+
+Bounded LRU + TTL caches shared by the market data services.
+Includes single-flight request coalescing and an optional SQLite
+backend so every gunicorn worker sees the same cached quotes.
+
+Backend selection (environment):
+- CACHE_BACKEND=memory (default): per-process LRU cache
+- CACHE_BACKEND=sqlite: shared file at CACHE_DB_PATH
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_DB_PATH = os.getenv(
+    'CACHE_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'cache.db')
+)
+DEFAULT_MAXSIZE = 1024
+
+
+class TTLCache:
+    """
+    In-process cache with a size limit.
+    Entries expire after their TTL; the least recently used entry
+    is evicted when the cache is full.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired."""
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at < time.time():
+            return None
+        return value
+
+    def get_entry(self, key):
+        """
+        Return (value, expires_at, stored_at) even if expired.
+        Used by callers that can serve stale data.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    Cache stored in a SQLite file shared across worker processes.
+    Expired rows are ignored on read; when the namespace grows past
+    maxsize the oldest written rows are evicted.
+    """
+
+    def __init__(self, namespace, maxsize=DEFAULT_MAXSIZE, ttl=30, path=None):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path or CACHE_DB_PATH
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                ' namespace TEXT NOT NULL,'
+                ' key TEXT NOT NULL,'
+                ' value TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' stored_at REAL NOT NULL,'
+                ' PRIMARY KEY (namespace, key))'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_cache_entries_stored '
+                'ON cache_entries(namespace, stored_at)'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at < time.time():
+            return None
+        return value
+
+    def get_entry(self, key):
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT value, expires_at, stored_at FROM cache_entries '
+                    'WHERE namespace = ? AND key = ?',
+                    (self.namespace, key)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entries '
+                    '(namespace, key, value, expires_at, stored_at) VALUES (?, ?, ?, ?, ?)',
+                    (self.namespace, key, json.dumps(value), expires_at, now)
+                )
+                # Trim the namespace back to maxsize, oldest rows first
+                conn.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND key IN ('
+                    ' SELECT key FROM cache_entries WHERE namespace = ?'
+                    ' ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                    (self.namespace, self.namespace, self.maxsize)
+                )
+                conn.commit()
+        except sqlite3.Error:
+            pass  # A failed cache write should never break the request
+
+    def delete(self, key):
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                    (self.namespace, key)
+                )
+                conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute('DELETE FROM cache_entries WHERE namespace = ?', (self.namespace,))
+                conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def __len__(self):
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT COUNT(*) FROM cache_entries WHERE namespace = ?',
+                    (self.namespace,)
+                ).fetchone()
+            return row[0]
+        except sqlite3.Error:
+            return 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key.
+    The first caller runs the loader; callers that arrive while it is
+    running wait and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = {'event': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call['event'].set()
+
+    def do_async(self, key, fn):
+        """
+        Run fn in a background thread unless a call for key is
+        already in flight. Errors are swallowed.
+        """
+        with self._lock:
+            if key in self._calls:
+                return False
+
+        def run():
+            try:
+                self.do(key, fn)
+            except Exception:
+                pass
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+
+def make_cache(namespace, maxsize=DEFAULT_MAXSIZE, ttl=30):
+    """
+    Create a cache for a namespace using the configured backend.
+    """
+    if CACHE_BACKEND == 'sqlite':
+        return SQLiteCache(namespace, maxsize=maxsize, ttl=ttl)
+    return TTLCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,173 @@
+"""
+Local OHLCV Candle Store
+
+Persists candles per (symbol, interval) in a SQLite file so that
+get_series only has to download bars newer than what is stored.
+Range queries are served by slicing the store.
+"""
+
+import os
+import sqlite3
+import threading
+
+CANDLE_DB_PATH = os.getenv(
+    'CANDLE_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'candles.db')
+)
+
+# Bars older than this (relative to the newest bar) are pruned
+RETENTION_SECONDS = 400 * 86400
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(CANDLE_DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(CANDLE_DB_PATH, timeout=5, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS candles ('
+            ' symbol TEXT NOT NULL,'
+            ' interval TEXT NOT NULL,'
+            ' time INTEGER NOT NULL,'
+            ' open REAL, high REAL, low REAL, close REAL,'
+            ' volume INTEGER,'
+            ' PRIMARY KEY (symbol, interval, time)) WITHOUT ROWID'
+        )
+        # Earliest time the upstream has been asked for, per series
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS candle_coverage ('
+            ' symbol TEXT NOT NULL,'
+            ' interval TEXT NOT NULL,'
+            ' covered_from INTEGER NOT NULL,'
+            ' PRIMARY KEY (symbol, interval))'
+        )
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def get_bounds(symbol, interval):
+    """
+    Return (covered_from, last_time) for a series, or (None, None)
+    if nothing is stored yet.
+    """
+    symbol = symbol.upper()
+    with _lock:
+        conn = _connect()
+        coverage = conn.execute(
+            'SELECT covered_from FROM candle_coverage WHERE symbol = ? AND interval = ?',
+            (symbol, interval)
+        ).fetchone()
+        last = conn.execute(
+            'SELECT MAX(time) FROM candles WHERE symbol = ? AND interval = ?',
+            (symbol, interval)
+        ).fetchone()
+
+    if coverage is None or last[0] is None:
+        return None, None
+    return coverage[0], last[0]
+
+
+def append(symbol, interval, columns, covered_from=None):
+    """
+    Merge columnar OHLCV bars into the store.
+    Existing bars with the same timestamp are replaced, so a partial
+    (still forming) last bar gets updated on the next fetch.
+    """
+    symbol = symbol.upper()
+    rows = [
+        (symbol, interval, t, o, h, l, c, v)
+        for t, o, h, l, c, v in zip(
+            columns['time'], columns['open'], columns['high'],
+            columns['low'], columns['close'], columns['volume']
+        )
+    ]
+
+    with _lock:
+        conn = _connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO candles '
+            '(symbol, interval, time, open, high, low, close, volume) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+        if covered_from is not None:
+            conn.execute(
+                'INSERT INTO candle_coverage (symbol, interval, covered_from) VALUES (?, ?, ?) '
+                'ON CONFLICT(symbol, interval) DO UPDATE SET '
+                'covered_from = MIN(covered_from, excluded.covered_from)',
+                (symbol, interval, covered_from)
+            )
+
+        if rows:
+            cutoff = max(r[2] for r in rows) - RETENTION_SECONDS
+            conn.execute(
+                'DELETE FROM candles WHERE symbol = ? AND interval = ? AND time < ?',
+                (symbol, interval, cutoff)
+            )
+            conn.execute(
+                'UPDATE candle_coverage SET covered_from = MAX(covered_from, ?) '
+                'WHERE symbol = ? AND interval = ?',
+                (cutoff, symbol, interval)
+            )
+
+        conn.commit()
+
+
+def load(symbol, interval, start=None, end=None):
+    """
+    Return stored bars in [start, end] as columnar OHLCV lists.
+    """
+    symbol = symbol.upper()
+    query = (
+        'SELECT time, open, high, low, close, volume FROM candles '
+        'WHERE symbol = ? AND interval = ?'
+    )
+    params = [symbol, interval]
+
+    if start is not None:
+        query += ' AND time >= ?'
+        params.append(start)
+    if end is not None:
+        query += ' AND time <= ?'
+        params.append(end)
+    query += ' ORDER BY time'
+
+    with _lock:
+        rows = _connect().execute(query, params).fetchall()
+
+    if not rows:
+        return {'time': [], 'open': [], 'high': [], 'low': [], 'close': [], 'volume': []}
+
+    time_, open_, high, low, close, volume = (list(col) for col in zip(*rows))
+    return {
+        'time': time_,
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume
+    }
+
+
+def clear(symbol=None, interval=None):
+    """Remove stored bars (all, per symbol, or per series)."""
+    query = ' WHERE 1 = 1'
+    params = []
+    if symbol is not None:
+        query += ' AND symbol = ?'
+        params.append(symbol.upper())
+    if interval is not None:
+        query += ' AND interval = ?'
+        params.append(interval)
+
+    with _lock:
+        conn = _connect()
+        conn.execute('DELETE FROM candles' + query, params)
+        conn.execute('DELETE FROM candle_coverage' + query, params)
+        conn.commit()
@@ -0,0 +1,441 @@
+"""
+Streaming Technical Indicators
+
+Incremental indicators with O(1) updates per bar: SMA, EMA, RSI,
+ATR, Bollinger Bands and session VWAP. State is kept per
+(symbol, interval) so signals, the bot loop and the AI advisor can
+read the same values without recomputing over the whole history.
+
+A bar with the same timestamp as the previous one replaces it, so a
+still-forming candle can be updated in place.
+
+The latest values of every series are also mirrored into one NumPy
+array (FeatureTable), so a feature matrix for many symbols is a single
+fancy-index instead of a loop over snapshots.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from collections import deque
+
+import numpy as np
+
+
+class Indicator:
+    """
+    Base for indicators that can undo their latest update, so a revised
+    (still-forming) bar replaces the previous one in O(1). Subclasses
+    list the scalar attributes an update changes in UNDO_FIELDS.
+    """
+
+    UNDO_FIELDS = ()
+
+    def _save(self):
+        self._undo = tuple(getattr(self, name) for name in self.UNDO_FIELDS)
+
+    def revert(self):
+        """Restore the state from before the latest update (one level)."""
+        for name, value in zip(self.UNDO_FIELDS, self._undo):
+            setattr(self, name, value)
+
+
+class SMA(Indicator):
+    """Simple moving average over the last `period` values."""
+
+    UNDO_FIELDS = ('total', 'value', '_evicted')
+
+    def __init__(self, period=20):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.value = None
+        # Value pushed out of the window by the latest update
+        self._evicted = None
+
+    def update(self, x):
+        self._save()
+        self._evicted = None
+        if len(self.window) == self.period:
+            self._evicted = self.window[0]
+            self.total -= self._evicted
+        self.window.append(x)
+        self.total += x
+        if len(self.window) == self.period:
+            self.value = self.total / self.period
+        return self.value
+
+    def revert(self):
+        self.window.pop()
+        if self._evicted is not None:
+            self.window.appendleft(self._evicted)
+        super().revert()
+
+
+class EMA(Indicator):
+    """Exponential moving average, seeded with the SMA of the first bars."""
+
+    UNDO_FIELDS = ('count', 'seed_total', 'value')
+
+    def __init__(self, period=20):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = None
+
+    def update(self, x):
+        self._save()
+        if self.value is None:
+            self.count += 1
+            self.seed_total += x
+            if self.count == self.period:
+                self.value = self.seed_total / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class RSI(Indicator):
+    """Relative Strength Index with Wilder smoothing."""
+
+    UNDO_FIELDS = ('prev_close', 'count', 'avg_gain', 'avg_loss', 'value')
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = None
+
+    def update(self, close):
+        self._save()
+        if self.prev_close is None:
+            self.prev_close = close
+            return None
+
+        change = close - self.prev_close
+        self.prev_close = close
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+
+        if self.count < self.period:
+            # Seed with simple averages of the first `period` changes
+            self.count += 1
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.count < self.period:
+                return None
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        if self.avg_loss == 0:
+            self.value = 100.0 if self.avg_gain > 0 else 50.0
+        else:
+            rs = self.avg_gain / self.avg_loss
+            self.value = 100 - 100 / (1 + rs)
+        return self.value
+
+
+class ATR(Indicator):
+    """Average True Range with Wilder smoothing."""
+
+    UNDO_FIELDS = ('prev_close', 'count', 'value', '_seed_total')
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0
+        self.value = None
+        self._seed_total = 0.0
+
+    def update(self, high, low, close):
+        self._save()
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        if self.value is None:
+            self.count += 1
+            self._seed_total += true_range
+            if self.count == self.period:
+                self.value = self._seed_total / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+
+class BollingerBands(Indicator):
+    """Bollinger Bands from running sums over a fixed window."""
+
+    UNDO_FIELDS = ('total', 'total_sq', 'value', '_evicted')
+
+    def __init__(self, period=20, num_std=2.0):
+        self.period = period
+        self.num_std = num_std
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.value = None
+        self._evicted = None
+
+    def update(self, x):
+        self._save()
+        self._evicted = None
+        if len(self.window) == self.period:
+            old = self._evicted = self.window[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.window.append(x)
+        self.total += x
+        self.total_sq += x * x
+
+        if len(self.window) == self.period:
+            mean = self.total / self.period
+            variance = max(self.total_sq / self.period - mean * mean, 0.0)
+            band = self.num_std * math.sqrt(variance)
+            self.value = (mean + band, mean, mean - band)
+        return self.value
+
+    def revert(self):
+        self.window.pop()
+        if self._evicted is not None:
+            self.window.appendleft(self._evicted)
+        super().revert()
+
+
+class VWAP(Indicator):
+    """Volume-weighted average price, reset at each UTC day."""
+
+    UNDO_FIELDS = ('session', 'pv_total', 'volume_total', 'value')
+
+    def __init__(self):
+        self.session = None
+        self.pv_total = 0.0
+        self.volume_total = 0.0
+        self.value = None
+
+    def update(self, time_, high, low, close, volume):
+        self._save()
+        session = int(time_) // 86400
+        if session != self.session:
+            self.session = session
+            self.pv_total = 0.0
+            self.volume_total = 0.0
+
+        typical = (high + low + close) / 3
+        self.pv_total += typical * volume
+        self.volume_total += volume
+        self.value = self.pv_total / self.volume_total if self.volume_total > 0 else typical
+        return self.value
+
+
+class IndicatorState:
+    """
+    All indicators for one (symbol, interval) series.
+    """
+
+    def __init__(self):
+        self.sma = SMA(20)
+        self.ema = EMA(20)
+        self.rsi = RSI(14)
+        self.atr = ATR(14)
+        self.bollinger = BollingerBands(20, 2.0)
+        self.vwap = VWAP()
+        self.last_time = None
+        self.last_close = None
+        self.bars = 0
+        self.lock = threading.Lock()
+
+    def _indicators(self):
+        return (self.sma, self.ema, self.rsi, self.atr, self.bollinger, self.vwap)
+
+    def update(self, time_, open_, high, low, close, volume):
+        """Apply one bar and return the new snapshot."""
+        if self.last_time is not None and time_ < self.last_time:
+            return self.snapshot()  # Out-of-order bar, ignore
+
+        if time_ == self.last_time:
+            # Revision of the latest bar: undo it, then apply the new values
+            for indicator in self._indicators():
+                indicator.revert()
+            self.bars -= 1
+
+        self.sma.update(close)
+        self.ema.update(close)
+        self.rsi.update(close)
+        self.atr.update(high, low, close)
+        self.bollinger.update(close)
+        self.vwap.update(time_, high, low, close, volume or 0)
+        self.last_time = time_
+        self.last_close = close
+        self.bars += 1
+        return self.snapshot()
+
+    def snapshot(self):
+        bands = self.bollinger.value or (None, None, None)
+        return {
+            'time': self.last_time,
+            'close': self.last_close,
+            'bars': self.bars,
+            'sma_20': self.sma.value,
+            'ema_20': self.ema.value,
+            'rsi_14': self.rsi.value,
+            'atr_14': self.atr.value,
+            'bb_upper': bands[0],
+            'bb_middle': bands[1],
+            'bb_lower': bands[2],
+            'vwap': self.vwap.value
+        }
+
+
+# Snapshot fields mirrored into the feature table, in column order
+FEATURE_FIELDS = (
+    'close', 'sma_20', 'ema_20', 'rsi_14', 'atr_14',
+    'bb_upper', 'bb_middle', 'bb_lower', 'vwap'
+)
+
+
+class FeatureTable:
+    """
+    Latest indicator values of every series as rows of one float array
+    (NaN = not warmed up yet). Rows are assigned per (symbol, interval)
+    and reused after removal.
+    """
+
+    def __init__(self, fields=FEATURE_FIELDS, capacity=64):
+        self.fields = fields
+        self.values = np.full((capacity, len(fields)), np.nan)
+        self.rows = {}
+        self.free = []
+        self.lock = threading.Lock()
+        # Bumped whenever rows are assigned or freed (invalidates row lookups)
+        self.version = 0
+        self._lookup_cache = {}
+
+    def write(self, key, snapshot):
+        row_values = [np.nan if snapshot[f] is None else snapshot[f] for f in self.fields]
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                row = self._allocate(key)
+            self.values[row] = row_values
+
+    def _allocate(self, key):
+        if self.free:
+            row = self.free.pop()
+        else:
+            row = len(self.rows)
+            if row >= self.values.shape[0]:
+                grown = np.full((self.values.shape[0] * 2, len(self.fields)), np.nan)
+                grown[:row] = self.values[:row]
+                self.values = grown
+        self.rows[key] = row
+        self.version += 1
+        return row
+
+    def remove(self, key):
+        with self.lock:
+            row = self.rows.pop(key, None)
+            if row is not None:
+                self.values[row] = np.nan
+                self.free.append(row)
+                self.version += 1
+
+    def matrix(self, keys):
+        """
+        (n_keys, n_fields) array of the latest values; unknown keys are
+        NaN rows. Row lookups are cached per key tuple until rows change.
+        """
+        keys = tuple(keys)
+        with self.lock:
+            cached = self._lookup_cache.get(keys)
+            if cached is None or cached[0] != self.version:
+                index = np.fromiter((self.rows.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+                if len(self._lookup_cache) > 64:
+                    self._lookup_cache.clear()
+                self._lookup_cache[keys] = (self.version, index)
+            else:
+                index = cached[1]
+
+            result = self.values[np.maximum(index, 0)]
+        result[index < 0] = np.nan
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.values[:] = np.nan
+            self.rows.clear()
+            self.free.clear()
+            self._lookup_cache.clear()
+            self.version += 1
+
+
+# Indicator state per (symbol, interval)
+MAX_STATES = 4096
+_states = {}
+_lock = threading.Lock()
+_features = FeatureTable()
+
+
+def update_indicators(symbol, interval, columns):
+    """
+    Feed columnar OHLCV bars into the state for (symbol, interval).
+    Only bars at or after the last seen timestamp are applied, so
+    repeated calls with an overlapping series cost O(new bars).
+    Returns the latest snapshot.
+    """
+    key = (symbol.upper(), interval)
+    with _lock:
+        state = _states.get(key)
+        if state is None:
+            if len(_states) >= MAX_STATES:
+                oldest = next(iter(_states))
+                _states.pop(oldest)  # Drop the oldest series
+                _features.remove(oldest)
+            state = _states[key] = IndicatorState()
+
+    with state.lock:
+        if not columns or not columns.get('time'):
+            return state.snapshot()
+
+        times = columns['time']
+        start = 0 if state.last_time is None else bisect_left(times, state.last_time)
+
+        for i in range(start, len(times)):
+            state.update(
+                times[i], columns['open'][i], columns['high'][i],
+                columns['low'][i], columns['close'][i], columns['volume'][i]
+            )
+        snapshot = state.snapshot()
+        _features.write(key, snapshot)
+        return snapshot
+
+
+def get_indicators(symbol, interval):
+    """Latest snapshot for (symbol, interval), or None if never fed."""
+    with _lock:
+        state = _states.get((symbol.upper(), interval))
+        return state.snapshot() if state else None
+
+
+def feature_matrix(symbols, interval, fields=FEATURE_FIELDS):
+    """
+    Latest indicator values for many symbols as a (n_symbols, n_fields)
+    array in `symbols` order, NaN where a value is not available.
+    """
+    matrix = _features.matrix((s.upper(), interval) for s in symbols)
+    if tuple(fields) == FEATURE_FIELDS:
+        return matrix
+    return matrix[:, [FEATURE_FIELDS.index(f) for f in fields]]
+
+
+def clear_indicators():
+    """Drop all indicator state (for testing)."""
+    with _lock:
+        _states.clear()
+        _features.clear()
@@ -0,0 +1,207 @@
+"""
+Leaderboard
+
+Ranked challenges by profit % for the daily, weekly, monthly and
+all-time periods, kept in memory and updated incrementally:
+- Each period's board is loaded once with an indexed created_at range
+  query, then kept in a SortedList keyed by (-profit_pct, challenge_id)
+- update_challenge() moves one challenge in every board (O(log n)) when
+  its equity or status changes
+- Top-N and a user's rank are O(log n) lookups
+
+Boards are rebuilt when their period rolls over and every
+REBUILD_SECONDS, so workers that did not see an update converge.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sortedcontainers import SortedList
+
+from api.models import db, Challenge, User
+
+PERIODS = ('daily', 'weekly', 'monthly', 'all-time')
+DEFAULT_PERIOD = 'monthly'
+REBUILD_SECONDS = 300
+MAX_TOP_N = 100
+
+
+def period_start(period, now=None):
+    """Start of the current period (None for all-time)."""
+    now = now or datetime.utcnow()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'daily':
+        return midnight
+    if period == 'weekly':
+        return midnight - timedelta(days=midnight.weekday())
+    if period == 'monthly':
+        return midnight.replace(day=1)
+    if period == 'all-time':
+        return None
+    raise ValueError(f"period must be one of: {', '.join(PERIODS)}")
+
+
+def _profit_pct(start_balance, equity):
+    if not start_balance:
+        return 0.0
+    return (equity - start_balance) / start_balance * 100
+
+
+class Board:
+    """One period's ranking."""
+
+    def __init__(self, period, start):
+        self.period = period
+        self.start = start
+        self.built_at = time.time()
+        self.ranking = SortedList()
+        # challenge_id -> (sort key, entry dict)
+        self.entries = {}
+        # user_id -> set of challenge ids
+        self.by_user = {}
+
+    def upsert(self, challenge_id, user_id, name, start_balance, equity, status):
+        self.remove(challenge_id)
+        profit_pct = _profit_pct(start_balance, equity)
+        key = (-profit_pct, challenge_id)
+        self.ranking.add(key)
+        self.entries[challenge_id] = (key, {
+            'user_id': user_id,
+            'name': name,
+            'challenge_id': challenge_id,
+            'start_balance': start_balance,
+            'equity': equity,
+            'profit_pct': round(profit_pct, 2),
+            'status': status
+        })
+        self.by_user.setdefault(user_id, set()).add(challenge_id)
+
+    def remove(self, challenge_id):
+        existing = self.entries.pop(challenge_id, None)
+        if existing is None:
+            return
+        key, entry = existing
+        self.ranking.remove(key)
+        user_challenges = self.by_user.get(entry['user_id'])
+        if user_challenges is not None:
+            user_challenges.discard(challenge_id)
+            if not user_challenges:
+                del self.by_user[entry['user_id']]
+
+    def top(self, n):
+        result = []
+        for rank, key in enumerate(self.ranking.islice(0, n), 1):
+            result.append(dict(self.entries[key[1]][1], rank=rank))
+        return result
+
+    def rank_of_user(self, user_id):
+        """The user's best-ranked challenge, or None."""
+        challenge_ids = self.by_user.get(user_id)
+        if not challenge_ids:
+            return None
+        key = min(self.entries[cid][0] for cid in challenge_ids)
+        return dict(self.entries[key[1]][1], rank=self.ranking.index(key) + 1)
+
+
+_boards = {}
+_lock = threading.Lock()
+
+
+def _load_board(period, now=None):
+    start = period_start(period, now)
+    board = Board(period, start)
+
+    query = db.session.query(
+        Challenge.id, Challenge.user_id, User.name,
+        Challenge.start_balance, Challenge.equity, Challenge.status
+    ).join(User, Challenge.user_id == User.id)
+    if start is not None:
+        # Range on the created_at index (no per-row month/year extraction)
+        query = query.filter(Challenge.created_at >= start)
+
+    for row in query.yield_per(1000):
+        board.upsert(row.id, row.user_id, row.name, row.start_balance, row.equity, row.status)
+    return board
+
+
+def get_board(period=DEFAULT_PERIOD):
+    """The period's board, (re)built if missing, rolled over or old."""
+    now = datetime.utcnow()
+    start = period_start(period, now)
+
+    with _lock:
+        board = _boards.get(period)
+        if board is not None and board.start == start and time.time() - board.built_at < REBUILD_SECONDS:
+            return board
+
+    board = _load_board(period, now)
+    with _lock:
+        _boards[period] = board
+    return board
+
+
+def top(period=DEFAULT_PERIOD, n=10):
+    """Top-n challenges of a period by profit %."""
+    board = get_board(period)
+    with _lock:
+        return board.top(max(1, min(int(n), MAX_TOP_N)))
+
+
+def rank_of_user(user_id, period=DEFAULT_PERIOD):
+    """A user's best rank in a period (None if they have no challenge in it)."""
+    board = get_board(period)
+    with _lock:
+        entry = board.rank_of_user(user_id)
+        return entry, len(board.ranking)
+
+
+def update_challenge(challenge, name=None):
+    """
+    Move a challenge in every loaded board after its equity or status
+    changed (or add it once created). Call after the change is committed.
+    """
+    with _lock:
+        boards = list(_boards.values())
+    if not boards:
+        return
+
+    if name is None:
+        name = _known_name(boards, challenge.id)
+    if name is None:
+        user = User.query.get(challenge.user_id)
+        name = user.name if user else None
+
+    created_at = challenge.created_at or datetime.utcnow()
+    with _lock:
+        for board in boards:
+            if board.start is None or created_at >= board.start:
+                board.upsert(
+                    challenge.id, challenge.user_id, name,
+                    challenge.start_balance, challenge.equity, challenge.status
+                )
+
+
+def _known_name(boards, challenge_id):
+    with _lock:
+        for board in boards:
+            existing = board.entries.get(challenge_id)
+            if existing is not None:
+                return existing[1]['name']
+    return None
+
+
+def set_statuses(challenge_ids, status):
+    """Update the status shown for challenges (e.g. after a bulk rule sweep)."""
+    with _lock:
+        for board in _boards.values():
+            for challenge_id in challenge_ids:
+                existing = board.entries.get(challenge_id)
+                if existing is not None:
+                    existing[1]['status'] = status
+
+
+def clear_boards():
+    """Drop all boards (for testing)."""
+    with _lock:
+        _boards.clear()
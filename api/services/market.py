@@ -6,14 +6,41 @@ Includes caching to reduce API calls.
 """
 
 import yfinance as yf
-from datetime import datetime, timedelta
-from functools import lru_cache
+import pandas as pd
+import os
+import sqlite3
+import threading
 import time
+from collections import Counter
+from datetime import datetime
+from api.services import candle_store
+from api.services.cache import make_cache, SingleFlight
+from api.services.resample import resample_columns
 
-# Simple in-memory cache
-_quote_cache = {}
-_series_cache = {}
 CACHE_TTL_SECONDS = 30
+SERIES_CACHE_TTL_SECONDS = 60
+
+# Expired quotes younger than this are served immediately while a
+# background refresh runs (0 disables stale serving)
+STALE_MAX_AGE_SECONDS = int(os.getenv('QUOTE_STALE_MAX_AGE', 300))
+# How long a failed symbol is remembered before yfinance is retried
+NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv('QUOTE_NEGATIVE_TTL', 15))
+
+# Bounded caches (LRU + TTL), optionally shared across workers
+_quote_cache = make_cache('quotes', maxsize=2048, ttl=CACHE_TTL_SECONDS)
+# Quotes built from batched daily bars (no name/currency/market cap of
+# their own), kept apart so get_quote never serves them as full quotes
+_batch_quote_cache = make_cache('batch_quotes', maxsize=2048, ttl=CACHE_TTL_SECONDS)
+_quote_error_cache = make_cache('quote_errors', maxsize=1024, ttl=NEGATIVE_CACHE_TTL_SECONDS)
+_series_cache = make_cache('series', maxsize=512, ttl=SERIES_CACHE_TTL_SECONDS)
+
+# Only one upstream fetch per key at a time
+_inflight = SingleFlight()
+
+# Request counts per symbol, used to pick symbols to pre-warm
+_request_counts = Counter()
+_request_counts_lock = threading.Lock()
+MAX_TRACKED_SYMBOLS = 5000
 
 
 def get_quote(symbol):
@@ -22,13 +49,96 @@ def get_quote(symbol):
     Cached for 30 seconds.
     """
     cache_key = symbol.upper()
+    _track_request(cache_key)
     now = time.time()
     
     # Check cache
-    if cache_key in _quote_cache:
-        cached_data, cached_time = _quote_cache[cache_key]
-        if now - cached_time < CACHE_TTL_SECONDS:
+    entry = _quote_cache.get_entry(cache_key)
+    if entry is not None:
+        cached_data, expires_at, stored_at = entry
+        if now < expires_at:
             return cached_data
+        
+        # Stale but recent enough: serve it and refresh in the background
+        if now - expires_at < STALE_MAX_AGE_SECONDS:
+            if _quote_error_cache.get(cache_key) is None:
+                _inflight.do_async(f'quote:{cache_key}', lambda: _fetch_quote(symbol))
+            return _mark_stale(cached_data, now - stored_at)
+    
+    # Recently failed: don't hit yfinance again yet
+    error_data = _quote_error_cache.get(cache_key)
+    if error_data is not None:
+        return error_data
+    
+    return _inflight.do(f'quote:{cache_key}', lambda: _fetch_quote(symbol))
+
+
+def _mark_stale(data, age):
+    """Copy of a cached quote flagged with its age in seconds."""
+    return dict(data, stale=True, age=round(age, 1))
+
+
+def refresh_quote(symbol):
+    """
+    Fetch a fresh quote even if a cached one exists.
+    """
+    cache_key = symbol.upper()
+    return _inflight.do(f'quote:{cache_key}', lambda: _fetch_quote(symbol))
+
+
+def quote_expires_in(symbol):
+    """
+    Seconds until the cached quote expires (negative if expired),
+    or None if the symbol is not cached.
+    """
+    entry = _quote_cache.get_entry(symbol.upper())
+    if entry is None:
+        return None
+    return entry[1] - time.time()
+
+
+def cached_price(symbol, max_age=None):
+    """
+    Last cached price for a symbol (full or batch quote, whichever is
+    newer), without fetching. Returns None if the symbol is not cached
+    or its price is older than `max_age` seconds.
+    """
+    cache_key = symbol.upper()
+    entries = [
+        entry for entry in (_quote_cache.get_entry(cache_key), _batch_quote_cache.get_entry(cache_key))
+        if entry is not None
+    ]
+    if not entries:
+        return None
+    data, _, stored_at = max(entries, key=lambda entry: entry[2])
+    if max_age is not None and time.time() - stored_at > max_age:
+        return None
+    return data.get('price') or None
+
+
+def get_popular_symbols(limit=20):
+    """
+    Most requested quote symbols since startup.
+    """
+    with _request_counts_lock:
+        return [symbol for symbol, _ in _request_counts.most_common(limit)]
+
+
+def _track_request(symbol):
+    with _request_counts_lock:
+        _request_counts[symbol] += 1
+        if len(_request_counts) > MAX_TRACKED_SYMBOLS:
+            # Keep the counter bounded: drop the long tail
+            top = _request_counts.most_common(MAX_TRACKED_SYMBOLS // 2)
+            _request_counts.clear()
+            _request_counts.update(dict(top))
+
+
+def _fetch_quote(symbol):
+    """
+    Fetch a quote from yfinance and cache it on success.
+    """
+    cache_key = symbol.upper()
     
     try:
         ticker = yf.Ticker(symbol)
@@ -37,6 +147,9 @@ def get_quote(symbol):
         # Get the most relevant price
         price = info.get('regularMarketPrice') or info.get('currentPrice') or info.get('previousClose', 0)
         
+        if not price:
+            raise ValueError(f'No price data for {symbol.upper()}')
+        
         data = {
             'symbol': symbol.upper(),
             'price': price,
@@ -54,59 +167,158 @@ def get_quote(symbol):
         }
         
         # Cache the result
-        _quote_cache[cache_key] = (data, now)
+        _quote_cache.set(cache_key, data)
+        _quote_error_cache.delete(cache_key)
         
         return data
     
     except Exception as e:
-        # Return fallback data on error
-        return {
+        # Remember the failure briefly so an outage doesn't turn into
+        # a retry storm against yfinance
+        error_data = {
             'symbol': symbol.upper(),
             'price': 0,
             'error': str(e),
             'timestamp': datetime.utcnow().isoformat()
         }
+        _quote_error_cache.set(cache_key, error_data)
+        
+        # Prefer the last good quote over an error
+        entry = _quote_cache.get_entry(cache_key)
+        if entry is not None and time.time() - entry[1] < STALE_MAX_AGE_SECONDS:
+            return _mark_stale(entry[0], time.time() - entry[2])
+        
+        # Return fallback data on error
+        return error_data
+
+
+CANDLE_FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
 
 
-def get_series(symbol, interval='1m', range_param='1d'):
+def get_series(symbol, interval='1m', range_param='1d', fmt='rows'):
     """
     Get historical OHLCV data for charting.
     
     Intervals: 1m, 5m, 15m, 30m, 1h, 1d
     Ranges: 1d, 5d, 1mo, 3mo, 6mo, 1y
+    Formats: 'rows' (list of candle dicts) or 'columns'
+    ({time: [], open: [], ...})
     """
     cache_key = f"{symbol.upper()}_{interval}_{range_param}"
-    now = time.time()
     
-    # Cache for 60 seconds for series data
-    if cache_key in _series_cache:
-        cached_data, cached_time = _series_cache[cache_key]
-        if now - cached_time < 60:
-            return cached_data
+    # Cache for 60 seconds for series data (stored columnar)
+    data = _series_cache.get(cache_key)
+    if data is None:
+        data = _inflight.do(
+            f'series:{cache_key}',
+            lambda: _fetch_series(symbol, interval, range_param)
+        )
+    
+    return _format_series(data, fmt)
+
+
+def _format_series(data, fmt):
+    """
+    Shape a columnar series payload for the requested format.
+    """
+    if fmt == 'columns' or not isinstance(data.get('data'), dict):
+        return data
+    return dict(data, data=columns_to_rows(data['data']))
+
+
+def frame_to_columns(hist):
+    """
+    Convert a yfinance history frame to columnar OHLCV lists.
+    Rounding and timestamp conversion run over whole columns.
+    """
+    hist = hist.dropna(subset=['Close'])
+    
+    index = hist.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    times = index.values.astype('datetime64[s]').astype('int64')
+    
+    ohlc = hist[['Open', 'High', 'Low', 'Close']].round(2)
+    if 'Volume' in hist:
+        volume = hist['Volume'].fillna(0).astype('int64').tolist()
+    else:
+        volume = [0] * len(hist)
+    
+    return {
+        'time': times.tolist(),
+        'open': ohlc['Open'].tolist(),
+        'high': ohlc['High'].tolist(),
+        'low': ohlc['Low'].tolist(),
+        'close': ohlc['Close'].tolist(),
+        'volume': volume
+    }
+
+
+def columns_to_rows(columns):
+    """
+    Convert columnar OHLCV lists to a list of candle dicts.
+    """
+    return [
+        dict(zip(CANDLE_FIELDS, values))
+        for values in zip(*(columns[field] for field in CANDLE_FIELDS))
+    ]
+
+
+# Map range to yfinance period
+PERIOD_MAP = {
+    '1d': '1d',
+    '5d': '5d',
+    '1mo': '1mo',
+    '3mo': '3mo',
+    '6mo': '6mo',
+    '1y': '1y'
+}
+
+# Approximate span of each period, used to slice the candle store
+PERIOD_SECONDS = {
+    '1d': 86400,
+    '5d': 5 * 86400,
+    '1mo': 31 * 86400,
+    '3mo': 92 * 86400,
+    '6mo': 183 * 86400,
+    '1y': 366 * 86400
+}
+
+# Intervals built locally from 1m bars (1m data only covers ~7 days)
+BASE_INTERVAL = '1m'
+RESAMPLE_INTERVALS = ['2m', '5m', '15m', '30m', '1h']
+
+
+def _fetch_series(symbol, interval, range_param):
+    """
+    Fetch OHLCV history and cache it on success.
+    Bars are kept in the local candle store; only bars newer than
+    the last stored one are downloaded once the range is covered.
+    Intraday intervals over 1d/5d are resampled from 1m bars.
+    """
+    cache_key = f"{symbol.upper()}_{interval}_{range_param}"
     
     try:
-        ticker = yf.Ticker(symbol)
-        
-        # Map range to yfinance period
-        period_map = {
-            '1d': '1d',
-            '5d': '5d',
-            '1mo': '1mo',
-            '3mo': '3mo',
-            '6mo': '6mo',
-            '1y': '1y'
-        }
-        
-        period = period_map.get(range_param, '1d')
+        period = PERIOD_MAP.get(range_param, '1d')
         
         # yfinance has limitations on intraday intervals
         # 1m data only available for last 7 days
         if interval in ['1m', '2m', '5m'] and period not in ['1d', '5d']:
             period = '5d'
         
-        hist = ticker.history(period=period, interval=interval)
+        try:
+            if interval in RESAMPLE_INTERVALS and period in ['1d', '5d']:
+                # Derive coarser bars from the stored 1m series
+                base = _load_stored_series(symbol, BASE_INTERVAL, period)
+                columns = resample_columns(base, interval) if base['time'] else base
+            else:
+                columns = _load_stored_series(symbol, interval, period)
+        except sqlite3.Error:
+            # Store unavailable: download the full period directly
+            hist = yf.Ticker(symbol).history(period=period, interval=interval)
+            columns = frame_to_columns(hist) if not hist.empty else {'time': []}
         
-        if hist.empty:
+        if not columns['time']:
             return {
                 'symbol': symbol.upper(),
                 'interval': interval,
@@ -115,28 +327,16 @@ def get_series(symbol, interval='1m', range_param='1d'):
                 'error': 'No data available'
             }
         
-        # Convert to list of OHLCV dicts
-        candles = []
-        for index, row in hist.iterrows():
-            candles.append({
-                'time': int(index.timestamp()),
-                'open': round(row['Open'], 2),
-                'high': round(row['High'], 2),
-                'low': round(row['Low'], 2),
-                'close': round(row['Close'], 2),
-                'volume': int(row['Volume']) if 'Volume' in row else 0
-            })
-        
         data = {
             'symbol': symbol.upper(),
             'interval': interval,
             'range': range_param,
-            'data': candles,
-            'count': len(candles),
+            'data': columns,
+            'count': len(columns['time']),
             'timestamp': datetime.utcnow().isoformat()
         }
         
-        _series_cache[cache_key] = (data, now)
+        _series_cache.set(cache_key, data)
         
         return data
     
@@ -150,18 +350,134 @@ def get_series(symbol, interval='1m', range_param='1d'):
         }
 
 
+def _load_stored_series(symbol, interval, period):
+    """
+    Bring the stored series up to date and slice the requested period.
+    The period is measured back from the newest bar, so closed markets
+    still return their last session.
+    """
+    span = PERIOD_SECONDS[period]
+    window_start = int(time.time()) - span
+    covered_from, last_time = candle_store.get_bounds(symbol, interval)
+    ticker = yf.Ticker(symbol)
+    
+    if covered_from is not None and covered_from <= window_start and last_time >= window_start:
+        # Store covers the window: fetch only the newer bars
+        hist = ticker.history(start=datetime.utcfromtimestamp(last_time), interval=interval)
+        covered_from = None
+    else:
+        hist = ticker.history(period=period, interval=interval)
+        covered_from = window_start
+    
+    if not hist.empty:
+        candle_store.append(symbol, interval, frame_to_columns(hist), covered_from=covered_from)
+    
+    _, last_time = candle_store.get_bounds(symbol, interval)
+    if last_time is None:
+        return {'time': []}
+    return candle_store.load(symbol, interval, start=last_time - span)
+
+
 def get_multiple_quotes(symbols):
     """
     Get quotes for multiple symbols at once.
+    Cached symbols are served from cache; all others are fetched
+    in a single batched yfinance download.
     """
     results = {}
+    missing = []
     for symbol in symbols:
-        results[symbol] = get_quote(symbol)
+        cached_data = _quote_cache.get(symbol.upper()) or _batch_quote_cache.get(symbol.upper())
+        if cached_data is not None:
+            results[symbol] = cached_data
+        else:
+            missing.append(symbol)
+    
+    if missing:
+        batch_key = 'quotes:' + ','.join(sorted(s.upper() for s in missing))
+        fetched = _inflight.do(batch_key, lambda: _fetch_quotes_batch(missing))
+        for symbol in missing:
+            results[symbol] = fetched.get(symbol.upper()) or get_quote(symbol)
+    
     return results
 
 
+def _fetch_quotes_batch(symbols):
+    """
+    Download the last two daily bars for all symbols in one request
+    and build quotes from them. Symbols missing from the download are
+    left out so the caller can fall back to get_quote.
+    """
+    tickers = sorted({s.upper() for s in symbols})
+    quotes = {}
+    
+    try:
+        hist = yf.download(
+            tickers,
+            period='5d',
+            interval='1d',
+            group_by='ticker',
+            threads=True,
+            progress=False,
+            auto_adjust=False
+        )
+    except Exception:
+        return quotes
+    
+    if hist is None or hist.empty:
+        return quotes
+    
+    multi = hist.columns.nlevels > 1
+    timestamp = datetime.utcnow().isoformat()
+    
+    def metadata(ticker):
+        # The daily bars carry no metadata: reuse the last full quote's
+        entry = _quote_cache.get_entry(ticker)
+        full = entry[0] if entry is not None else {}
+        return {
+            'market_cap': full.get('market_cap', 0),
+            'name': full.get('name', ticker),
+            'currency': full.get('currency', 'USD')
+        }
+    
+    for ticker in tickers:
+        try:
+            frame = hist[ticker] if multi else hist
+            frame = frame.dropna(subset=['Close'])
+            if frame.empty:
+                continue
+            
+            last = frame.iloc[-1]
+            price = float(last['Close'])
+            prev_close = float(frame['Close'].iloc[-2]) if len(frame) > 1 else float(last['Open'])
+            change = price - prev_close
+            
+            data = {
+                'symbol': ticker,
+                'price': price,
+                'change': change,
+                'change_pct': (change / prev_close) * 100 if prev_close else 0,
+                'high': float(last['High']),
+                'low': float(last['Low']),
+                'open': float(last['Open']),
+                'prev_close': prev_close,
+                'volume': int(last['Volume']) if pd.notna(last['Volume']) else 0,
+                **metadata(ticker),
+                'timestamp': timestamp
+            }
+        except (KeyError, IndexError, ValueError):
+            continue
+        
+        _batch_quote_cache.set(ticker, data)
+        _quote_error_cache.delete(ticker)
+        quotes[ticker] = data
+    
+    return quotes
+
+
 # Clear cache function for testing
 def clear_cache():
-    global _quote_cache, _series_cache
-    _quote_cache = {}
-    _series_cache = {}
+    _quote_cache.clear()
+    _batch_quote_cache.clear()
+    _quote_error_cache.clear()
+    _series_cache.clear()
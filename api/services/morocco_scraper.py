@@ -6,14 +6,71 @@ Includes caching and graceful fallback.
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlparse
+import threading
 import time
+from api.services.bvc_parser import extract_price_text, extract_listing_rows
+from api.services.cache import make_cache, SingleFlight
 
-# In-memory cache
-_morocco_cache = {}
 CACHE_TTL_SECONDS = 60
 
+BVC_QUOTE_URL = "https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={symbol}"
+BVC_LISTING_URL = "https://www.casablanca-bourse.com/bourseweb/Negociation-Marche.aspx"
+REQUEST_TIMEOUT_SECONDS = 5
+MAX_CONCURRENT_SCRAPES = 5
+# Minimum delay between two requests to the same host
+HOST_MIN_INTERVAL_SECONDS = 0.2
+
+# Bounded cache shared with the other market services' backend
+_morocco_cache = make_cache('morocco', maxsize=256, ttl=CACHE_TTL_SECONDS)
+_inflight = SingleFlight()
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to the same host by a minimum interval.
+    Callers reserve the next free slot, then sleep outside the lock.
+    """
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _make_session():
+    """Keep-alive session with a connection pool sized for the scraper."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_CONCURRENT_SCRAPES)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+    return session
+
+
+_session = _make_session()
+_rate_limiter = HostRateLimiter(HOST_MIN_INTERVAL_SECONDS)
+
+
+def _http_get(url):
+    """GET through the pooled session, respecting the per-host rate limit."""
+    _rate_limiter.wait(urlparse(url).netloc)
+    return _session.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
+
 # Moroccan stock symbols mapping
 MOROCCO_STOCKS = {
     'IAM': {
@@ -59,13 +116,11 @@ def get_morocco_quote(symbol):
     Uses web scraping with fallback to cached/static prices.
     """
     symbol = symbol.upper()
-    now = time.time()
     
     # Check cache
-    if symbol in _morocco_cache:
-        cached_data, cached_time = _morocco_cache[symbol]
-        if now - cached_time < CACHE_TTL_SECONDS:
-            return cached_data
+    cached_data = _morocco_cache.get(symbol)
+    if cached_data is not None:
+        return cached_data
     
     # Validate symbol
     if symbol not in MOROCCO_STOCKS:
@@ -75,33 +130,84 @@ def get_morocco_quote(symbol):
             'available_symbols': list(MOROCCO_STOCKS.keys())
         }
     
-    stock_info = MOROCCO_STOCKS[symbol]
-    
+    return _inflight.do(symbol, lambda: _fetch_morocco_quote(symbol))
+
+
+def refresh_morocco_quote(symbol):
+    """
+    Scrape a fresh quote even if a cached one exists.
+    """
+    symbol = symbol.upper()
+    return _inflight.do(symbol, lambda: _fetch_morocco_quote(symbol))
+
+
+def morocco_quote_expires_in(symbol):
+    """
+    Seconds until the cached quote expires (negative if expired),
+    or None if the symbol is not cached.
+    """
+    entry = _morocco_cache.get_entry(symbol.upper())
+    if entry is None:
+        return None
+    return entry[1] - time.time()
+
+
+def cached_morocco_price(symbol, max_age=None):
+    """
+    Last cached price for a Moroccan stock (fresh or stale), without
+    scraping. Returns None if the symbol is not cached or its price is
+    older than `max_age` seconds.
+    """
+    entry = _morocco_cache.get_entry(symbol.upper())
+    if entry is None:
+        return None
+    if max_age is not None and time.time() - entry[2] > max_age:
+        return None
+    return entry[0].get('price') or None
+
+
+def _fetch_morocco_quote(symbol):
+    """
+    Scrape a quote (or build a fallback one) and cache it.
+    """
     try:
         # Try to scrape from Bourse de Casablanca
         price_data = scrape_bvc_price(symbol)
         
         if price_data and price_data.get('price'):
-            data = {
-                'symbol': symbol,
-                'name': stock_info['name'],
-                'price': price_data['price'],
-                'change': price_data.get('change', 0),
-                'change_pct': price_data.get('change_pct', 0),
-                'volume': price_data.get('volume', 0),
-                'sector': stock_info['sector'],
-                'currency': 'MAD',
-                'exchange': 'Casablanca Stock Exchange',
-                'source': 'live',
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-            _morocco_cache[symbol] = (data, now)
-            return data
+            return _store_live_quote(symbol, price_data)
     
     except Exception as e:
         pass  # Fall through to fallback
     
+    return _store_fallback_quote(symbol)
+
+
+def _store_live_quote(symbol, price_data):
+    """Build a quote from scraped price data and cache it."""
+    stock_info = MOROCCO_STOCKS[symbol]
+    data = {
+        'symbol': symbol,
+        'name': stock_info['name'],
+        'price': price_data['price'],
+        'change': price_data.get('change', 0),
+        'change_pct': price_data.get('change_pct', 0),
+        'volume': price_data.get('volume', 0),
+        'sector': stock_info['sector'],
+        'currency': 'MAD',
+        'exchange': 'Casablanca Stock Exchange',
+        'source': 'live',
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    
+    _morocco_cache.set(symbol, data)
+    return data
+
+
+def _store_fallback_quote(symbol):
+    """Build a simulated quote from the static fallback price and cache it."""
+    stock_info = MOROCCO_STOCKS[symbol]
+    
     # Use fallback price
     fallback_price = FALLBACK_PRICES.get(symbol, 100.0)
     
@@ -126,10 +232,15 @@ def get_morocco_quote(symbol):
         'timestamp': datetime.utcnow().isoformat()
     }
     
-    _morocco_cache[symbol] = (data, now)
+    _morocco_cache.set(symbol, data)
     return data
 
 
+def _parse_price(text):
+    """Parse a BVC formatted number ('1 650,00') to float."""
+    return float(text.strip().replace(',', '.').replace(' ', '').replace('\xa0', ''))
+
+
 def scrape_bvc_price(symbol):
     """
     Scrape price from Bourse de Casablanca website.
@@ -138,25 +249,16 @@ def scrape_bvc_price(symbol):
     try:
         # Note: The actual BVC website structure may vary
         # This is a placeholder that attempts to scrape
-        url = f"https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={symbol}"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=5)
+        response = _http_get(BVC_QUOTE_URL.format(symbol=symbol))
         
         if response.status_code != 200:
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # Try to find price element (this selector may need adjustment)
-        price_elem = soup.find('span', {'id': 'cours'}) or soup.find('td', {'class': 'cours'})
+        price_text = extract_price_text(response.text)
         
-        if price_elem:
-            price_text = price_elem.get_text().strip()
-            price = float(price_text.replace(',', '.').replace(' ', ''))
+        if price_text:
+            price = _parse_price(price_text)
             return {'price': price}
         
         return None
@@ -165,17 +267,91 @@ def scrape_bvc_price(symbol):
         return None
 
 
+def scrape_bvc_listing():
+    """
+    Scrape the market listing page once and return
+    {symbol: {'price': ...}} for every known stock found on it.
+    """
+    try:
+        response = _http_get(BVC_LISTING_URL)
+        
+        if response.status_code != 200:
+            return {}
+        
+        return parse_bvc_listing(response.text)
+    
+    except Exception as e:
+        return {}
+
+
+def parse_bvc_listing(html, backend=None):
+    """
+    Parse a listing table: a row matches a stock when one of its cells
+    is the ticker or company name; the price is the 'cours' cell, or
+    the first numeric cell after the match.
+    """
+    names = {info['name'].lower(): symbol for symbol, info in MOROCCO_STOCKS.items()}
+    results = {}
+    
+    for texts, cours_text in extract_listing_rows(html, backend):
+        symbol = None
+        match_index = None
+        for i, text in enumerate(texts):
+            symbol = text.upper() if text.upper() in MOROCCO_STOCKS else names.get(text.lower())
+            if symbol:
+                match_index = i
+                break
+        
+        if not symbol or symbol in results:
+            continue
+        
+        candidates = [cours_text] if cours_text is not None else texts[match_index + 1:]
+        
+        for text in candidates:
+            try:
+                results[symbol] = {'price': _parse_price(text)}
+                break
+            except ValueError:
+                continue
+    
+    return results
+
+
 def get_all_morocco_quotes():
     """
     Get quotes for all available Moroccan stocks.
+    Uncached symbols are read from one listing page when possible;
+    the rest are scraped concurrently.
     """
     results = {}
+    missing = []
     for symbol in MOROCCO_STOCKS.keys():
-        results[symbol] = get_morocco_quote(symbol)
+        cached_data = _morocco_cache.get(symbol)
+        if cached_data is not None:
+            results[symbol] = cached_data
+        else:
+            missing.append(symbol)
+    
+    if not missing:
+        return results
+    
+    listing = _inflight.do('listing', scrape_bvc_listing)
+    remaining = []
+    for symbol in missing:
+        price_data = listing.get(symbol)
+        if price_data and price_data.get('price'):
+            results[symbol] = _store_live_quote(symbol, price_data)
+        else:
+            remaining.append(symbol)
+    
+    if remaining:
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SCRAPES) as executor:
+            for symbol, data in zip(remaining, executor.map(get_morocco_quote, remaining)):
+                results[symbol] = data
+    
     return results
 
 
 def clear_cache():
     """Clear the cache for testing."""
-    global _morocco_cache
-    _morocco_cache = {}
+    _morocco_cache.clear()
@@ -0,0 +1,289 @@
+"""
+Order Execution
+
+Orders are stored in the orders table, so any instance can report an
+order's status and its fill result. Two execution modes
+(ORDER_EXECUTION):
+- sync (default): the order executes inside the request that placed
+  it; safe for serverless functions and multi-worker gunicorn
+- queue: a worker pool executes orders in the background, one at a
+  time per challenge in submission order (long-running process only;
+  queued orders of a recycled process are marked failed on startup)
+
+Writers of a challenge's equity and positions (fills, imports) go
+through challenge_lock(), which serializes them within the process
+and, on databases that support it, across instances with a row lock.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from api.models import db, Order, Trade, Challenge
+from api.services import leaderboard
+from api.services.market import get_quote
+from api.services.morocco_scraper import get_morocco_quote, MOROCCO_STOCKS
+from api.services.positions import apply_fill, challenge_unrealized_pnl, refresh_marks
+from api.services.rules import evaluate_challenge_rules
+
+MAX_ORDER_WORKERS = int(os.getenv('ORDER_WORKERS', 8))
+# Pending orders allowed per challenge before new ones are refused
+MAX_PENDING_PER_CHALLENGE = 100
+# Orders a worker runs for one challenge before yielding to others
+DRAIN_BATCH_SIZE = 20
+MAX_WAIT_SECONDS = 30
+# How often a waiter re-reads an order run by another process
+ORDER_POLL_SECONDS = 0.25
+# Process-local locks, striped by challenge id
+LOCK_STRIPES = 64
+
+
+class OrderQueueFull(Exception):
+    """Raised when a challenge has too many pending orders."""
+
+
+_challenge_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+# challenge_id -> deque of (order_id, symbol); present while a worker drains it
+_queues = {}
+# order_id -> Event set when a queued order of this process has executed
+_done = {}
+_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+@contextmanager
+def challenge_lock(challenge_id):
+    """
+    Lock a challenge for a read-modify-write of its equity and
+    positions and yield it, freshly read (None if missing). Hold it
+    until the transaction is committed or rolled back.
+    """
+    with _challenge_locks[challenge_id % LOCK_STRIPES]:
+        yield Challenge.query.filter_by(id=challenge_id).with_for_update().populate_existing().first()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_ORDER_WORKERS,
+                thread_name_prefix='order-worker'
+            )
+        return _executor
+
+
+def submit_order(app, challenge_id, user_id, symbol, side, qty):
+    """
+    Record an order and execute it (sync mode) or enqueue it (queue
+    mode). Returns the order id. `app` is the Flask app the execution
+    runs under. Raises OrderQueueFull if the challenge has too many
+    pending orders.
+    """
+    queued = app.config.get('ORDER_EXECUTION') == 'queue'
+    order = Order(
+        id=uuid.uuid4().hex,
+        challenge_id=challenge_id,
+        user_id=user_id,
+        symbol=symbol.upper(),
+        side=side,
+        qty=qty,
+        status='queued'
+    )
+
+    if queued:
+        with _lock:
+            queue = _queues.get(challenge_id)
+            if queue is not None and len(queue) >= MAX_PENDING_PER_CHALLENGE:
+                raise OrderQueueFull(f'Too many pending orders for challenge {challenge_id}')
+
+    db.session.add(order)
+    db.session.commit()
+    order_id, symbol = order.id, order.symbol
+
+    if not queued:
+        _execute(order_id, challenge_id, symbol)
+        return order_id
+
+    with _lock:
+        queue = _queues.get(challenge_id)
+        start_worker = queue is None
+        if start_worker:
+            queue = _queues[challenge_id] = deque()
+        queue.append((order_id, symbol))
+        _done[order_id] = threading.Event()
+
+    if start_worker:
+        _get_executor().submit(_drain, app, challenge_id)
+    return order_id
+
+
+def get_order(order_id):
+    """Look up an order by id (None if unknown)."""
+    return db.session.get(Order, order_id)
+
+
+def wait_for_order(order_id, timeout):
+    """
+    Block until the order has executed or `timeout` seconds passed and
+    return its current state.
+    """
+    deadline = time.time() + min(timeout, MAX_WAIT_SECONDS)
+    done = _done.get(order_id)
+    while True:
+        db.session.expire_all()
+        order = get_order(order_id)
+        remaining = deadline - time.time()
+        if order is None or not order.pending or remaining <= 0:
+            return order
+        # Release the connection while waiting
+        db.session.close()
+        if done is not None:
+            done.wait(remaining)
+        else:
+            time.sleep(min(ORDER_POLL_SECONDS, remaining))
+
+
+def fail_abandoned_orders():
+    """
+    Mark orders left queued by a previous process as failed (queue
+    mode only; call once at startup).
+    """
+    count = Order.query.filter(Order.status == 'queued').update({
+        'status': 'failed',
+        'error': 'Order was not executed (server restarted)',
+        'executed_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+def _drain(app, challenge_id):
+    """
+    Run a challenge's queued orders in order, one at a time. The queue
+    entry is only removed once it is empty, so a drain that stops for
+    any reason is rescheduled rather than leaving the challenge without
+    a worker.
+    """
+    finished = False
+    try:
+        for _ in range(DRAIN_BATCH_SIZE):
+            with _lock:
+                queue = _queues[challenge_id]
+                if not queue:
+                    del _queues[challenge_id]
+                    finished = True
+                    return
+                order_id, symbol = queue.popleft()
+            try:
+                with app.app_context():
+                    _execute(order_id, challenge_id, symbol)
+            except Exception as e:
+                # Not even the failure could be recorded (e.g. database
+                # down): the order stays queued until the next restart
+                print(f"Order {order_id} could not be recorded: {e}")
+            finally:
+                done = _done.pop(order_id, None)
+                if done is not None:
+                    done.set()
+    finally:
+        if not finished:
+            # Let other challenges' orders run before continuing
+            try:
+                _get_executor().submit(_drain, app, challenge_id)
+            except RuntimeError:
+                # Executor shut down: the next submit_order starts a worker
+                with _lock:
+                    _queues.pop(challenge_id, None)
+
+
+def _execute(order_id, challenge_id, symbol):
+    """
+    Fill an order (requires an app context). The quote and the stale
+    marks of the challenge's open positions are fetched first, outside
+    the challenge lock.
+    """
+    try:
+        price = _get_price(symbol)
+        if not price:
+            _finish(order_id, 'rejected', error='Could not get price for symbol')
+            return
+        refresh_marks([challenge_id])
+        _fill(order_id, price)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Order {order_id} failed: {e}")
+        _finish(order_id, 'failed', error=f'Failed to execute order: {str(e)}')
+
+
+def _finish(order_id, status, error=None):
+    Order.query.filter_by(id=order_id).update({
+        'status': status,
+        'error': error,
+        'executed_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def _get_price(symbol):
+    if symbol in MOROCCO_STOCKS:
+        quote_data = get_morocco_quote(symbol)
+    else:
+        quote_data = get_quote(symbol)
+    return quote_data.get('price', 0)
+
+
+def _fill(order_id, price):
+    """Write the fill, position, equity, rule results and order in one transaction."""
+    order = get_order(order_id)
+    with challenge_lock(order.challenge_id) as challenge:
+        if challenge is None or challenge.status != 'active':
+            status = challenge.status if challenge else 'missing'
+            order.status = 'rejected'
+            order.error = f'Challenge is {status}. Cannot trade.'
+            order.executed_at = datetime.utcnow()
+            db.session.commit()
+            return
+
+        # Update the position; PnL is what this fill closed out
+        position, pnl = apply_fill(challenge.id, order.symbol, order.side, order.qty, price)
+
+        trade = Trade(
+            challenge_id=challenge.id,
+            symbol=order.symbol,
+            side=order.side,
+            qty=order.qty,
+            price=price,
+            pnl=round(pnl, 2)
+        )
+
+        # Update challenge equity (realized)
+        challenge.equity = round(challenge.equity + pnl, 2)
+
+        db.session.add(trade)
+
+        # Evaluate rules on mark-to-market equity, then write trade,
+        # position, equity, status, daily metrics and the order result
+        # in one transaction
+        unrealized = challenge_unrealized_pnl(challenge.id)
+        rule_result = evaluate_challenge_rules(challenge, commit=False, unrealized=unrealized)
+        db.session.flush()
+
+        order.status = 'filled'
+        order.executed_at = datetime.utcnow()
+        order.result_json = json.dumps({
+            'trade': trade.to_dict(),
+            'position': position.to_dict(),
+            'challenge': challenge.to_dict(),
+            'rule_result': rule_result
+        })
+        db.session.commit()
+
+    leaderboard.update_challenge(challenge)
@@ -0,0 +1,213 @@
+"""
+Position Ledger
+
+Keeps one net position per (challenge, symbol), updated incrementally
+on every fill with average-cost accounting:
+- Fills in the position's direction add to it at a new average price
+- Opposite fills close against the average price and realize PnL
+- A fill larger than the position flips it; the remainder opens a new
+  position at the fill price
+
+Unrealized PnL is marked from the quote caches (no fetch), so the
+portfolio and mark-to-market equity cost O(positions), not O(trades).
+Before the rules are evaluated, refresh_marks() re-fetches the open
+symbols whose cached price is older than MARK_MAX_AGE_SECONDS; if a
+fetch fails the last known price stays the mark. A challenge with an
+open position that was never priced has no mark (None) and its rules
+are not evaluated.
+"""
+
+import os
+from collections import defaultdict
+
+from api.models import db, Position
+from api.services.market import cached_price, get_multiple_quotes
+from api.services.morocco_scraper import MOROCCO_STOCKS, cached_morocco_price, refresh_morocco_quote
+
+# Positions smaller than this are treated as flat
+QTY_EPSILON = 1e-9
+# Cached prices older than this are re-fetched before the rules run
+MARK_MAX_AGE_SECONDS = int(os.getenv('MARK_MAX_AGE_SECONDS', 300))
+
+
+def apply_fill(challenge_id, symbol, side, qty, price):
+    """
+    Apply a fill to the challenge's position in `symbol` (not committed).
+    Returns (position, realized_pnl) where realized_pnl is the PnL this
+    fill closed out.
+    """
+    symbol = symbol.upper()
+    position = Position.query.filter_by(challenge_id=challenge_id, symbol=symbol).first()
+    if position is None:
+        position = Position(
+            challenge_id=challenge_id,
+            symbol=symbol,
+            qty=0,
+            avg_price=0,
+            realized_pnl=0
+        )
+        db.session.add(position)
+
+    position.qty, position.avg_price, realized = fill_position(
+        position.qty or 0, position.avg_price or 0, side, qty, price
+    )
+    position.realized_pnl = (position.realized_pnl or 0) + realized
+    return position, realized
+
+
+def fill_position(current, avg_price, side, qty, price):
+    """
+    Average-cost update of a net position (`current` is signed).
+    Returns (new_qty, new_avg_price, realized_pnl).
+    """
+    signed_qty = qty if side == 'buy' else -qty
+
+    if abs(current) < QTY_EPSILON or (current > 0) == (signed_qty > 0):
+        # Open or add: new weighted average price
+        new_qty = current + signed_qty
+        new_avg = (abs(current) * avg_price + qty * price) / abs(new_qty)
+        return new_qty, new_avg, 0.0
+
+    # Reduce, close or flip
+    closed = min(qty, abs(current))
+    direction = 1 if current > 0 else -1
+    realized = closed * (price - avg_price) * direction
+
+    new_qty = current + signed_qty
+    if abs(new_qty) < QTY_EPSILON:
+        return 0, 0, realized
+    if (new_qty > 0) != (current > 0):
+        # Flipped: the remainder opens at the fill price
+        return new_qty, price, realized
+    return new_qty, avg_price, realized
+
+
+def mark_price(symbol, max_age=None):
+    """
+    Last cached price for a symbol, or None if not cached (or older
+    than `max_age` seconds when given).
+    """
+    symbol = symbol.upper()
+    if symbol in MOROCCO_STOCKS:
+        return cached_morocco_price(symbol, max_age=max_age)
+    return cached_price(symbol, max_age=max_age)
+
+
+def refresh_marks(challenge_ids=None, max_age=MARK_MAX_AGE_SECONDS):
+    """
+    Re-fetch the quotes of open symbols (of `challenge_ids`, or of all
+    challenges) whose cached price is missing or older than `max_age`
+    seconds: Moroccan stocks one by one, the rest in one batch. Fetch
+    errors are ignored, leaving the last known price as the mark.
+    Returns the symbols that were refreshed.
+    """
+    query = db.session.query(Position.symbol).filter(Position.qty != 0).distinct()
+    if challenge_ids is not None:
+        query = query.filter(Position.challenge_id.in_(challenge_ids))
+    stale = [r.symbol for r in query.all() if mark_price(r.symbol, max_age=max_age) is None]
+    if not stale:
+        return []
+
+    try:
+        others = [s for s in stale if s not in MOROCCO_STOCKS]
+        if others:
+            get_multiple_quotes(others)
+        for symbol in stale:
+            if symbol in MOROCCO_STOCKS:
+                refresh_morocco_quote(symbol)
+    except Exception as e:
+        print(f"Mark refresh failed for {stale}: {e}")
+    return stale
+
+
+def unrealized_pnl(qty, avg_price, price):
+    """Unrealized PnL of a net position at `price`."""
+    if price is None or not qty:
+        return 0.0
+    return qty * (price - avg_price)
+
+
+def get_portfolio(challenge):
+    """
+    Open positions of a challenge marked to market at their last
+    cached price, plus the totals. Symbols never priced are marked at
+    their average price.
+    """
+    positions = Position.query.filter(
+        Position.challenge_id == challenge.id
+    ).all()
+
+    items = []
+    total_unrealized = 0.0
+    total_realized = 0.0
+    for position in positions:
+        total_realized += position.realized_pnl or 0
+        if abs(position.qty or 0) < QTY_EPSILON:
+            continue
+
+        price = mark_price(position.symbol)
+        unrealized = unrealized_pnl(position.qty, position.avg_price, price)
+        total_unrealized += unrealized
+
+        item = position.to_dict()
+        item['mark_price'] = price
+        item['market_value'] = round(position.qty * (price or position.avg_price), 2)
+        item['unrealized_pnl'] = round(unrealized, 2)
+        items.append(item)
+
+    return {
+        'positions': items,
+        'realized_pnl': round(total_realized, 2),
+        'unrealized_pnl': round(total_unrealized, 2),
+        'equity': round((challenge.equity or 0) + total_unrealized, 2)
+    }
+
+
+def challenge_unrealized_pnl(challenge_id):
+    """
+    Unrealized PnL of one challenge's open positions, or None if one of
+    them has no price to mark it with.
+    """
+    rows = db.session.query(
+        Position.symbol, Position.qty, Position.avg_price
+    ).filter(
+        Position.challenge_id == challenge_id,
+        Position.qty != 0
+    ).all()
+
+    total = 0.0
+    for r in rows:
+        price = mark_price(r.symbol)
+        if price is None:
+            return None
+        total += unrealized_pnl(r.qty, r.avg_price, price)
+    return total
+
+
+def unrealized_by_challenge(challenge_ids=None):
+    """
+    Map challenge_id -> unrealized PnL for every challenge with open
+    positions (one query), e.g. for rule_sweep.sweep_active_challenges.
+    Challenges with a position that has no price map to None.
+    """
+    query = db.session.query(
+        Position.challenge_id, Position.symbol, Position.qty, Position.avg_price
+    ).filter(Position.qty != 0)
+    if challenge_ids is not None:
+        query = query.filter(Position.challenge_id.in_(challenge_ids))
+
+    prices = {}
+    totals = defaultdict(float)
+    unmarked = set()
+    for row in query.all():
+        if row.symbol not in prices:
+            prices[row.symbol] = mark_price(row.symbol)
+        price = prices[row.symbol]
+        if price is None:
+            unmarked.add(row.challenge_id)
+            continue
+        totals[row.challenge_id] += unrealized_pnl(row.qty, row.avg_price, price)
+
+    result = dict(totals)
+    result.update(dict.fromkeys(unmarked, None))
+    return result
@@ -0,0 +1,125 @@
+"""
+Quote Pre-warmer
+
+Background refresher that keeps a hot set of symbols fresh in the
+quote caches, so user requests almost always hit a warm entry.
+
+Hot set:
+- Symbols from the market overview (signals.MAJOR_SYMBOLS)
+- All Moroccan stocks (MOROCCO_STOCKS)
+- The most requested symbols since startup
+- Any extra symbols passed to start_prewarmer
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from api.services.market import (
+    refresh_quote, quote_expires_in, get_popular_symbols
+)
+from api.services.morocco_scraper import (
+    MOROCCO_STOCKS, refresh_morocco_quote, morocco_quote_expires_in
+)
+from api.services.signals import MAJOR_SYMBOLS
+
+PREWARM_INTERVAL_SECONDS = 5
+# Refresh entries this many seconds before they expire
+REFRESH_AHEAD_SECONDS = 10
+HOT_SYMBOL_LIMIT = 20
+MAX_WORKERS = 4
+
+_thread = None
+_stop_event = threading.Event()
+
+
+def get_hot_symbols(extra_symbols=()):
+    """
+    Return (quote_symbols, morocco_symbols) to keep warm.
+    """
+    symbols = []
+    for symbol in list(MAJOR_SYMBOLS) + list(extra_symbols) + get_popular_symbols(HOT_SYMBOL_LIMIT):
+        symbol = symbol.upper()
+        if symbol not in symbols:
+            symbols.append(symbol)
+
+    quote_symbols = [s for s in symbols if s not in MOROCCO_STOCKS]
+    return quote_symbols, list(MOROCCO_STOCKS.keys())
+
+
+def _is_due(expires_in):
+    return expires_in is None or expires_in <= REFRESH_AHEAD_SECONDS
+
+
+def run_once(extra_symbols=(), executor=None):
+    """
+    Refresh every hot symbol that is missing or about to expire.
+    Returns the list of refreshed symbols.
+    """
+    quote_symbols, morocco_symbols = get_hot_symbols(extra_symbols)
+
+    jobs = [
+        (symbol, refresh_quote) for symbol in quote_symbols
+        if _is_due(quote_expires_in(symbol))
+    ] + [
+        (symbol, refresh_morocco_quote) for symbol in morocco_symbols
+        if _is_due(morocco_quote_expires_in(symbol))
+    ]
+
+    if not jobs:
+        return []
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+    try:
+        futures = [(symbol, executor.submit(fn, symbol)) for symbol, fn in jobs]
+        refreshed = []
+        for symbol, future in futures:
+            try:
+                future.result()
+                refreshed.append(symbol)
+            except Exception as e:
+                print(f"Pre-warm failed for {symbol}: {e}")
+        return refreshed
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+def _loop(extra_symbols, interval, on_refresh):
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    while not _stop_event.is_set():
+        try:
+            refreshed = run_once(extra_symbols, executor)
+            if refreshed and on_refresh is not None:
+                on_refresh(refreshed)
+        except Exception as e:
+            print(f"Error in pre-warm loop: {e}")
+        _stop_event.wait(interval)
+    executor.shutdown(wait=False)
+
+
+def start_prewarmer(extra_symbols=(), interval=PREWARM_INTERVAL_SECONDS, on_refresh=None):
+    """
+    Start the background refresher (no-op if already running).
+    on_refresh(symbols) is called after each cycle that refreshed quotes.
+    """
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return _thread
+
+    _stop_event.clear()
+    _thread = threading.Thread(
+        target=_loop,
+        args=(tuple(extra_symbols), interval, on_refresh),
+        name='quote-prewarmer',
+        daemon=True
+    )
+    _thread.start()
+    return _thread
+
+
+def stop_prewarmer():
+    """Stop the background refresher."""
+    _stop_event.set()
@@ -0,0 +1,189 @@
+"""
+Quote Streaming Hub
+
+Fans quote updates out to streaming (SSE) subscribers from one shared
+refresher thread per process:
+- Each cycle reads the union of subscribed symbols once through the
+  quote caches (batch + single-flight), so viewers never multiply
+  upstream load
+- Only fields that changed since the last published quote are sent
+- Each subscriber holds at most one pending delta per subscribed
+  symbol; deltas that arrive before it reads are merged, so a slow
+  client cannot grow memory
+"""
+
+import os
+import threading
+
+from api.services.market import get_multiple_quotes
+from api.services.morocco_scraper import get_morocco_quote, MOROCCO_STOCKS
+
+STREAM_INTERVAL_SECONDS = 2
+HEARTBEAT_SECONDS = 15
+# Streams are closed after this long and the client reconnects, so a
+# connection holds a worker thread for a bounded time
+STREAM_MAX_SECONDS = int(os.getenv('QUOTE_STREAM_MAX_SECONDS', 300))
+MAX_SUBSCRIBERS = 5000
+# Fields that change on every fetch without the quote moving
+IGNORED_DELTA_FIELDS = ('timestamp', 'age')
+
+
+class HubFull(Exception):
+    """Raised when the process already serves MAX_SUBSCRIBERS streams."""
+
+
+class Subscription:
+    """One streaming client: its symbols and the deltas it has not read yet."""
+
+    __slots__ = ('symbols', 'pending', 'condition', 'closed')
+
+    def __init__(self, symbols):
+        self.symbols = frozenset(symbols)
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def push(self, symbol, delta):
+        with self.condition:
+            if symbol in self.pending:
+                self.pending[symbol].update(delta)
+            else:
+                self.pending[symbol] = dict(delta)
+            self.condition.notify()
+
+    def wait(self, timeout):
+        """Return pending deltas {symbol: delta} (empty on timeout)."""
+        with self.condition:
+            if not self.pending and not self.closed:
+                self.condition.wait(timeout)
+            pending, self.pending = self.pending, {}
+            return pending
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+
+class QuoteHub:
+    """Subscriber registry plus the shared refresher."""
+
+    def __init__(self, interval=STREAM_INTERVAL_SECONDS):
+        self.interval = interval
+        self._lock = threading.Lock()
+        # symbol -> set of subscriptions
+        self._subscribers = {}
+        self._count = 0
+        # symbol -> last published quote
+        self._last = {}
+        self._thread = None
+        self._wake = threading.Event()
+
+    def subscribe(self, symbols):
+        """
+        Register a client for `symbols` and return (subscription, snapshot)
+        where snapshot holds the last published quote of each symbol.
+        Raises HubFull when the process is at capacity.
+        """
+        symbols = [s.upper() for s in symbols]
+        subscription = Subscription(symbols)
+
+        with self._lock:
+            if self._count >= MAX_SUBSCRIBERS:
+                raise HubFull('Too many streaming clients')
+            self._count += 1
+            new_symbols = False
+            for symbol in subscription.symbols:
+                if symbol not in self._subscribers:
+                    self._subscribers[symbol] = set()
+                    new_symbols = True
+                self._subscribers[symbol].add(subscription)
+            snapshot = {s: self._last[s] for s in subscription.symbols if s in self._last}
+
+        self._ensure_running()
+        if new_symbols:
+            # Fetch the new symbols now rather than at the next tick
+            self._wake.set()
+        return subscription, snapshot
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._count -= 1
+            for symbol in subscription.symbols:
+                subscribers = self._subscribers.get(symbol)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[symbol]
+                    self._last.pop(symbol, None)
+
+    def subscriber_count(self):
+        with self._lock:
+            return self._count
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name='quote-stream', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                symbols = list(self._subscribers)
+            if symbols:
+                try:
+                    self.publish(_fetch_quotes(symbols))
+                except Exception as e:
+                    print(f"Error in quote stream: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def publish(self, quotes):
+        """Send each quote's changed fields to the symbol's subscribers."""
+        for symbol, quote in quotes.items():
+            symbol = symbol.upper()
+            if not quote or quote.get('error'):
+                continue
+
+            with self._lock:
+                previous = self._last.get(symbol)
+                subscribers = list(self._subscribers.get(symbol, ()))
+                if not subscribers:
+                    continue
+                self._last[symbol] = quote
+
+            delta = _diff(previous, quote)
+            if delta is None:
+                continue
+            delta['symbol'] = symbol
+            for subscription in subscribers:
+                subscription.push(symbol, delta)
+
+
+def _fetch_quotes(symbols):
+    morocco = [s for s in symbols if s in MOROCCO_STOCKS]
+    others = [s for s in symbols if s not in MOROCCO_STOCKS]
+
+    quotes = get_multiple_quotes(others) if others else {}
+    for symbol in morocco:
+        quotes[symbol] = get_morocco_quote(symbol)
+    return quotes
+
+
+def _diff(previous, quote):
+    """Changed fields of `quote`, or None if nothing meaningful changed."""
+    if previous is None:
+        return dict(quote)
+    delta = {k: v for k, v in quote.items() if previous.get(k) != v}
+    # Fields that disappeared (e.g. the stale flag) are cleared
+    delta.update({k: None for k in previous if k not in quote})
+    if all(k in IGNORED_DELTA_FIELDS for k in delta):
+        return None
+    return delta
+
+
+hub = QuoteHub()
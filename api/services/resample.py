@@ -0,0 +1,74 @@
+"""
+Candle Resampling
+
+Builds coarser OHLCV bars from finer ones with vectorized
+group-by aggregation, so only the finest interval has to be
+fetched from the provider.
+
+Buckets are aligned to the session open like the provider's own bars
+(US equities: 1h bars start at 9:30). The open is the first bar after
+the longest gap of at least SESSION_GAP_SECONDS; markets without such
+a gap (crypto) keep buckets aligned to the epoch.
+"""
+
+import numpy as np
+
+# Bar length in seconds for intervals that can be derived from 1m bars
+INTERVAL_SECONDS = {
+    '1m': 60,
+    '2m': 120,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600
+}
+# Shortest pause between two bars that counts as a market close (longer
+# than lunch breaks)
+SESSION_GAP_SECONDS = 4 * 3600
+
+
+def resample_columns(columns, interval):
+    """
+    Aggregate columnar OHLCV bars into `interval` buckets.
+    Input must be sorted by time. Buckets are aligned to the session
+    open (see session_offset).
+    """
+    step = INTERVAL_SECONDS[interval]
+    times = np.asarray(columns['time'], dtype=np.int64)
+
+    if times.size == 0:
+        return {field: [] for field in ('time', 'open', 'high', 'low', 'close', 'volume')}
+
+    buckets = times - (times - session_offset(times, step)) % step
+    # Index of the first bar in each bucket
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], times.size] - 1
+
+    open_ = np.asarray(columns['open'], dtype=np.float64)
+    high = np.asarray(columns['high'], dtype=np.float64)
+    low = np.asarray(columns['low'], dtype=np.float64)
+    close = np.asarray(columns['close'], dtype=np.float64)
+    volume = np.asarray(columns['volume'], dtype=np.int64)
+
+    return {
+        'time': buckets[starts].tolist(),
+        'open': open_[starts].tolist(),
+        'high': np.maximum.reduceat(high, starts).tolist(),
+        'low': np.minimum.reduceat(low, starts).tolist(),
+        'close': close[ends].tolist(),
+        'volume': np.add.reduceat(volume, starts).tolist()
+    }
+
+
+def session_offset(times, step):
+    """
+    Offset of the bucket boundaries from the epoch, in seconds: the
+    session open modulo `step`, or 0 without a market close in `times`.
+    """
+    if times.size < 2:
+        return 0
+    gaps = np.diff(times)
+    longest = int(gaps.argmax())
+    if gaps[longest] < SESSION_GAP_SECONDS:
+        return 0
+    return int(times[longest + 1] % step)
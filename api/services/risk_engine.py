@@ -0,0 +1,190 @@
+"""
+Challenge Risk Engine
+
+Keeps each active challenge's equity, day-start equity and intraday
+drawdown in memory so the challenge rules evaluate without DB reads.
+The DB is only touched to seed a challenge's state once per day and
+to write state changes in the caller's transaction.
+"""
+
+import threading
+from datetime import date, datetime
+from sqlalchemy import case
+from api.models import db, DailyMetrics
+
+# Rule limits (percent of start balance / day-start equity)
+MAX_TOTAL_LOSS_PCT = -10
+PROFIT_TARGET_PCT = 10
+MAX_DAILY_LOSS_PCT = -5
+
+
+class ChallengeState:
+    """Compact risk state for one challenge."""
+
+    __slots__ = (
+        'challenge_id', 'start_balance', 'equity', 'status',
+        'day', 'day_start_equity', 'max_intraday_drawdown_pct'
+    )
+
+    def __init__(self, challenge_id, start_balance, equity, status,
+                 day, day_start_equity, max_intraday_drawdown_pct=0):
+        self.challenge_id = challenge_id
+        self.start_balance = start_balance
+        self.equity = equity
+        self.status = status
+        self.day = day
+        self.day_start_equity = day_start_equity
+        self.max_intraday_drawdown_pct = max_intraday_drawdown_pct
+
+    @property
+    def total_pnl_pct(self):
+        if not self.start_balance:
+            return 0
+        return ((self.equity - self.start_balance) / self.start_balance) * 100
+
+    @property
+    def day_pnl(self):
+        return self.equity - self.day_start_equity
+
+    @property
+    def day_pnl_pct(self):
+        if self.day_start_equity <= 0:
+            return 0
+        return (self.day_pnl / self.day_start_equity) * 100
+
+
+_states = {}
+_lock = threading.Lock()
+
+
+def get_state(challenge, today=None, unrealized=0):
+    """
+    Return the in-memory state for a challenge, synced to its current
+    equity plus `unrealized` PnL (mark-to-market). Seeds from (or
+    creates) today's DailyMetrics row the first time a challenge is
+    seen each day.
+    """
+    today = today or date.today()
+    equity = (challenge.equity or 0) + unrealized
+
+    with _lock:
+        state = _states.get(challenge.id)
+
+    if state is None or state.day != today:
+        state = _load_state(challenge, today, equity)
+        with _lock:
+            _states[challenge.id] = state
+
+    state.equity = equity
+    state.start_balance = challenge.start_balance
+    state.status = challenge.status
+    if state.day_pnl_pct < state.max_intraday_drawdown_pct:
+        state.max_intraday_drawdown_pct = state.day_pnl_pct
+    return state
+
+
+def _load_state(challenge, today, equity):
+    daily_metric = DailyMetrics.query.filter_by(
+        challenge_id=challenge.id,
+        date=today
+    ).first()
+
+    if daily_metric is None:
+        # New day: current equity is the day start (written with the trade)
+        daily_metric = DailyMetrics(
+            challenge_id=challenge.id,
+            date=today,
+            day_start_equity=equity,
+            day_end_equity=equity,
+            day_pnl=0,
+            max_intraday_drawdown_pct=0
+        )
+        db.session.add(daily_metric)
+
+    return ChallengeState(
+        challenge.id,
+        challenge.start_balance,
+        equity,
+        challenge.status,
+        today,
+        daily_metric.day_start_equity,
+        daily_metric.max_intraday_drawdown_pct or 0
+    )
+
+
+def evaluate_state(state):
+    """
+    Evaluate the challenge rules against in-memory state only.
+    Returns (new_status or None, triggered rule or None, rules_checked).
+    """
+    rules_checked = []
+    total_pnl_pct = state.total_pnl_pct
+
+    # Rule 1: Max total loss (10%)
+    if total_pnl_pct <= MAX_TOTAL_LOSS_PCT:
+        rules_checked.append(f'Total loss {total_pnl_pct:.2f}% exceeds -10% limit')
+        return 'failed', 'MAX_TOTAL_LOSS', rules_checked
+
+    rules_checked.append(f'Total loss check: {total_pnl_pct:.2f}% (limit: -10%)')
+
+    # Rule 2: Profit target (10%)
+    if total_pnl_pct >= PROFIT_TARGET_PCT:
+        rules_checked.append(f'Profit target reached: {total_pnl_pct:.2f}% (target: +10%)')
+        return 'passed', 'PROFIT_TARGET_REACHED', rules_checked
+
+    rules_checked.append(f'Profit target check: {total_pnl_pct:.2f}% (target: +10%)')
+
+    # Rule 3: Max daily loss (5%)
+    daily_loss_pct = state.day_pnl_pct
+    if daily_loss_pct <= MAX_DAILY_LOSS_PCT:
+        rules_checked.append(f'Daily loss {daily_loss_pct:.2f}% exceeds -5% limit')
+        return 'failed', 'MAX_DAILY_LOSS', rules_checked
+
+    rules_checked.append(f'Daily loss check: {daily_loss_pct:.2f}% (limit: -5%)')
+    return None, None, rules_checked
+
+
+def apply_status(challenge, status):
+    """Set a rule-driven status change on the challenge (not committed)."""
+    challenge.status = status
+    if status == 'failed':
+        challenge.failed_at = datetime.utcnow()
+    elif status == 'passed':
+        challenge.passed_at = datetime.utcnow()
+
+    with _lock:
+        state = _states.get(challenge.id)
+        if state is not None:
+            state.status = status
+
+
+def record_daily_metrics(state):
+    """
+    Write the state's daily figures with a single UPDATE in the
+    current transaction (no SELECT). The drawdown only ever decreases,
+    so concurrent workers cannot overwrite a deeper value.
+    """
+    drawdown = state.max_intraday_drawdown_pct
+    DailyMetrics.query.filter_by(
+        challenge_id=state.challenge_id,
+        date=state.day
+    ).update({
+        'day_end_equity': state.equity,
+        'day_pnl': state.day_pnl,
+        'max_intraday_drawdown_pct': case(
+            (DailyMetrics.max_intraday_drawdown_pct > drawdown, drawdown),
+            else_=DailyMetrics.max_intraday_drawdown_pct
+        )
+    }, synchronize_session=False)
+
+
+def forget(challenge_id):
+    """Drop a challenge's state (e.g. once it is no longer active)."""
+    with _lock:
+        _states.pop(challenge_id, None)
+
+
+def clear_states():
+    """Drop all state (for testing)."""
+    with _lock:
+        _states.clear()
@@ -0,0 +1,121 @@
+"""
+Bulk Challenge Rule Sweep
+
+Re-evaluates the challenge rules for every active challenge at once,
+e.g. after a quote refresh, so price moves can fail or pass
+challenges that are holding positions without placing a trade.
+
+Two reads (challenges, today's day-start equity), one vectorized
+pass over NumPy arrays, and bulk statements for the writes: status
+changes, and today's day-start row for challenges swept before their
+first trade of the day.
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy import insert
+
+from api.models import db, Challenge, DailyMetrics
+from api.services import leaderboard, risk_engine
+
+# Ids per UPDATE ... WHERE id IN (...) statement
+UPDATE_CHUNK_SIZE = 500
+
+
+def sweep_active_challenges(unrealized=None, today=None, commit=True):
+    """
+    Evaluate total loss, profit target and daily loss for all active
+    challenges. `unrealized` maps challenge_id -> unrealized PnL to add
+    to the stored equity (mark-to-market); challenges mapped to None
+    (an open position has no price) are skipped. Returns a summary with
+    the ids that failed or passed.
+    """
+    today = today or date.today()
+    unrealized = unrealized or {}
+
+    rows = db.session.query(
+        Challenge.id, Challenge.start_balance, Challenge.equity
+    ).filter(Challenge.status == 'active').all()
+    rows = [r for r in rows if unrealized.get(r.id, 0) is not None]
+
+    if not rows:
+        return {'checked': 0, 'failed': [], 'passed': []}
+
+    ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=len(rows))
+    start = np.fromiter((r.start_balance or 0 for r in rows), dtype=np.float64, count=len(rows))
+    equity = np.fromiter(
+        ((r.equity or 0) + unrealized.get(r.id, 0) for r in rows),
+        dtype=np.float64, count=len(rows)
+    )
+
+    # Day-start equity; challenges without a row today start the day
+    # now, at the same marked equity (so no daily PnL yet), and the row
+    # is written so later sweeps measure against it
+    day_starts = dict(db.session.query(
+        DailyMetrics.challenge_id, DailyMetrics.day_start_equity
+    ).filter(DailyMetrics.date == today).all())
+    missing = [i for i, r in enumerate(rows) if r.id not in day_starts]
+    day_start = np.fromiter(
+        (day_starts.get(r.id, 0) for r in rows),
+        dtype=np.float64, count=len(rows)
+    )
+    day_start[missing] = equity[missing]
+    _insert_day_starts(ids[missing].tolist(), equity[missing].tolist(), today)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_pct = np.where(start > 0, (equity - start) / start * 100, 0)
+        day_pct = np.where(day_start > 0, (equity - day_start) / day_start * 100, 0)
+
+    # Same precedence as evaluate_state: total loss, profit target, daily loss
+    failed_total = total_pct <= risk_engine.MAX_TOTAL_LOSS_PCT
+    passed = ~failed_total & (total_pct >= risk_engine.PROFIT_TARGET_PCT)
+    failed_daily = ~failed_total & ~passed & (day_pct <= risk_engine.MAX_DAILY_LOSS_PCT)
+
+    failed_ids = ids[failed_total | failed_daily].tolist()
+    passed_ids = ids[passed].tolist()
+
+    now = datetime.utcnow()
+    _bulk_set_status(failed_ids, {'status': 'failed', 'failed_at': now})
+    _bulk_set_status(passed_ids, {'status': 'passed', 'passed_at': now})
+
+    if commit:
+        db.session.commit()
+
+    for challenge_id in failed_ids + passed_ids:
+        risk_engine.forget(challenge_id)
+    leaderboard.set_statuses(failed_ids, 'failed')
+    leaderboard.set_statuses(passed_ids, 'passed')
+
+    return {
+        'checked': len(rows),
+        'failed': failed_ids,
+        'passed': passed_ids
+    }
+
+
+def _insert_day_starts(ids, equities, today):
+    """Bulk INSERT today's DailyMetrics rows starting at `equities`."""
+    if not ids:
+        return
+    db.session.execute(insert(DailyMetrics), [
+        {
+            'challenge_id': challenge_id,
+            'date': today,
+            'day_start_equity': equity,
+            'day_end_equity': equity,
+            'day_pnl': 0,
+            'max_intraday_drawdown_pct': 0
+        }
+        for challenge_id, equity in zip(ids, equities)
+    ])
+
+
+def _bulk_set_status(ids, values):
+    """UPDATE in chunks; only rows still active are changed."""
+    for i in range(0, len(ids), UPDATE_CHUNK_SIZE):
+        chunk = ids[i:i + UPDATE_CHUNK_SIZE]
+        Challenge.query.filter(
+            Challenge.id.in_(chunk),
+            Challenge.status == 'active'
+        ).update(values, synchronize_session=False)
@@ -7,12 +7,18 @@ Business Rules:
 - Profit target: if equity increases 10% → PASSED (Funded)
 """
 
-from datetime import datetime
-from api.models import db, Challenge, DailyMetrics
+from api.models import db
+from api.services import risk_engine
+from api.services.positions import challenge_unrealized_pnl
 
-def evaluate_challenge_rules(challenge):
+def evaluate_challenge_rules(challenge, commit=True, unrealized=0):
     """
     Evaluate all trading rules after a trade.
+    Equity is marked to market with the open positions' `unrealized`
+    PnL; if it is None (an open position has no price) the rules are
+    not evaluated. Rules run against the in-memory risk state; status and daily
+    metric changes are written in one transaction (pass commit=False
+    to leave the commit to the caller, e.g. together with the trade).
     Returns a dict with rule evaluation results.
     """
     result = {
@@ -22,106 +28,46 @@ def evaluate_challenge_rules(challenge):
     }
     
     if challenge.status != 'active':
+        risk_engine.forget(challenge.id)
         result['rules_checked'].append('Challenge not active, skipping rules')
         return result
     
-    start_balance = challenge.start_balance
-    current_equity = challenge.equity
-    
-    # Calculate total PnL percentage
-    total_pnl_pct = ((current_equity - start_balance) / start_balance) * 100
-    
-    # Rule 1: Max total loss (10%)
-    if total_pnl_pct <= -10:
-        challenge.status = 'failed'
-        challenge.failed_at = datetime.utcnow()
-        db.session.commit()
-        
-        result['status'] = 'failed'
-        result['triggered'] = 'MAX_TOTAL_LOSS'
-        result['rules_checked'].append(f'Total loss {total_pnl_pct:.2f}% exceeds -10% limit')
+    if unrealized is None:
+        result['rules_checked'].append('Open positions without a price, skipping rules')
         return result
     
-    result['rules_checked'].append(f'Total loss check: {total_pnl_pct:.2f}% (limit: -10%)')
-    
-    # Rule 2: Profit target (10%)
-    if total_pnl_pct >= 10:
-        challenge.status = 'passed'
-        challenge.passed_at = datetime.utcnow()
-        db.session.commit()
-        
-        result['status'] = 'passed'
-        result['triggered'] = 'PROFIT_TARGET_REACHED'
-        result['rules_checked'].append(f'Profit target reached: {total_pnl_pct:.2f}% (target: +10%)')
-        return result
+    state = risk_engine.get_state(challenge, unrealized=unrealized)
+    new_status, triggered, rules_checked = risk_engine.evaluate_state(state)
     
-    result['rules_checked'].append(f'Profit target check: {total_pnl_pct:.2f}% (target: +10%)')
+    result['rules_checked'] = rules_checked
+    if new_status:
+        risk_engine.apply_status(challenge, new_status)
+        result['status'] = new_status
+        result['triggered'] = triggered
     
-    # Rule 3: Max daily loss (5%)
-    daily_loss_pct = check_daily_loss(challenge)
+    risk_engine.record_daily_metrics(state)
     
-    if daily_loss_pct <= -5:
-        challenge.status = 'failed'
-        challenge.failed_at = datetime.utcnow()
+    if commit:
         db.session.commit()
-        
-        result['status'] = 'failed'
-        result['triggered'] = 'MAX_DAILY_LOSS'
-        result['rules_checked'].append(f'Daily loss {daily_loss_pct:.2f}% exceeds -5% limit')
-        return result
     
-    result['rules_checked'].append(f'Daily loss check: {daily_loss_pct:.2f}% (limit: -5%)')
+    if new_status:
+        risk_engine.forget(challenge.id)
     
     return result
 
 
-def check_daily_loss(challenge):
+def check_daily_loss(challenge, commit=True, unrealized=0):
     """
     Calculate the current day's PnL percentage.
-    Uses daily_metrics table or calculates from trades.
+    Uses the in-memory risk state, seeded from the daily_metrics table.
     """
-    from api.models import Trade
-    from datetime import date
-    
-    today = date.today()
+    state = risk_engine.get_state(challenge, unrealized=unrealized)
+    risk_engine.record_daily_metrics(state)
     
-    # Get or create today's metrics
-    daily_metric = DailyMetrics.query.filter_by(
-        challenge_id=challenge.id,
-        date=today
-    ).first()
-    
-    if not daily_metric:
-        # Create new daily metric with current equity as day start
-        daily_metric = DailyMetrics(
-            challenge_id=challenge.id,
-            date=today,
-            day_start_equity=challenge.equity,
-            day_end_equity=challenge.equity,
-            day_pnl=0,
-            max_intraday_drawdown_pct=0
-        )
-        db.session.add(daily_metric)
+    if commit:
         db.session.commit()
-        return 0
-    
-    # Calculate day PnL
-    day_start = daily_metric.day_start_equity
-    current = challenge.equity
-    day_pnl = current - day_start
-    day_pnl_pct = (day_pnl / day_start) * 100 if day_start > 0 else 0
-    
-    # Update daily metric
-    daily_metric.day_end_equity = current
-    daily_metric.day_pnl = day_pnl
-    
-    # Track max drawdown
-    if day_pnl_pct < daily_metric.max_intraday_drawdown_pct:
-        daily_metric.max_intraday_drawdown_pct = day_pnl_pct
-    
-    db.session.commit()
     
-    return day_pnl_pct
+    return state.day_pnl_pct
 
 
 def get_challenge_metrics(challenge):
@@ -129,16 +75,21 @@ def get_challenge_metrics(challenge):
     Get detailed metrics for a challenge.
     """
     start_balance = challenge.start_balance
-    current_equity = challenge.equity
+    unrealized = challenge_unrealized_pnl(challenge.id)
+    marked = unrealized is not None
+    unrealized = unrealized if marked else 0
+    current_equity = challenge.equity + unrealized
     total_pnl = current_equity - start_balance
     total_pnl_pct = (total_pnl / start_balance) * 100 if start_balance > 0 else 0
     
-    # Calculate daily loss
-    daily_pnl_pct = check_daily_loss(challenge)
+    # Calculate daily loss (not recorded without a mark for every position)
+    daily_pnl_pct = check_daily_loss(challenge, unrealized=unrealized) if marked else 0
     
     return {
+        'marked': marked,
         'start_balance': start_balance,
-        'current_equity': current_equity,
+        'current_equity': round(current_equity, 2),
+        'unrealized_pnl': round(unrealized, 2),
         'total_pnl': round(total_pnl, 2),
         'total_pnl_pct': round(total_pnl_pct, 2),
         'daily_pnl_pct': round(daily_pnl_pct, 2),
@@ -5,11 +5,39 @@ Rule-based signal generation with confidence scores.
 Provides BUY/SELL/NEUTRAL signals with reasoning.
 """
 
-from services.market import get_quote, get_series
-from services.morocco_scraper import get_morocco_quote
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from api.services.market import get_quote, get_series, get_multiple_quotes
+from api.services.morocco_scraper import get_morocco_quote
+from api.services.indicators import update_indicators
+from api.services.cache import make_cache
 
 MOROCCO_SYMBOLS = ['IAM', 'ATW', 'BCP', 'LHM', 'CIH']
 
+# Symbols shown in the market overview
+MAJOR_SYMBOLS = ['BTC-USD', 'AAPL', 'TSLA', 'IAM', 'ATW']
+
+SMA_PERIOD = 20
+HIGH_VOLUME = 10000000
+
+# Thresholds of the rule set (tunable for backtests)
+DEFAULT_RULE_PARAMS = {
+    'strong_move_pct': 2,
+    'move_pct': 0.5,
+    'range_high': 0.8,
+    'range_low': 0.2,
+    'high_volume': HIGH_VOLUME,
+    'sma_band': 0.02
+}
+
+# Concurrent series loads in the batch engine
+MAX_SERIES_WORKERS = 8
+
+# Signal results, reused until the quote or series they were built
+# from changes (the TTL is only an upper bound)
+SIGNAL_CACHE_TTL_SECONDS = 3600
+_signal_cache = make_cache('signals', maxsize=2048, ttl=SIGNAL_CACHE_TTL_SECONDS)
+
 
 def generate_signal(symbol):
     """
@@ -40,11 +68,22 @@ def generate_signal(symbol):
         # Get historical data for analysis
         series = None
         if symbol not in MOROCCO_SYMBOLS:
-            series = get_series(symbol, '1h', '5d')
+            series = get_series(symbol, '1h', '5d', fmt='columns')
         
-        signal, confidence, reasons = analyze_price_action(quote, series)
+        # Reuse the last result if neither input has changed
+        version = _data_version(quote, series)
+        cached = _signal_cache.get(symbol)
+        if cached is not None and cached['version'] == version:
+            return cached['result']
         
-        return {
+        # Indicators update incrementally from the new bars only
+        indicators = None
+        if series and isinstance(series.get('data'), dict):
+            indicators = update_indicators(symbol, '1h', series['data'])
+        
+        signal, confidence, reasons = analyze_price_action(quote, indicators=indicators)
+        
+        result = {
             'symbol': symbol,
             'signal': signal,
             'confidence': confidence,
@@ -53,6 +92,9 @@ def generate_signal(symbol):
             'change_pct': change_pct,
             'timestamp': quote.get('timestamp')
         }
+        _signal_cache.set(symbol, {'version': version, 'result': result})
+        
+        return result
     
     except Exception as e:
         return {
@@ -64,9 +106,11 @@ def generate_signal(symbol):
         }
 
 
-def analyze_price_action(quote, series):
+def analyze_price_action(quote, series=None, indicators=None):
     """
     Analyze price action to determine signal.
+    The SMA comes from the indicator snapshot when given, otherwise
+    it is computed from the series candles.
     Returns (signal, confidence, reasons).
     """
     reasons = []
@@ -116,19 +160,23 @@ def analyze_price_action(quote, series):
                 reasons.append('High volume with negative price action')
     
     # Rule 4: Historical trend analysis (if series available)
-    if series and series.get('data'):
+    sma_20 = None
+    if indicators:
+        sma_20 = indicators.get('sma_20')
+    elif series and series.get('data'):
         candles = series['data']
         if len(candles) >= 20:
             # Simple moving average comparison
             recent_prices = [c['close'] for c in candles[-20:]]
             sma_20 = sum(recent_prices) / 20
-            
-            if price > sma_20 * 1.02:
-                buy_score += 1
-                reasons.append(f'Price above 20-period SMA ({sma_20:.2f})')
-            elif price < sma_20 * 0.98:
-                sell_score += 1
-                reasons.append(f'Price below 20-period SMA ({sma_20:.2f})')
+    
+    if sma_20 is not None:
+        if price > sma_20 * 1.02:
+            buy_score += 1
+            reasons.append(f'Price above 20-period SMA ({sma_20:.2f})')
+        elif price < sma_20 * 0.98:
+            sell_score += 1
+            reasons.append(f'Price below 20-period SMA ({sma_20:.2f})')
     
     # Determine signal
     total_score = buy_score + sell_score
@@ -152,15 +200,261 @@ def get_multiple_signals(symbols):
     """
     Generate signals for multiple symbols.
     """
+    return generate_signals_batch(symbols)
+
+
+def generate_signals_batch(symbols):
+    """
+    Generate signals for many symbols in one pass.
+    Quotes are fetched in one batch, series are loaded concurrently,
+    and the rules of analyze_price_action are evaluated as NumPy
+    arrays across all symbols. Output matches generate_signal.
+    """
+    requested = list(symbols)
+    symbols = list(dict.fromkeys(s.upper() for s in requested))
     results = {}
+    
+    try:
+        quotes = _load_quotes(symbols)
+    except Exception as e:
+        return {s: _error_signal(s.upper(), e) for s in requested}
+    
+    valid = [s for s in symbols if quotes.get(s) and quotes[s].get('price')]
+    for symbol in symbols:
+        if symbol not in valid:
+            results[symbol] = {
+                'symbol': symbol,
+                'signal': 'NEUTRAL',
+                'confidence': 0,
+                'reasons': ['Unable to fetch price data'],
+                'price': None
+            }
+    
+    if not valid:
+        return {s: results[s.upper()] for s in requested}
+    
+    try:
+        series = _load_series([s for s in valid if s not in MOROCCO_SYMBOLS])
+    except Exception as e:
+        results.update({s: _error_signal(s, e) for s in valid})
+        return {s: results[s.upper()] for s in requested}
+    
+    # Serve unchanged symbols from the signal cache
+    versions = {s: _data_version(quotes[s], series.get(s)) for s in valid}
+    pending = []
+    for symbol in valid:
+        cached = _signal_cache.get(symbol)
+        if cached is not None and cached['version'] == versions[symbol]:
+            results[symbol] = cached['result']
+        else:
+            pending.append(symbol)
+    
+    if not pending:
+        return {s: results[s.upper()] for s in requested}
+    valid = pending
+    
+    try:
+        closes = _sma_from_series(series)
+        
+        price = _quote_array(quotes, valid, 'price')
+        change_pct = _quote_array(quotes, valid, 'change_pct', 0)
+        high = _quote_array(quotes, valid, 'high', price)
+        low = _quote_array(quotes, valid, 'low', price)
+        volume = _quote_array(quotes, valid, 'volume', 0)
+        sma = np.array([closes.get(s, np.nan) for s in valid])
+        
+        scored = score_signals(price, change_pct, high, low, volume, sma)
+    except Exception as e:
+        results.update({s: _error_signal(s, e) for s in valid})
+        return {s: results[s.upper()] for s in requested}
+    
+    for i, symbol in enumerate(valid):
+        quote = quotes[symbol]
+        results[symbol] = {
+            'symbol': symbol,
+            'signal': scored['signal'][i],
+            'confidence': int(scored['confidence'][i]),
+            'reasons': _batch_reasons(scored, i),
+            'price': quote['price'],
+            'change_pct': quote.get('change_pct', 0),
+            'timestamp': quote.get('timestamp')
+        }
+        _signal_cache.set(symbol, {'version': versions[symbol], 'result': results[symbol]})
+    
+    return {s: results[s.upper()] for s in requested}
+
+
+def score_signals(price, change_pct, high, low, volume, sma, params=None):
+    """
+    Vectorized version of the analyze_price_action rules.
+    All inputs are 1-D arrays (sma is NaN where unavailable).
+    `params` overrides DEFAULT_RULE_PARAMS thresholds.
+    Returns the score arrays, rule outcome codes and the final
+    signal/confidence per symbol.
+    """
+    p = dict(DEFAULT_RULE_PARAMS, **(params or {}))
+    buy = np.zeros(price.shape, dtype=np.int64)
+    sell = np.zeros(price.shape, dtype=np.int64)
+    
+    # Rule 1: Momentum (+2 strong, +1 moderate, 0 neutral)
+    momentum = np.select(
+        [change_pct > p['strong_move_pct'], change_pct > p['move_pct'],
+         change_pct < -p['strong_move_pct'], change_pct < -p['move_pct']],
+        [2, 1, -2, -1],
+        0
+    )
+    buy += np.maximum(momentum, 0)
+    sell += np.maximum(-momentum, 0)
+    
+    # Rule 2: Position in daily range
+    span = high - low
+    has_range = span > 0
+    range_position = np.divide(price - low, span, out=np.full(price.shape, 0.5), where=has_range)
+    near_high = has_range & (range_position > p['range_high'])
+    near_low = has_range & (range_position < p['range_low'])
+    buy += near_high
+    sell += near_low
+    
+    # Rule 3: High volume confirms the direction
+    high_volume = volume > p['high_volume']
+    volume_up = high_volume & (change_pct > 0)
+    volume_down = high_volume & (change_pct < 0)
+    buy += volume_up
+    sell += volume_down
+    
+    # Rule 4: Price vs 20-period SMA
+    has_sma = ~np.isnan(sma)
+    above_sma = has_sma & (price > sma * (1 + p['sma_band']))
+    below_sma = has_sma & (price < sma * (1 - p['sma_band']))
+    buy += above_sma
+    sell += below_sma
+    
+    edge = np.abs(buy - sell)
+    signal = np.where(buy > sell, 'BUY', np.where(sell > buy, 'SELL', 'NEUTRAL'))
+    confidence = np.where(edge > 0, np.minimum(50 + edge * 15, 95), 50)
+    
+    return {
+        'buy': buy,
+        'sell': sell,
+        'signal': signal.tolist(),
+        'confidence': confidence,
+        'momentum': momentum,
+        'change_pct': change_pct,
+        'near_high': near_high,
+        'near_low': near_low,
+        'volume_up': volume_up,
+        'volume_down': volume_down,
+        'above_sma': above_sma,
+        'below_sma': below_sma,
+        'sma': sma
+    }
+
+
+def _batch_reasons(scored, i):
+    """Render the reasons list for one symbol from the rule codes."""
+    reasons = []
+    change_pct = scored['change_pct'][i]
+    
+    momentum_reasons = {
+        2: f'Strong upward momentum: +{change_pct:.2f}%',
+        1: f'Positive price movement: +{change_pct:.2f}%',
+        -2: f'Strong downward momentum: {change_pct:.2f}%',
+        -1: f'Negative price movement: {change_pct:.2f}%',
+        0: 'Price consolidating in neutral range'
+    }
+    reasons.append(momentum_reasons[int(scored['momentum'][i])])
+    
+    if scored['near_high'][i]:
+        reasons.append('Price near daily high - bullish strength')
+    elif scored['near_low'][i]:
+        reasons.append('Price near daily low - bearish weakness')
+    
+    if scored['volume_up'][i]:
+        reasons.append('High volume with positive price action')
+    elif scored['volume_down'][i]:
+        reasons.append('High volume with negative price action')
+    
+    if scored['above_sma'][i]:
+        reasons.append(f"Price above 20-period SMA ({scored['sma'][i]:.2f})")
+    elif scored['below_sma'][i]:
+        reasons.append(f"Price below 20-period SMA ({scored['sma'][i]:.2f})")
+    
+    return reasons
+
+
+def _load_quotes(symbols):
+    """Fetch quotes for all symbols: one batch for yfinance, scraper for Morocco."""
+    others = [s for s in symbols if s not in MOROCCO_SYMBOLS]
+    quotes = get_multiple_quotes(others) if others else {}
     for symbol in symbols:
-        results[symbol] = generate_signal(symbol)
-    return results
+        if symbol in MOROCCO_SYMBOLS:
+            quotes[symbol] = get_morocco_quote(symbol)
+    return quotes
+
+
+def _load_series(symbols):
+    """Load 1h/5d columnar series for all symbols concurrently."""
+    if not symbols:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=MAX_SERIES_WORKERS) as executor:
+        series = executor.map(lambda s: get_series(s, '1h', '5d', fmt='columns'), symbols)
+        return dict(zip(symbols, series))
+
+
+def _sma_from_series(series):
+    """
+    Return {symbol: sma_20} computed over an (N x 20) matrix of
+    the latest closes.
+    """
+    if not series:
+        return {}
+    
+    symbols = list(series)
+    
+    # Right-align the last SMA_PERIOD closes; short histories stay NaN
+    matrix = np.full((len(symbols), SMA_PERIOD), np.nan)
+    for row, symbol in enumerate(symbols):
+        columns = series[symbol].get('data')
+        closes = columns.get('close', []) if isinstance(columns, dict) else []
+        if len(closes) >= SMA_PERIOD:
+            matrix[row] = closes[-SMA_PERIOD:]
+    
+    sma = matrix.mean(axis=1)
+    return dict(zip(symbols, sma))
+
+
+def _data_version(quote, series):
+    """
+    Identify the market data a signal is built from: the fetch
+    timestamps of the quote and of the series.
+    """
+    return [quote.get('timestamp'), series.get('timestamp') if series else None]
+
+
+def _quote_array(quotes, symbols, field, default=None):
+    """Gather one quote field into a float array (default may be an array)."""
+    values = np.empty(len(symbols), dtype=np.float64)
+    for i, symbol in enumerate(symbols):
+        value = quotes[symbol].get(field)
+        if value is None:
+            value = default[i] if isinstance(default, np.ndarray) else default
+        values[i] = value if value is not None else np.nan
+    return values
+
+
+def _error_signal(symbol, error):
+    return {
+        'symbol': symbol,
+        'signal': 'NEUTRAL',
+        'confidence': 0,
+        'reasons': [f'Error analyzing: {str(error)}'],
+        'error': str(error)
+    }
 
 
 def get_market_overview():
     """
     Get a quick overview of major market signals.
     """
-    major_symbols = ['BTC-USD', 'AAPL', 'TSLA', 'IAM', 'ATW']
-    return get_multiple_signals(major_symbols)
+    return get_multiple_signals(MAJOR_SYMBOLS)
@@ -0,0 +1,227 @@
+"""
+Bot Ticket History Store
+
+Append-only history of bot tickets, indexed per symbol by time:
+- Each symbol keeps its tickets in arrival order with a parallel list
+  of timestamps, so time-range lookups are a bisect
+- Memory is bounded to MAX_TICKETS_PER_SYMBOL (+ one eviction chunk)
+  per symbol; older tickets are dropped in chunks, or spilled to
+  SQLite when TICKET_DB_PATH is set
+- Queries page forward in (time, id) order with an opaque cursor and
+  read the spilled part from SQLite transparently
+- After a restart, the spilled symbols and the next id are restored
+  from an existing database on first use
+
+append() and query() block on SQLite when spilling is enabled; call
+them from worker threads, not from an event loop.
+"""
+
+import bisect
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+
+MAX_TICKETS_PER_SYMBOL = int(os.getenv('TICKET_MEMORY_PER_SYMBOL', 5000))
+# Evict in chunks of this many tickets (amortizes list trimming)
+EVICT_CHUNK_SIZE = 500
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Set to a file path (e.g. api/instance/tickets.db) to keep evicted tickets
+TICKET_DB_PATH = os.getenv('TICKET_DB_PATH')
+
+
+def encode_cursor(ts, ticket_id):
+    return f"{ts!r}:{ticket_id}"
+
+
+def decode_cursor(cursor):
+    """Return (ts, id); raises ValueError for a malformed cursor."""
+    try:
+        ts, ticket_id = cursor.rsplit(':', 1)
+        return float(ts), int(ticket_id)
+    except (AttributeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+
+class _SymbolHistory:
+    __slots__ = ('times', 'ids', 'tickets', 'spilled')
+
+    def __init__(self):
+        self.times = []
+        self.ids = []
+        self.tickets = []
+        # Whether older tickets of this symbol live in SQLite
+        self.spilled = False
+
+
+class TicketStore:
+    """Per-symbol, time-indexed ticket history with optional SQLite spill."""
+
+    def __init__(self, max_per_symbol=MAX_TICKETS_PER_SYMBOL, db_path=TICKET_DB_PATH):
+        self.max_per_symbol = max_per_symbol
+        self.db_path = db_path
+        self._symbols = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._conn = None
+        self._restored = False
+
+    def append(self, ticket, ts=None):
+        """Record a ticket; returns the stored copy with its id and ts."""
+        symbol = (ticket.get('symbol') or '').upper()
+        ts = time.time() if ts is None else ts
+
+        with self._lock:
+            self._restore()
+            history = self._symbols.get(symbol)
+            if history is None:
+                history = self._symbols[symbol] = _SymbolHistory()
+
+            # Keep the per-symbol index sorted even if a clock steps back
+            if history.times and ts < history.times[-1]:
+                ts = history.times[-1]
+
+            stored = dict(ticket, id=self._next_id, ts=ts)
+            self._next_id += 1
+            history.times.append(ts)
+            history.ids.append(stored['id'])
+            history.tickets.append(stored)
+
+            if len(history.tickets) > self.max_per_symbol + EVICT_CHUNK_SIZE:
+                self._evict(symbol, history, len(history.tickets) - self.max_per_symbol)
+        return stored
+
+    def symbols(self):
+        with self._lock:
+            self._restore()
+            return sorted(self._symbols)
+
+    def query(self, symbol=None, since=None, until=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """
+        Tickets in ascending (ts, id) order, optionally for one symbol and
+        with since <= ts < until. Returns (tickets, next_cursor or None).
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else None
+
+        with self._lock:
+            self._restore()
+            if symbol is not None:
+                symbols = [symbol.upper()] if symbol.upper() in self._symbols else []
+            else:
+                symbols = list(self._symbols)
+            streams = [
+                self._iter_symbol(s, self._symbols[s], since, until, after, limit + 1)
+                for s in symbols
+            ]
+            merged = heapq.merge(*streams, key=lambda t: (t['ts'], t['id']))
+            tickets = [t for _, t in zip(range(limit + 1), merged)]
+
+        next_cursor = None
+        if len(tickets) > limit:
+            tickets = tickets[:limit]
+            next_cursor = encode_cursor(tickets[-1]['ts'], tickets[-1]['id'])
+        return tickets, next_cursor
+
+    def _iter_symbol(self, symbol, history, since, until, after, limit):
+        """One symbol's matching tickets in (ts, id) order: spilled, then memory."""
+        if history.spilled:
+            oldest = (history.times[0], history.ids[0]) if history.times else None
+            yield from self._load_spilled(symbol, since, until, after, oldest, limit)
+
+        if after is not None:
+            # First in-memory entry strictly after the cursor
+            start = bisect.bisect_right(history.times, after[0])
+            lo = bisect.bisect_left(history.times, after[0])
+            for i in range(lo, start):
+                if history.ids[i] > after[1]:
+                    start = i
+                    break
+        else:
+            start = 0
+        if since is not None:
+            start = max(start, bisect.bisect_left(history.times, since))
+        end = len(history.times) if until is None else bisect.bisect_left(history.times, until)
+
+        for i in range(start, min(end, start + limit)):
+            yield history.tickets[i]
+
+    # --- SQLite spill ---
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS tickets ('
+                ' symbol TEXT NOT NULL,'
+                ' ts REAL NOT NULL,'
+                ' id INTEGER NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' PRIMARY KEY (symbol, ts, id)) WITHOUT ROWID'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _restore(self):
+        """Pick up tickets spilled by a previous process (once, under the lock)."""
+        if self._restored:
+            return
+        self._restored = True
+        if not self.db_path or not os.path.exists(self.db_path):
+            return
+
+        conn = self._connect()
+        for (symbol,) in conn.execute('SELECT DISTINCT symbol FROM tickets'):
+            history = self._symbols.setdefault(symbol, _SymbolHistory())
+            history.spilled = True
+        (max_id,) = conn.execute('SELECT MAX(id) FROM tickets').fetchone()
+        if max_id is not None:
+            self._next_id = max(self._next_id, max_id + 1)
+
+    def _evict(self, symbol, history, count):
+        if self.db_path:
+            conn = self._connect()
+            conn.executemany(
+                'INSERT OR REPLACE INTO tickets (symbol, ts, id, data) VALUES (?, ?, ?, ?)',
+                [(symbol, t['ts'], t['id'], json.dumps(t)) for t in history.tickets[:count]]
+            )
+            conn.commit()
+            history.spilled = True
+
+        del history.times[:count]
+        del history.ids[:count]
+        del history.tickets[:count]
+
+    def _load_spilled(self, symbol, since, until, after, oldest, limit):
+        sql = 'SELECT data FROM tickets WHERE symbol = ?'
+        params = [symbol]
+        if since is not None:
+            sql += ' AND ts >= ?'
+            params.append(since)
+        if until is not None:
+            sql += ' AND ts < ?'
+            params.append(until)
+        if oldest is not None:
+            # Only what is no longer in memory
+            sql += ' AND (ts < ? OR (ts = ? AND id < ?))'
+            params.extend([oldest[0], oldest[0], oldest[1]])
+        if after is not None:
+            sql += ' AND (ts > ? OR (ts = ? AND id > ?))'
+            params.extend([after[0], after[0], after[1]])
+        sql += ' ORDER BY ts, id LIMIT ?'
+        params.append(limit)
+
+        rows = self._connect().execute(sql, params).fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+
+store = TicketStore()
@@ -0,0 +1,108 @@
+"""
+Trade History
+
+Keyset-paginated trade listing, newest first. Pages are addressed by
+an opaque cursor holding the last row's (executed_at, id), so each page
+is an index range scan on (challenge_id, executed_at, id) no matter how
+deep into the history it is. Only the requested columns are selected.
+"""
+
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_
+
+from api.models import db, Trade
+
+TRADE_FIELDS = ('id', 'symbol', 'side', 'qty', 'price', 'pnl', 'executed_at')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(executed_at, trade_id):
+    raw = f"{executed_at.isoformat()}|{trade_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (executed_at, id); raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        executed_at, trade_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(executed_at), int(trade_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def parse_fields(fields):
+    """Validate a comma-separated field list (None means all fields)."""
+    if not fields:
+        return list(TRADE_FIELDS)
+    selected = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in selected if f not in TRADE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def list_trades(challenge_id, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None,
+                symbol=None, start=None, end=None):
+    """
+    One page of a challenge's trades, newest first.
+    `start` / `end` bound executed_at (inclusive / exclusive).
+    Returns (trades as dicts, next_cursor or None).
+    """
+    fields = fields or list(TRADE_FIELDS)
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    # executed_at and id are always read: they make the next cursor
+    columns = [Trade.executed_at, Trade.id] + [
+        getattr(Trade, f) for f in fields if f not in ('executed_at', 'id')
+    ]
+    query = _filter(db.session.query(*columns), challenge_id, symbol, start, end)
+    if cursor:
+        last_executed_at, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Trade.executed_at < last_executed_at,
+            and_(Trade.executed_at == last_executed_at, Trade.id < last_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(
+        Trade.executed_at.desc(), Trade.id.desc()
+    ).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    trades = []
+    for row in rows:
+        values = row._mapping
+        trade = {}
+        for f in fields:
+            value = values[f]
+            trade[f] = value.isoformat() if f == 'executed_at' else value
+        trades.append(trade)
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.executed_at, last.id)
+    return trades, next_cursor
+
+
+def count_trades(challenge_id, symbol=None, start=None, end=None):
+    """Number of a challenge's trades matching the same filters as list_trades."""
+    query = db.session.query(func.count(Trade.id))
+    return _filter(query, challenge_id, symbol, start, end).scalar()
+
+
+def _filter(query, challenge_id, symbol, start, end):
+    query = query.filter(Trade.challenge_id == challenge_id)
+    if symbol:
+        query = query.filter(Trade.symbol == symbol.upper())
+    if start:
+        query = query.filter(Trade.executed_at >= start)
+    if end:
+        query = query.filter(Trade.executed_at < end)
+    return query
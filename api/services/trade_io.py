@@ -0,0 +1,257 @@
+"""
+Trade Import / Export
+
+Streams trade histories in and out as CSV (or Parquet when pyarrow is
+installed) without building the whole history in memory:
+- Import parses rows lazily, replays them through the position ledger
+  in memory and inserts trades in chunked bulk INSERTs. Positions,
+  equity and the challenge rules are written once at the end, in the
+  same transaction as the trades.
+- Export walks the history page by page with the keyset cursor and
+  yields encoded chunks.
+
+Imported rows are fills (symbol, side, qty, price, executed_at) in
+chronological order; their PnL comes from the ledger.
+"""
+
+import csv
+import io
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from api.models import db, Trade, Position
+from api.services import leaderboard
+from api.services.orders import challenge_lock
+from api.services.positions import fill_position, challenge_unrealized_pnl, refresh_marks
+from api.services.rules import evaluate_challenge_rules
+from api.services.trade_history import list_trades, TRADE_FIELDS, MAX_PAGE_SIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_FIELDS = ('symbol', 'side', 'qty', 'price', 'executed_at')
+
+
+class TradeImportError(ValueError):
+    """A row could not be imported; carries the 1-based row number."""
+
+    def __init__(self, row_number, message):
+        super().__init__(f'Row {row_number}: {message}')
+        self.row_number = row_number
+
+
+def iter_csv_rows(stream):
+    """Yield dict rows from a binary CSV stream with a header line."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    yield from csv.DictReader(text)
+
+
+def iter_parquet_rows(file):
+    """Yield dict rows from a seekable Parquet file, one batch at a time."""
+    if not HAS_PYARROW:
+        raise ValueError('Parquet support requires pyarrow')
+    parquet_file = pq.ParquetFile(file)
+    columns = [c for c in IMPORT_FIELDS if c in parquet_file.schema_arrow.names]
+    for batch in parquet_file.iter_batches(batch_size=IMPORT_CHUNK_SIZE, columns=columns):
+        yield from batch.to_pylist()
+
+
+def _parse_row(row_number, row):
+    symbol = (row.get('symbol') or '').strip().upper()
+    side = (row.get('side') or '').strip().lower()
+    if not symbol:
+        raise TradeImportError(row_number, 'symbol is required')
+    if side not in ('buy', 'sell'):
+        raise TradeImportError(row_number, 'side must be buy or sell')
+
+    try:
+        qty = float(row.get('qty'))
+        price = float(row.get('price'))
+    except (TypeError, ValueError):
+        raise TradeImportError(row_number, 'qty and price must be numbers')
+    if qty <= 0 or price <= 0:
+        raise TradeImportError(row_number, 'qty and price must be positive')
+
+    executed_at = row.get('executed_at')
+    if not executed_at:
+        executed_at = datetime.utcnow()
+    elif not isinstance(executed_at, datetime):
+        try:
+            executed_at = datetime.fromisoformat(str(executed_at))
+        except ValueError:
+            raise TradeImportError(row_number, f'invalid executed_at: {executed_at}')
+
+    return symbol, side, qty, price, executed_at
+
+
+def import_trades(challenge_id, rows):
+    """
+    Import fills for an active challenge from an iterable of dict rows
+    and commit. Runs under the challenge lock, like order fills, so live
+    orders and imports cannot overwrite each other's positions.
+    Raises TradeImportError on a bad row, or ValueError if the challenge
+    is not active; nothing is written in either case. Returns a summary with the row count,
+    realized PnL, rule result and the updated challenge.
+    """
+    with challenge_lock(challenge_id) as challenge:
+        if challenge is None or challenge.status != 'active':
+            db.session.rollback()
+            status = challenge.status if challenge else 'missing'
+            raise ValueError(f'Challenge is {status}. Cannot import trades.')
+        result = _import_locked(challenge, rows)
+
+    leaderboard.update_challenge(challenge)
+    return dict(result, challenge=challenge.to_dict())
+
+
+def _import_locked(challenge, rows):
+    # Current positions: symbol -> [qty, avg_price, realized_pnl]
+    ledger = {
+        p.symbol: [p.qty or 0, p.avg_price or 0, p.realized_pnl or 0]
+        for p in Position.query.filter_by(challenge_id=challenge.id)
+    }
+    existing = set(ledger)
+
+    imported = 0
+    realized_total = 0.0
+    chunk = []
+
+    try:
+        for row_number, row in enumerate(rows, start=1):
+            symbol, side, qty, price, executed_at = _parse_row(row_number, row)
+
+            entry = ledger.setdefault(symbol, [0, 0, 0])
+            entry[0], entry[1], realized = fill_position(entry[0], entry[1], side, qty, price)
+            entry[2] += realized
+            realized_total += realized
+
+            chunk.append({
+                'challenge_id': challenge.id,
+                'symbol': symbol,
+                'side': side,
+                'qty': qty,
+                'price': price,
+                'pnl': round(realized, 2),
+                'executed_at': executed_at
+            })
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                db.session.execute(insert(Trade), chunk)
+                imported += len(chunk)
+                chunk = []
+
+        if chunk:
+            db.session.execute(insert(Trade), chunk)
+            imported += len(chunk)
+
+        _write_positions(challenge.id, ledger, existing)
+        challenge.equity = round(challenge.equity + realized_total, 2)
+
+        # Rules and daily metrics once, on the final marked equity
+        refresh_marks([challenge.id])
+        unrealized = challenge_unrealized_pnl(challenge.id)
+        rule_result = evaluate_challenge_rules(challenge, commit=False, unrealized=unrealized)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'imported': imported,
+        'realized_pnl': round(realized_total, 2),
+        'rule_result': rule_result
+    }
+
+
+def _write_positions(challenge_id, ledger, existing):
+    """Upsert the replayed positions: UPDATE known symbols, INSERT new ones."""
+    inserts = []
+    for symbol, (qty, avg_price, realized) in ledger.items():
+        values = {'qty': qty, 'avg_price': avg_price, 'realized_pnl': realized}
+        if symbol in existing:
+            Position.query.filter_by(
+                challenge_id=challenge_id, symbol=symbol
+            ).update(dict(values, updated_at=datetime.utcnow()), synchronize_session=False)
+        else:
+            inserts.append(dict(values, challenge_id=challenge_id, symbol=symbol))
+
+    if inserts:
+        db.session.execute(insert(Position), inserts)
+
+
+def iter_trade_pages(challenge_id, page_size=MAX_PAGE_SIZE, **filters):
+    """Yield pages of trade dicts (newest first) using the keyset cursor."""
+    cursor = None
+    while True:
+        trades, cursor = list_trades(challenge_id, limit=page_size, cursor=cursor, **filters)
+        if trades:
+            yield trades
+        if not cursor:
+            return
+
+
+def export_csv(challenge_id, fields=None, **filters):
+    """Yield the trade history as CSV text chunks, one per page."""
+    fields = fields or list(TRADE_FIELDS)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, lineterminator='\n')
+
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for trades in iter_trade_pages(challenge_id, fields=fields, **filters):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(trades)
+        yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def export_parquet(challenge_id, fields=None, **filters):
+    """Yield the trade history as Parquet bytes, one row group per page."""
+    if not HAS_PYARROW:
+        raise ValueError('Parquet support requires pyarrow')
+
+    fields = fields or list(TRADE_FIELDS)
+    sink = _ChunkSink()
+    writer = None
+    for trades in iter_trade_pages(challenge_id, fields=fields, **filters):
+        table = pa.Table.from_pylist(trades)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+
+    if writer is None:
+        # Empty history: still a valid file
+        writer = pq.ParquetWriter(sink, pa.schema([(f, pa.string()) for f in fields]))
+    writer.close()
+    yield sink.drain()
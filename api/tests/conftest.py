@@ -0,0 +1,27 @@
+import pytest
+from flask import Flask
+
+from api.models import db
+from api.services import leaderboard, market, risk_engine
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Flask app on a SQLite file (shared by worker threads), with an app context."""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'test.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+    # Ids are reused by the next test's database
+    risk_engine.clear_states()
+    leaderboard.clear_boards()
+    market.clear_cache()
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from api import bot_api
+from api.bot_api import BotConfig, BotScheduler
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    calls = []
+    stored = []
+
+    def fetch_bar(symbol, indicator_key):
+        if symbol == 'HUNG':
+            time.sleep(0.5)
+        if symbol == 'BROKEN':
+            raise ConnectionError('feed down')
+        return 100.0, {'rsi_14': None, 'sma_20': None}
+
+    def score_symbols(symbols, indicator_key, model=None):
+        calls.append(list(symbols))
+        return [0.7] * len(symbols)
+
+    monkeypatch.setattr(bot_api, 'fetch_bar', fetch_bar)
+    monkeypatch.setattr(bot_api, 'score_symbols', score_symbols)
+    monkeypatch.setattr(bot_api, 'store_tickets', stored.extend)
+    monkeypatch.setattr(bot_api, 'LATEST_TICKETS', {})
+
+    configs = [BotConfig(symbol, interval=10, jitter=0.1, fetch_timeout=0.05) for symbol in ('AAA', 'BBB', 'HUNG', 'BROKEN')]
+    scheduler = BotScheduler(configs, workers=4)
+    scheduler.calls, scheduler.stored = calls, stored
+    yield scheduler
+    scheduler.executor.shutdown(wait=False)
+
+
+def run_tick(scheduler):
+    async def tick():
+        loop = asyncio.get_running_loop()
+        failures = {config.symbol: 0 for config in scheduler.configs}
+        next_due = {config.symbol: 0.0 for config in scheduler.configs}
+        started = loop.time()
+        await scheduler._tick(loop, scheduler.configs, failures, next_due)
+        return failures, {symbol: due - started for symbol, due in next_due.items()}, loop.time() - started
+    return asyncio.run(tick())
+
+
+def test_tick_scores_all_fetched_bots_in_one_call(scheduler):
+    failures, _, _ = run_tick(scheduler)
+
+    assert scheduler.calls == [['AAA', 'BBB']]
+    assert [t['symbol'] for t in scheduler.stored] == ['AAA', 'BBB']
+    assert set(bot_api.LATEST_TICKETS) == {'AAA', 'BBB'}
+    assert failures == {'AAA': 0, 'BBB': 0, 'HUNG': 1, 'BROKEN': 1}
+
+
+def test_hung_fetch_times_out_and_backs_off(scheduler):
+    failures, delays, elapsed = run_tick(scheduler)
+
+    # The tick did not wait for the hung fetch
+    assert elapsed < 0.4
+    assert 'timed out' in bot_api.BOT_STATUS['bots']['HUNG']['last_error']
+    # First failure: 2x the interval, +/- 10% jitter, from when it failed
+    for symbol in ('HUNG', 'BROKEN'):
+        assert 18 <= delays[symbol] <= 22 + elapsed
+    assert delays['AAA'] <= 0
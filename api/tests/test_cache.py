@@ -0,0 +1,31 @@
+from api.services.cache import TTLCache
+
+
+def test_expired_entry_is_missed_but_kept_for_stale_serving():
+    cache = TTLCache(ttl=30)
+    cache.set('BTC-USD', {'price': 1}, ttl=-1)
+
+    assert cache.get('BTC-USD') is None
+    value, expires_at, stored_at = cache.get_entry('BTC-USD')
+    assert value == {'price': 1}
+    assert expires_at < stored_at
+
+
+def test_fresh_entry():
+    cache = TTLCache(ttl=30)
+    cache.set('BTC-USD', {'price': 1})
+
+    assert cache.get('BTC-USD') == {'price': 1}
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
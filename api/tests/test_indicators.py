@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+import pytest
+
+from api.services.indicators import (
+    FEATURE_FIELDS, IndicatorState, clear_indicators, feature_matrix, get_indicators, update_indicators
+)
+
+T0 = 1_767_600_000  # 2026-01-05 08:00 UTC
+
+
+def random_bars(count, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    return [
+        (T0 + 60 * i, c, c * 1.002, c * 0.998, c, int(v))
+        for i, (c, v) in enumerate(zip(close, rng.integers(1, 1000, count)))
+    ]
+
+
+def feed(state, bars):
+    snapshot = None
+    for bar in bars:
+        snapshot = state.update(*bar)
+    return snapshot
+
+
+def assert_same(a, b):
+    assert a.keys() == b.keys()
+    for key in a:
+        if a[key] is None or b[key] is None:
+            assert a[key] == b[key], key
+        else:
+            assert a[key] == pytest.approx(b[key], rel=1e-9), key
+
+
+@pytest.fixture(autouse=True)
+def fresh_states():
+    clear_indicators()
+    yield
+    clear_indicators()
+
+
+def test_values_match_a_full_recompute():
+    bars = random_bars(60)
+    snapshot = feed(IndicatorState(), bars)
+    closes = np.array([b[4] for b in bars])
+
+    assert snapshot['bars'] == 60
+    assert snapshot['sma_20'] == pytest.approx(closes[-20:].mean())
+    assert snapshot['bb_middle'] == pytest.approx(closes[-20:].mean())
+    assert snapshot['bb_upper'] == pytest.approx(closes[-20:].mean() + 2 * closes[-20:].std())
+    assert 0 <= snapshot['rsi_14'] <= 100
+
+
+@pytest.mark.parametrize('count', [5, 20, 21, 60])
+def test_revised_bar_equals_the_final_bar(count):
+    bars = random_bars(count)
+    last = bars[-1]
+
+    revised = IndicatorState()
+    feed(revised, bars[:-1])
+    # The forming candle is revised several times before it closes
+    for factor in (1.03, 0.97):
+        close = last[4] * factor
+        revised.update(last[0], last[1], close * 1.001, close * 0.999, close, last[5] // 2)
+    snapshot = revised.update(*last)
+
+    assert_same(snapshot, feed(IndicatorState(), bars))
+
+
+def test_out_of_order_bar_is_ignored():
+    state = IndicatorState()
+    bars = random_bars(10)
+    before = feed(state, bars)
+
+    assert state.update(T0, 1, 1, 1, 1, 1) == before
+
+
+def test_overlapping_series_are_applied_once():
+    bars = random_bars(30)
+    columns = {
+        field: [b[i] for b in bars]
+        for i, field in enumerate(('time', 'open', 'high', 'low', 'close', 'volume'))
+    }
+
+    update_indicators('aapl', '1m', {k: v[:20] for k, v in columns.items()})
+    snapshot = update_indicators('AAPL', '1m', columns)
+
+    assert snapshot['bars'] == 30
+    assert_same(get_indicators('AAPL', '1m'), feed(IndicatorState(), bars))
+
+
+def test_feature_matrix_rows_follow_symbol_order():
+    for seed, symbol in enumerate(('AAA', 'BBB')):
+        bars = random_bars(25, seed)
+        update_indicators(symbol, '1m', {
+            field: [b[i] for b in bars]
+            for i, field in enumerate(('time', 'open', 'high', 'low', 'close', 'volume'))
+        })
+
+    matrix = feature_matrix(['BBB', 'missing', 'AAA'], '1m')
+
+    assert matrix.shape == (3, len(FEATURE_FIELDS))
+    assert matrix[0, 0] == get_indicators('BBB', '1m')['close']
+    assert all(math.isnan(v) for v in matrix[1])
+    assert feature_matrix(['AAA'], '1m', fields=['sma_20'])[0, 0] == pytest.approx(get_indicators('AAA', '1m')['sma_20'])
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.models import db, Challenge, User
+from api.services import leaderboard
+
+
+def add_user(name):
+    user = User(name=name, email=f'{name}@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def add_challenge(user, equity, created_at=None):
+    challenge = Challenge(
+        user_id=user.id, plan_id=1, start_balance=5000, equity=equity,
+        status='active', created_at=created_at or datetime.utcnow()
+    )
+    db.session.add(challenge)
+    db.session.commit()
+    return challenge
+
+
+@pytest.fixture
+def users(app):
+    return add_user('ana'), add_user('ben'), add_user('cyd')
+
+
+def test_top_ranks_by_profit(users):
+    ana, ben, cyd = users
+    add_challenge(ana, 5100)
+    add_challenge(ben, 5400)
+    add_challenge(cyd, 4900)
+
+    top = leaderboard.top('monthly', 2)
+
+    assert [(e['rank'], e['name'], e['profit_pct']) for e in top] == [(1, 'ben', 8.0), (2, 'ana', 2.0)]
+
+
+def test_update_moves_a_challenge(users):
+    ana, ben, _ = users
+    slow = add_challenge(ana, 5100)
+    add_challenge(ben, 5400)
+    leaderboard.top('monthly')
+
+    slow.equity = 5500
+    db.session.commit()
+    leaderboard.update_challenge(slow)
+
+    assert leaderboard.top('monthly', 1)[0]['name'] == 'ana'
+    entry, total = leaderboard.rank_of_user(ben.id, 'monthly')
+    assert (entry['rank'], total) == (2, 2)
+
+
+def test_rank_of_user_is_their_best_challenge(users):
+    ana, ben, cyd = users
+    add_challenge(ana, 5300)
+    add_challenge(ben, 5000)
+    add_challenge(ben, 5200)
+
+    entry, total = leaderboard.rank_of_user(ben.id)
+
+    assert entry['rank'] == 2
+    assert entry['profit_pct'] == 4.0
+    assert total == 3
+    assert leaderboard.rank_of_user(cyd.id) == (None, 3)
+
+
+def test_periods_only_include_challenges_created_in_them(users):
+    ana, ben, _ = users
+    add_challenge(ana, 5100)
+    add_challenge(ben, 5400, created_at=datetime.utcnow() - timedelta(days=400))
+
+    assert [e['name'] for e in leaderboard.top('daily')] == ['ana']
+    assert [e['name'] for e in leaderboard.top('all-time')] == ['ben', 'ana']
+
+
+def test_set_statuses_updates_loaded_boards(users):
+    ana, _, _ = users
+    challenge = add_challenge(ana, 4400)
+    leaderboard.top('monthly')
+
+    leaderboard.set_statuses([challenge.id], 'failed')
+
+    assert leaderboard.top('monthly')[0]['status'] == 'failed'
+
+
+def test_period_start():
+    now = datetime(2026, 1, 15, 13, 45)  # a Thursday
+
+    assert leaderboard.period_start('daily', now) == datetime(2026, 1, 15)
+    assert leaderboard.period_start('weekly', now) == datetime(2026, 1, 12)
+    assert leaderboard.period_start('monthly', now) == datetime(2026, 1, 1)
+    assert leaderboard.period_start('all-time', now) is None
+    with pytest.raises(ValueError):
+        leaderboard.period_start('yearly', now)
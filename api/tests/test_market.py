@@ -0,0 +1,26 @@
+from api.services import market
+
+
+def test_get_quote_serves_stale_and_refreshes_in_background(monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(market._inflight, 'do_async', lambda key, fn: refreshes.append(key))
+    monkeypatch.setattr(market, '_fetch_quote', lambda symbol: {'symbol': symbol, 'price': 2})
+    market.clear_cache()
+    market._quote_cache.set('TEST-STALE', {'symbol': 'TEST-STALE', 'price': 1}, ttl=-1)
+
+    quote = market.get_quote('TEST-STALE')
+
+    assert quote['price'] == 1
+    assert quote['stale'] is True
+    assert quote['age'] >= 0
+    assert refreshes == ['quote:TEST-STALE']
+    market.clear_cache()
+
+
+def test_get_quote_fetches_past_the_stale_window(monkeypatch):
+    monkeypatch.setattr(market, '_fetch_quote', lambda symbol: {'symbol': symbol, 'price': 2})
+    market.clear_cache()
+    market._quote_cache.set('TEST-OLD', {'symbol': 'TEST-OLD', 'price': 1}, ttl=-market.STALE_MAX_AGE_SECONDS - 1)
+
+    assert market.get_quote('TEST-OLD') == {'symbol': 'TEST-OLD', 'price': 2}
+    market.clear_cache()
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+from api.models import db, Challenge, Order, Trade
+from api.services import market, orders, positions
+from api.services.orders import challenge_lock, submit_order, wait_for_order
+
+
+@pytest.fixture
+def challenge(app, monkeypatch):
+    # No network: prices and marks come from the quote cache only
+    monkeypatch.setattr(positions, 'get_multiple_quotes', lambda symbols: {})
+    market._quote_cache.set('AAPL', {'symbol': 'AAPL', 'price': 100})
+    challenge = Challenge(user_id=1, plan_id=1, start_balance=5000, equity=5000, status='active')
+    db.session.add(challenge)
+    db.session.commit()
+    return challenge
+
+
+@pytest.fixture
+def queued(app):
+    app.config['ORDER_EXECUTION'] = 'queue'
+    yield app
+    orders._queues.clear()
+    orders._done.clear()
+
+
+def test_sync_order_fills_in_the_request(app, challenge):
+    order_id = submit_order(app, challenge.id, 1, 'aapl', 'buy', 2)
+
+    order = orders.get_order(order_id)
+    assert order.status == 'filled'
+    assert order.result['trade']['price'] == 100
+    assert order.result['position']['qty'] == 2
+    assert Trade.query.count() == 1
+
+
+def test_order_on_inactive_challenge_is_rejected(app, challenge):
+    challenge.status = 'failed'
+    db.session.commit()
+
+    order = orders.get_order(submit_order(app, challenge.id, 1, 'AAPL', 'buy', 1))
+
+    assert order.status == 'rejected'
+    assert order.error == 'Challenge is failed. Cannot trade.'
+    assert Trade.query.count() == 0
+
+
+def test_order_without_price_is_rejected(app, challenge, monkeypatch):
+    monkeypatch.setattr(orders, '_get_price', lambda symbol: 0)
+
+    order = orders.get_order(submit_order(app, challenge.id, 1, 'AAPL', 'buy', 1))
+
+    assert order.status == 'rejected'
+
+
+def test_queued_orders_fill_in_submission_order(queued, challenge):
+    challenge_id = challenge.id
+    ids = [submit_order(queued, challenge_id, 1, 'AAPL', side, 1) for side in ('buy', 'buy', 'sell')]
+
+    # Read each order before the next wait releases the session
+    results = [(o.status, o.result['position']['qty']) for o in map(lambda i: wait_for_order(i, 5), ids)]
+
+    assert results == [('filled', 1), ('filled', 2), ('filled', 1)]
+    assert [t.side for t in Trade.query.order_by(Trade.id)] == ['buy', 'buy', 'sell']
+
+
+def test_drain_survives_an_order_it_cannot_record(queued, challenge, monkeypatch):
+    challenge_id = challenge.id
+    execute = orders._execute
+
+    def flaky(order_id, challenge_id, symbol):
+        if order_id == first:
+            raise RuntimeError('database unavailable')
+        execute(order_id, challenge_id, symbol)
+    monkeypatch.setattr(orders, '_execute', flaky)
+
+    first = None
+    first = submit_order(queued, challenge_id, 1, 'AAPL', 'buy', 1)
+    second = submit_order(queued, challenge_id, 1, 'AAPL', 'buy', 1)
+
+    assert wait_for_order(second, 5).status == 'filled'
+    assert orders.get_order(first).status == 'queued'
+    # A later order still finds a worker
+    assert wait_for_order(submit_order(queued, challenge_id, 1, 'AAPL', 'buy', 1), 5).status == 'filled'
+
+
+def test_full_queue_refuses_orders(queued, challenge, monkeypatch):
+    monkeypatch.setattr(orders, 'MAX_PENDING_PER_CHALLENGE', 0)
+    # A drain in progress for the challenge
+    orders._queues[challenge.id] = orders.deque()
+
+    with pytest.raises(orders.OrderQueueFull):
+        submit_order(queued, challenge.id, 1, 'AAPL', 'buy', 1)
+
+
+def test_challenge_lock_serializes_writers(app, challenge):
+    def add_one():
+        with app.app_context():
+            for _ in range(10):
+                with challenge_lock(challenge.id) as locked:
+                    locked.equity += 1
+                    db.session.commit()
+
+    threads = [threading.Thread(target=add_one) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    assert db.session.get(Challenge, challenge.id).equity == 5030
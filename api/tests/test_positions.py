@@ -0,0 +1,124 @@
+import pytest
+
+from api.models import db, Challenge, Position
+from api.services import market, positions
+from api.services.positions import (
+    MARK_MAX_AGE_SECONDS, fill_position, challenge_unrealized_pnl, refresh_marks, unrealized_by_challenge
+)
+from api.services.rule_sweep import sweep_active_challenges
+from api.services.rules import evaluate_challenge_rules
+
+
+def test_open_and_add_average_the_price():
+    qty, avg, realized = fill_position(0, 0, 'buy', 2, 100)
+    assert (qty, avg, realized) == (2, 100, 0)
+
+    qty, avg, realized = fill_position(qty, avg, 'buy', 2, 110)
+    assert qty == 4
+    assert avg == pytest.approx(105)
+    assert realized == 0
+
+
+def test_open_short():
+    assert fill_position(0, 0, 'sell', 3, 50) == (-3, 50, 0)
+
+
+def test_partial_close_keeps_the_average_price():
+    qty, avg, realized = fill_position(4, 105, 'sell', 1, 115)
+    assert (qty, avg) == (3, 105)
+    assert realized == pytest.approx(10)
+
+
+def test_partial_close_of_a_short():
+    qty, avg, realized = fill_position(-3, 50, 'buy', 2, 45)
+    assert (qty, avg) == (-1, 50)
+    assert realized == pytest.approx(10)
+
+
+def test_full_close_goes_flat():
+    qty, avg, realized = fill_position(3, 105, 'sell', 3, 100)
+    assert (qty, avg) == (0, 0)
+    assert realized == pytest.approx(-15)
+
+
+def test_flip_long_to_short_opens_remainder_at_fill_price():
+    qty, avg, realized = fill_position(2, 100, 'sell', 5, 90)
+    assert (qty, avg) == (-3, 90)
+    # Only the two closed units realize PnL
+    assert realized == pytest.approx(-20)
+
+
+def test_flip_short_to_long():
+    qty, avg, realized = fill_position(-2, 100, 'buy', 3, 90)
+    assert (qty, avg) == (1, 90)
+    assert realized == pytest.approx(20)
+
+
+def add_long(challenge_id, symbol, qty, avg_price):
+    db.session.add(Position(challenge_id=challenge_id, symbol=symbol, qty=qty, avg_price=avg_price, realized_pnl=0))
+    db.session.commit()
+
+
+def age_quote(symbol, seconds):
+    """Make the cached quote of `symbol` look `seconds` older."""
+    value, expires_at, stored_at = market._quote_cache.get_entry(symbol)
+    market._quote_cache._data[symbol] = (value, expires_at - seconds, stored_at - seconds)
+
+
+@pytest.fixture
+def marked_challenge(app):
+    """Long 1 BTC-USD at 100, marked at 500: day starts at 5400."""
+    challenge = Challenge(user_id=1, plan_id=1, start_balance=5000, equity=5000, status='active')
+    db.session.add(challenge)
+    db.session.commit()
+    add_long(challenge.id, 'BTC-USD', 1, 100)
+    market._quote_cache.set('BTC-USD', {'symbol': 'BTC-USD', 'price': 500})
+
+    result = evaluate_challenge_rules(challenge, unrealized=challenge_unrealized_pnl(challenge.id))
+    assert result['status'] == 'active'
+    return challenge
+
+
+def test_stale_mark_is_refreshed_before_rules(marked_challenge, monkeypatch):
+    age_quote('BTC-USD', MARK_MAX_AGE_SECONDS + 100)
+
+    def fetch(symbols):
+        market._quote_cache.set('BTC-USD', {'symbol': 'BTC-USD', 'price': 490})
+    monkeypatch.setattr(positions, 'get_multiple_quotes', fetch)
+
+    assert refresh_marks([marked_challenge.id]) == ['BTC-USD']
+    assert challenge_unrealized_pnl(marked_challenge.id) == pytest.approx(390)
+
+
+def test_failed_refresh_keeps_the_last_known_mark(marked_challenge, monkeypatch):
+    age_quote('BTC-USD', MARK_MAX_AGE_SECONDS + 100)
+
+    def fail(symbols):
+        raise ConnectionError('offline')
+    monkeypatch.setattr(positions, 'get_multiple_quotes', fail)
+
+    refresh_marks([marked_challenge.id])
+    unrealized = challenge_unrealized_pnl(marked_challenge.id)
+    assert unrealized == pytest.approx(400)
+
+    # Same price as at the day start: no daily loss
+    result = evaluate_challenge_rules(marked_challenge, unrealized=unrealized)
+    assert result['status'] == 'active'
+
+
+def test_fresh_marks_are_not_refetched(marked_challenge, monkeypatch):
+    monkeypatch.setattr(positions, 'get_multiple_quotes', lambda symbols: pytest.fail('fetched'))
+
+    assert refresh_marks([marked_challenge.id]) == []
+
+
+def test_rules_are_skipped_without_a_mark(marked_challenge):
+    market.clear_cache()
+
+    assert challenge_unrealized_pnl(marked_challenge.id) is None
+    assert unrealized_by_challenge() == {marked_challenge.id: None}
+
+    result = evaluate_challenge_rules(marked_challenge, unrealized=None)
+    assert result['status'] == 'active'
+    assert result['rules_checked'] == ['Open positions without a price, skipping rules']
+    assert sweep_active_challenges(unrealized=unrealized_by_challenge())['checked'] == 0
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from api.services.resample import resample_columns
+
+DAY = 86400
+
+
+def minute_bars(start, count):
+    times = list(range(start, start + 60 * count, 60))
+    close = [float(i) for i in range(count)]
+    return {
+        'time': times, 'open': close, 'high': [c + 0.5 for c in close],
+        'low': [c - 0.5 for c in close], 'close': close, 'volume': [1] * count
+    }
+
+
+def concat(*series):
+    return {field: sum((s[field] for s in series), []) for field in series[0]}
+
+
+def ts(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def test_aggregates_ohlcv():
+    bars = minute_bars(ts(2026, 1, 5, 0, 0), 10)
+
+    result = resample_columns(bars, '5m')
+
+    assert result['time'] == [ts(2026, 1, 5, 0, 0), ts(2026, 1, 5, 0, 5)]
+    assert result['open'] == [0, 5]
+    assert result['high'] == [4.5, 9.5]
+    assert result['low'] == [-0.5, 4.5]
+    assert result['close'] == [4, 9]
+    assert result['volume'] == [5, 5]
+
+
+def test_hourly_buckets_start_at_the_session_open():
+    # Two US sessions, 14:30-21:00 UTC (9:30-16:00 ET)
+    sessions = concat(
+        minute_bars(ts(2026, 1, 5, 14, 30), 390),
+        minute_bars(ts(2026, 1, 6, 14, 30), 390)
+    )
+
+    result = resample_columns(sessions, '1h')
+
+    first_day = [t for t in result['time'] if t < ts(2026, 1, 6)]
+    assert first_day == [ts(2026, 1, 5, h, 30) for h in range(14, 21)]
+    assert len(result['time']) == 14
+    # Last bucket of the day is the 20:30-21:00 half hour
+    assert result['volume'][6] == 30
+
+
+def test_session_window_starting_mid_session_keeps_the_alignment():
+    # Tail of one session, then a full one
+    sessions = concat(
+        minute_bars(ts(2026, 1, 5, 20, 45), 15),
+        minute_bars(ts(2026, 1, 6, 14, 30), 390)
+    )
+
+    result = resample_columns(sessions, '1h')
+
+    assert result['time'][0] == ts(2026, 1, 5, 20, 30)
+    assert result['time'][1] == ts(2026, 1, 6, 14, 30)
+
+
+def test_continuous_market_stays_on_the_hour():
+    # 24/7 series whose window starts at an arbitrary minute
+    bars = minute_bars(ts(2026, 1, 5, 3, 37), 2 * 24 * 60)
+
+    result = resample_columns(bars, '1h')
+
+    assert all(t % 3600 == 0 for t in result['time'])
+    assert result['time'][0] == ts(2026, 1, 5, 3, 0)
+
+
+def test_empty_series():
+    assert resample_columns({'time': []}, '1h')['time'] == []
+
+
+def test_input_arrays_are_accepted():
+    bars = minute_bars(ts(2026, 1, 5, 0, 0), 4)
+    bars = {field: np.asarray(values) for field, values in bars.items()}
+
+    assert resample_columns(bars, '2m')['close'] == [1, 3]
@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+
+import pytest
+
+from api.models import db, Challenge, DailyMetrics
+from api.services import risk_engine
+from api.services.risk_engine import ChallengeState, evaluate_state, get_state, record_daily_metrics
+from api.services.rules import evaluate_challenge_rules
+
+TODAY = date(2026, 1, 15)
+
+
+@pytest.fixture
+def challenge(app):
+    challenge = Challenge(user_id=1, plan_id=1, start_balance=5000, equity=5000, status='active')
+    db.session.add(challenge)
+    db.session.commit()
+    return challenge
+
+
+def metrics(challenge_id, day=TODAY):
+    return DailyMetrics.query.filter_by(challenge_id=challenge_id, date=day).one()
+
+
+@pytest.mark.parametrize('equity, day_start, expected', [
+    (4500, 4500, ('failed', 'MAX_TOTAL_LOSS')),
+    (5500, 5500, ('passed', 'PROFIT_TARGET_REACHED')),
+    (4740, 5000, ('failed', 'MAX_DAILY_LOSS')),
+    (4800, 5000, (None, None)),
+    # Total loss wins over daily loss
+    (4400, 5000, ('failed', 'MAX_TOTAL_LOSS')),
+])
+def test_evaluate_state(equity, day_start, expected):
+    state = ChallengeState(1, 5000, equity, 'active', TODAY, day_start)
+
+    assert evaluate_state(state)[:2] == expected
+
+
+def test_first_state_of_the_day_creates_the_day_start(challenge):
+    state = get_state(challenge, today=TODAY, unrealized=100)
+    db.session.commit()
+
+    assert (state.equity, state.day_start_equity) == (5100, 5100)
+    assert metrics(challenge.id).day_start_equity == 5100
+
+
+def test_state_is_kept_in_memory_and_tracks_drawdown(challenge):
+    get_state(challenge, today=TODAY)
+    db.session.commit()
+
+    challenge.equity = 4850
+    state = get_state(challenge, today=TODAY)
+    challenge.equity = 4950
+    state = get_state(challenge, today=TODAY)
+    record_daily_metrics(state)
+    db.session.commit()
+
+    assert state.day_start_equity == 5000
+    assert state.max_intraday_drawdown_pct == pytest.approx(-3)
+    row = metrics(challenge.id)
+    assert (row.day_end_equity, row.day_pnl) == (4950, -50)
+    assert row.max_intraday_drawdown_pct == pytest.approx(-3)
+    assert DailyMetrics.query.count() == 1
+
+
+def test_recorded_drawdown_never_rises(challenge):
+    state = get_state(challenge, today=TODAY)
+    db.session.commit()
+    metrics(challenge.id).max_intraday_drawdown_pct = -4
+    db.session.commit()
+
+    record_daily_metrics(state)
+    db.session.commit()
+
+    assert metrics(challenge.id).max_intraday_drawdown_pct == -4
+
+
+def test_new_day_starts_at_current_equity(challenge):
+    get_state(challenge, today=TODAY)
+    challenge.equity = 4800
+    state = get_state(challenge, today=TODAY + timedelta(days=1))
+    db.session.commit()
+
+    assert state.day_start_equity == 4800
+    assert state.day_pnl == 0
+
+
+def test_rules_fail_the_challenge_and_drop_its_state(challenge):
+    challenge.equity = 4400
+    result = evaluate_challenge_rules(challenge)
+
+    assert result['status'] == 'failed'
+    assert result['triggered'] == 'MAX_TOTAL_LOSS'
+    assert db.session.get(Challenge, challenge.id).failed_at is not None
+    assert challenge.id not in risk_engine._states
@@ -0,0 +1,87 @@
+from datetime import date
+
+from api.models import db, Challenge, DailyMetrics
+from api.services.rule_sweep import sweep_active_challenges
+
+TODAY = date(2026, 1, 15)
+
+
+def add_challenge(equity, start_balance=5000, status='active', day_start=None):
+    challenge = Challenge(user_id=1, plan_id=1, start_balance=start_balance, equity=equity, status=status)
+    db.session.add(challenge)
+    db.session.flush()
+    if day_start is not None:
+        db.session.add(DailyMetrics(challenge_id=challenge.id, date=TODAY, day_start_equity=day_start))
+    db.session.commit()
+    return challenge.id
+
+
+def statuses():
+    return {c.id: c.status for c in Challenge.query.all()}
+
+
+def test_total_loss_and_profit_target(app):
+    lost = add_challenge(4500)
+    won = add_challenge(5500)
+    flat = add_challenge(4900)
+
+    result = sweep_active_challenges(today=TODAY)
+
+    assert result['checked'] == 3
+    assert result['failed'] == [lost]
+    assert result['passed'] == [won]
+    assert statuses() == {lost: 'failed', won: 'passed', flat: 'active'}
+
+
+def test_daily_loss_uses_day_start_equity(app):
+    # -6% on the day but only -6% in total
+    daily = add_challenge(4700, day_start=5000)
+    # Same equity without a metrics row: the day starts now
+    no_row = add_challenge(4700)
+
+    result = sweep_active_challenges(today=TODAY)
+
+    assert result['failed'] == [daily]
+    assert statuses() == {daily: 'failed', no_row: 'active'}
+
+
+def test_first_sweep_records_the_day_start(app):
+    # Holding a position, no trade today
+    challenge_id = add_challenge(4900)
+
+    assert sweep_active_challenges(unrealized={challenge_id: -100}, today=TODAY)['failed'] == []
+    row = DailyMetrics.query.filter_by(challenge_id=challenge_id, date=TODAY).one()
+    assert row.day_start_equity == 4800
+
+    # -5.2% since the day start, -8.8% in total
+    result = sweep_active_challenges(unrealized={challenge_id: -340}, today=TODAY)
+
+    assert result['failed'] == [challenge_id]
+    assert DailyMetrics.query.filter_by(challenge_id=challenge_id).count() == 1
+
+
+def test_unrealized_pnl_is_marked(app):
+    marked_down = add_challenge(5000)
+    marked_up = add_challenge(5000, day_start=5000)
+
+    result = sweep_active_challenges(unrealized={marked_down: -500, marked_up: 500}, today=TODAY)
+
+    assert result['failed'] == [marked_down]
+    assert result['passed'] == [marked_up]
+
+
+def test_day_start_fallback_includes_unrealized(app):
+    # -6% marked equity with no metrics row: no daily loss yet
+    challenge_id = add_challenge(5000)
+
+    result = sweep_active_challenges(unrealized={challenge_id: -300}, today=TODAY)
+
+    assert result['failed'] == []
+    assert statuses() == {challenge_id: 'active'}
+
+
+def test_inactive_challenges_are_skipped(app):
+    add_challenge(4000, status='failed')
+    add_challenge(6000, status='passed')
+
+    assert sweep_active_challenges(today=TODAY) == {'checked': 0, 'failed': [], 'passed': []}
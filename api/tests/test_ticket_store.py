@@ -0,0 +1,75 @@
+import pytest
+
+from api.services import ticket_store
+from api.services.ticket_store import TicketStore, decode_cursor
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(ticket_store, 'EVICT_CHUNK_SIZE', 2)
+
+
+def fill(store, count=10):
+    """Interleave tickets of two symbols, one second apart."""
+    for i in range(count):
+        store.append({'symbol': 'xauusd', 'n': i}, ts=1000 + 2 * i)
+        store.append({'symbol': 'eurusd', 'n': i}, ts=1001 + 2 * i)
+
+
+def page_all(store, limit, **filters):
+    tickets, cursor = store.query(limit=limit, **filters)
+    while cursor:
+        page, cursor = store.query(limit=limit, cursor=cursor, **filters)
+        tickets.extend(page)
+    return tickets
+
+
+def test_query_pages_across_spill_and_memory(tmp_path, small_chunks):
+    store = TicketStore(max_per_symbol=3, db_path=str(tmp_path / 'tickets.db'))
+    fill(store)
+
+    # Most tickets now live in SQLite, the newest ones in memory
+    assert len(store._symbols['XAUUSD'].tickets) <= 5
+    assert store._symbols['XAUUSD'].spilled
+
+    tickets = page_all(store, limit=3)
+    assert [t['id'] for t in tickets] == list(range(1, 21))
+    assert [t['ts'] for t in tickets] == sorted(t['ts'] for t in tickets)
+
+    xau = page_all(store, limit=4, symbol='XAUUSD')
+    assert [t['n'] for t in xau] == list(range(10))
+
+
+def test_query_time_range(tmp_path, small_chunks):
+    store = TicketStore(max_per_symbol=3, db_path=str(tmp_path / 'tickets.db'))
+    fill(store)
+
+    tickets = page_all(store, limit=2, since=1004, until=1010)
+    assert [t['ts'] for t in tickets] == [1004, 1005, 1006, 1007, 1008, 1009]
+
+
+def test_without_db_old_tickets_are_dropped(small_chunks):
+    store = TicketStore(max_per_symbol=3, db_path=None)
+    fill(store)
+
+    tickets = page_all(store, limit=3, symbol='XAUUSD')
+    assert 3 <= len(tickets) <= 5
+    assert tickets[-1]['n'] == 9
+
+
+def test_restore_from_existing_database(tmp_path, small_chunks):
+    path = str(tmp_path / 'tickets.db')
+    fill(TicketStore(max_per_symbol=3, db_path=path))
+
+    store = TicketStore(max_per_symbol=3, db_path=path)
+    assert store.symbols() == ['EURUSD', 'XAUUSD']
+    spilled = page_all(store, limit=5)
+    assert spilled
+
+    stored = store.append({'symbol': 'XAUUSD'}, ts=2000)
+    assert stored['id'] > max(t['id'] for t in spilled)
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.models import db, Trade
+from api.services.trade_history import count_trades, decode_cursor, list_trades, parse_fields
+
+START = datetime(2026, 1, 5, 10, 0)
+
+
+@pytest.fixture
+def trades(app):
+    """Seven trades of challenge 1, two of them at the same time; one of challenge 2."""
+    times = [START + timedelta(minutes=m) for m in (0, 1, 2, 2, 3, 4, 5)]
+    for i, executed_at in enumerate(times):
+        db.session.add(Trade(
+            challenge_id=1, symbol='AAPL' if i % 2 else 'MSFT', side='buy',
+            qty=1, price=100 + i, pnl=i, executed_at=executed_at
+        ))
+    db.session.add(Trade(challenge_id=2, symbol='AAPL', side='buy', qty=1, price=1, pnl=0, executed_at=START))
+    db.session.commit()
+    return [t.id for t in Trade.query.filter_by(challenge_id=1).order_by(Trade.executed_at.desc(), Trade.id.desc())]
+
+
+def all_pages(challenge_id, limit, **kwargs):
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = list_trades(challenge_id, limit=limit, cursor=cursor, **kwargs)
+        pages.append(page)
+        if not cursor:
+            return pages
+
+
+def test_pages_cover_every_trade_once_newest_first(trades):
+    pages = all_pages(1, limit=3)
+
+    assert [len(p) for p in pages] == [3, 3, 1]
+    assert [t['id'] for p in pages for t in p] == trades
+
+
+def test_last_full_page_has_no_cursor(trades):
+    page, cursor = list_trades(1, limit=7)
+
+    assert len(page) == 7
+    assert cursor is None
+
+
+def test_filters_and_count_agree(trades):
+    filters = {'symbol': 'aapl', 'start': START + timedelta(minutes=1), 'end': START + timedelta(minutes=5)}
+
+    listed = [t for p in all_pages(1, limit=2, **filters) for t in p]
+
+    assert {t['symbol'] for t in listed} == {'AAPL'}
+    assert len(listed) == count_trades(1, **filters) == 3
+    assert count_trades(1) == 7
+
+
+def test_fields_are_projected(trades):
+    page, _ = list_trades(1, limit=1, fields=['symbol', 'executed_at'])
+
+    assert page == [{'symbol': 'MSFT', 'executed_at': (START + timedelta(minutes=5)).isoformat()}]
+
+
+def test_invalid_fields_and_cursor():
+    with pytest.raises(ValueError, match='Unknown fields: secret'):
+        parse_fields('symbol,secret')
+    with pytest.raises(ValueError):
+        decode_cursor('???')
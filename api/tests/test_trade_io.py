@@ -0,0 +1,76 @@
+import csv
+import io
+
+import pytest
+
+from api.models import db, Challenge, Position, Trade
+from api.services import market, positions
+from api.services.trade_io import TradeImportError, import_trades, iter_csv_rows, iter_trade_pages, export_csv
+
+CSV = b"""symbol,side,qty,price,executed_at
+aapl,buy,2,100,2026-01-05T10:00:00
+AAPL,sell,1,110,2026-01-05T11:00:00
+MSFT,sell,1,50,2026-01-05T12:00:00
+"""
+
+
+@pytest.fixture
+def challenge(app, monkeypatch):
+    # No network: marks come from the quote cache only
+    monkeypatch.setattr(positions, 'get_multiple_quotes', lambda symbols: {})
+    challenge = Challenge(user_id=1, plan_id=1, start_balance=5000, equity=5000, status='active')
+    db.session.add(challenge)
+    db.session.commit()
+    return challenge
+
+
+def test_import_replays_fills_through_the_ledger(challenge):
+    market._quote_cache.set('AAPL', {'price': 105})
+    market._quote_cache.set('MSFT', {'price': 50})
+
+    result = import_trades(challenge.id, iter_csv_rows(io.BytesIO(CSV)))
+
+    assert result['imported'] == 3
+    assert result['realized_pnl'] == pytest.approx(10)
+    assert result['challenge']['equity'] == pytest.approx(5010)
+    assert result['rule_result']['status'] == 'active'
+    held = {p.symbol: (p.qty, p.avg_price) for p in Position.query.filter_by(challenge_id=challenge.id)}
+    assert held == {'AAPL': (1, 100), 'MSFT': (-1, 50)}
+    assert [t.pnl for t in Trade.query.order_by(Trade.id)] == [0, 10, 0]
+
+
+def test_bad_row_rolls_back_the_import(challenge):
+    rows = [
+        {'symbol': 'AAPL', 'side': 'buy', 'qty': '1', 'price': '100'},
+        {'symbol': 'AAPL', 'side': 'hold', 'qty': '1', 'price': '100'},
+    ]
+
+    with pytest.raises(TradeImportError) as error:
+        import_trades(challenge.id, rows)
+
+    assert error.value.row_number == 2
+    assert Trade.query.count() == 0
+    assert Position.query.count() == 0
+
+
+@pytest.mark.parametrize('status', ['failed', 'passed'])
+def test_import_into_inactive_challenge_is_rejected(challenge, status):
+    challenge.status = status
+    db.session.commit()
+
+    with pytest.raises(ValueError, match=f'Challenge is {status}'):
+        import_trades(challenge.id, [{'symbol': 'AAPL', 'side': 'buy', 'qty': '1', 'price': '100'}])
+
+    assert Trade.query.count() == 0
+
+
+def test_export_pages_through_the_history(challenge):
+    import_trades(challenge.id, iter_csv_rows(io.BytesIO(CSV)))
+
+    pages = list(iter_trade_pages(challenge.id, page_size=2, fields=['symbol']))
+    assert pages == [[{'symbol': 'MSFT'}, {'symbol': 'AAPL'}], [{'symbol': 'AAPL'}]]
+
+    rows = list(csv.DictReader(io.StringIO(''.join(export_csv(challenge.id, ['symbol', 'side', 'pnl'])))))
+    assert [(r['symbol'], r['side'], float(r['pnl'])) for r in rows] == [
+        ('MSFT', 'sell', 0), ('AAPL', 'sell', 10), ('AAPL', 'buy', 0)
+    ]
@@ -84,6 +84,40 @@ CREATE TABLE IF NOT EXISTS daily_metrics (
     FOREIGN KEY (challenge_id) REFERENCES challenges(id)
 );
 
+-- ============================================
+-- Positions Table (net position per symbol)
+-- ============================================
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    challenge_id INTEGER NOT NULL,
+    symbol VARCHAR(20) NOT NULL,
+    qty REAL DEFAULT 0, -- signed: > 0 long, < 0 short
+    avg_price REAL DEFAULT 0,
+    realized_pnl REAL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (challenge_id) REFERENCES challenges(id),
+    CONSTRAINT uq_positions_challenge_symbol UNIQUE (challenge_id, symbol)
+);
+
+-- ============================================
+-- Orders Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS orders (
+    id VARCHAR(32) PRIMARY KEY, -- uuid4 hex
+    challenge_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    symbol VARCHAR(20) NOT NULL,
+    side VARCHAR(10) NOT NULL,
+    qty REAL NOT NULL,
+    status VARCHAR(20) DEFAULT 'queued', -- queued | filled | rejected | failed
+    error TEXT,
+    result_json TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    executed_at TIMESTAMP,
+    FOREIGN KEY (challenge_id) REFERENCES challenges(id),
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
 -- ============================================
 -- Indexes for Performance
 -- ============================================
@@ -91,7 +125,11 @@ CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_challenges_user_id ON challenges(user_id);
 CREATE INDEX IF NOT EXISTS idx_challenges_status ON challenges(status);
 CREATE INDEX IF NOT EXISTS idx_trades_challenge_id ON trades(challenge_id);
+CREATE INDEX IF NOT EXISTS ix_challenges_created_at ON challenges(created_at);
+CREATE INDEX IF NOT EXISTS idx_trades_challenge_executed ON trades(challenge_id, executed_at, id);
 CREATE INDEX IF NOT EXISTS idx_daily_metrics_challenge_date ON daily_metrics(challenge_id, date);
+CREATE INDEX IF NOT EXISTS ix_positions_challenge_id ON positions(challenge_id);
+CREATE INDEX IF NOT EXISTS ix_orders_challenge_id ON orders(challenge_id);
 
 -- ============================================
 -- Seed Data: Plans
@@ -11,20 +11,14 @@ export default function LiveTradingWidget() {
     const [loading, setLoading] = useState(true)
     const [lastUpdate, setLastUpdate] = useState(new Date())
 
-    // Poll the BOT API (running on port 8000)
+    // BOT API (running on port 8000): tickets are pushed, status is polled
     useEffect(() => {
-        const fetchData = async () => {
-            try {
-                // 1. Fetch Ticket
-                const ticketRes = await fetch('http://localhost:8000/api/latest-ticket')
-                const ticketData = await ticketRes.json()
-                setTicket(ticketData)
-
-                // 2. Fetch Status
-                const statusRes = await fetch('http://localhost:8000/api/status')
-                const statusData = await statusRes.json()
-                setStatus(statusData)
+        const BOT_API_URL = 'http://localhost:8000'
 
+        const fetchTicket = async () => {
+            try {
+                const ticketRes = await fetch(`${BOT_API_URL}/api/latest-ticket`)
+                setTicket(await ticketRes.json())
                 setLastUpdate(new Date())
             } catch (error) {
                 console.error("Bot API connection failed:", error)
@@ -33,9 +27,39 @@ export default function LiveTradingWidget() {
             }
         }
 
-        fetchData()
-        const interval = setInterval(fetchData, 3000) // Poll every 3 seconds for smoother demos
-        return () => clearInterval(interval)
+        const fetchStatus = async () => {
+            try {
+                const statusRes = await fetch(`${BOT_API_URL}/api/status`)
+                setStatus(await statusRes.json())
+            } catch (error) {
+                console.error("Bot API connection failed:", error)
+            }
+        }
+
+        fetchTicket()
+        fetchStatus()
+        const statusInterval = setInterval(fetchStatus, 10000)
+
+        // New tickets arrive as soon as the bot publishes them; EventSource
+        // reconnects on its own and resumes from the last sequence number
+        let ticketInterval = null
+        let source = null
+        if (typeof EventSource !== 'undefined') {
+            source = new EventSource(`${BOT_API_URL}/api/tickets/stream`)
+            source.addEventListener('ticket', (event) => {
+                setTicket(JSON.parse(event.data))
+                setLastUpdate(new Date())
+                setLoading(false)
+            })
+        } else {
+            ticketInterval = setInterval(fetchTicket, 3000)
+        }
+
+        return () => {
+            clearInterval(statusInterval)
+            if (ticketInterval) clearInterval(ticketInterval)
+            if (source) source.close()
+        }
     }, [])
 
     if (loading) return (
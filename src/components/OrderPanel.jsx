@@ -5,6 +5,9 @@ import Button from './ui/Button'
 import toast from 'react-hot-toast'
 import { tradesAPI } from '../services/api'
 
+// Long-polls (10s each) before giving up on a queued order
+const MAX_ORDER_POLLS = 6
+
 export default function OrderPanel({
     challengeId,
     symbol,
@@ -30,13 +33,23 @@ export default function OrderPanel({
 
         setLoading(true)
         try {
-            const response = await tradesAPI.create({
+            let response = await tradesAPI.create({
                 challenge_id: challengeId,
                 symbol: symbol,
                 side: side,
                 qty: parseFloat(qty),
+                wait: 2,
             })
 
+            // Still queued: long-poll until the order is filled (bounded)
+            const orderId = response.data.order?.id
+            for (let attempt = 0; response.status === 202; attempt++) {
+                if (attempt >= MAX_ORDER_POLLS) {
+                    throw new Error('Order is still pending - check your trade history shortly')
+                }
+                response = await tradesAPI.getOrder(orderId, 10)
+            }
+
             const { trade, challenge, rule_result } = response.data
 
             if (rule_result?.triggered) {
@@ -54,7 +67,11 @@ export default function OrderPanel({
                 onTradeExecuted(response.data)
             }
         } catch (error) {
-            toast.error(error.response?.data?.error || 'Failed to execute trade')
+            if (error.response?.status === 404) {
+                toast.error('Order not found - check your trade history')
+            } else {
+                toast.error(error.response?.data?.error || error.message || 'Failed to execute trade')
+            }
         } finally {
             setLoading(false)
         }
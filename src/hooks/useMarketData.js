@@ -1,5 +1,5 @@
 import { useState, useEffect, useCallback } from 'react'
-import { marketAPI } from '../services/api'
+import { marketAPI, QUOTE_STREAM_ENABLED } from '../services/api'
 
 export function useMarketData(symbol, interval = 30000) {
     const [quote, setQuote] = useState(null)
@@ -130,6 +130,15 @@ export function useMarketData(symbol, interval = 30000) {
     }
 }
 
+// Merge a streamed quote delta (null removes a field)
+function applyDelta(quote, delta) {
+    const merged = { ...(quote || {}), ...delta }
+    Object.keys(delta).forEach((key) => {
+        if (delta[key] === null) delete merged[key]
+    })
+    return merged
+}
+
 export function useMultipleQuotes(symbols, interval = 30000) {
     const [quotes, setQuotes] = useState({})
     const [loading, setLoading] = useState(true)
@@ -140,16 +149,14 @@ export function useMultipleQuotes(symbols, interval = 30000) {
 
         const results = {}
 
-        await Promise.all(
-            symbols.map(async (symbol) => {
-                try {
-                    const response = await marketAPI.getQuote(symbol)
-                    results[symbol] = response.data
-                } catch (err) {
-                    results[symbol] = { symbol, error: true }
-                }
+        try {
+            const response = await marketAPI.getQuotes(symbols)
+            Object.assign(results, response.data.quotes)
+        } catch (err) {
+            symbols.forEach((symbol) => {
+                results[symbol] = { symbol, error: true }
             })
-        )
+        }
 
         setQuotes(results)
         setLastUpdate(new Date())
@@ -160,11 +167,35 @@ export function useMultipleQuotes(symbols, interval = 30000) {
         fetchAllQuotes()
     }, [fetchAllQuotes])
 
+    // Live updates: polling, or server-pushed quote deltas when the
+    // stream is enabled (polling remains the fallback)
     useEffect(() => {
         if (!symbols || symbols.length === 0 || interval <= 0) return
 
-        const timer = setInterval(fetchAllQuotes, interval)
-        return () => clearInterval(timer)
+        let timer = null
+        const startPolling = () => {
+            if (!timer) timer = setInterval(fetchAllQuotes, interval)
+        }
+
+        if (!QUOTE_STREAM_ENABLED || typeof EventSource === 'undefined') {
+            startPolling()
+            return () => clearInterval(timer)
+        }
+
+        const close = marketAPI.streamQuotes(
+            symbols,
+            (delta) => {
+                setQuotes((prev) => ({ ...prev, [delta.symbol]: applyDelta(prev[delta.symbol], delta) }))
+                setLastUpdate(new Date())
+            },
+            // Stream given up: poll instead
+            startPolling
+        )
+
+        return () => {
+            close()
+            clearInterval(timer)
+        }
     }, [symbols, interval, fetchAllQuotes])
 
     return {
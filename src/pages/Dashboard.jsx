@@ -36,6 +36,7 @@ const SYMBOLS = [
 export default function Dashboard() {
     const [challenge, setChallenge] = useState(null)
     const [trades, setTrades] = useState([])
+    const [tradeCount, setTradeCount] = useState(0)
     const [loading, setLoading] = useState(true)
     const [selectedSymbol, setSelectedSymbol] = useState('BTC-USD')
 
@@ -62,8 +63,10 @@ export default function Dashboard() {
 
     const fetchTrades = async (challengeId) => {
         try {
+            // First page for the table; the count covers all pages
             const response = await tradesAPI.getByChallenge(challengeId)
             setTrades(response.data.trades)
+            setTradeCount(response.data.total ?? response.data.trades.length)
         } catch (error) {
             console.error('Failed to fetch trades:', error)
         }
@@ -72,6 +75,7 @@ export default function Dashboard() {
     const handleTradeExecuted = useCallback((data) => {
         setChallenge(data.challenge)
         setTrades(prev => [data.trade, ...prev])
+        setTradeCount(prev => prev + 1)
     }, [])
 
     if (loading) {
@@ -171,7 +175,7 @@ export default function Dashboard() {
                     />
                     <StatCard
                         title="Trades"
-                        value={trades.length}
+                        value={tradeCount}
                         icon={FiTarget}
                     />
                 </div>
@@ -1,6 +1,10 @@
 import axios from 'axios'
 
 const API_URL = import.meta.env.VITE_API_URL || '/api'
+// Live quotes over SSE need a threaded server (not serverless); polling otherwise
+export const QUOTE_STREAM_ENABLED = import.meta.env.VITE_QUOTE_STREAM === 'true'
+// Consecutive stream errors (without reconnecting) before falling back to polling
+const MAX_STREAM_RECONNECTS = 3
 
 const api = axios.create({
     baseURL: API_URL,
@@ -61,9 +65,27 @@ export const aiAPI = {
 
 export const marketAPI = {
     getQuote: (symbol) => api.get(`/market/quote?symbol=${symbol}`),
+    getQuotes: (symbols) => api.get(`/market/quotes?symbols=${symbols.join(',')}`),
     getSeries: (symbol, interval = '1m', range = '1d') =>
         api.get(`/market/series?symbol=${symbol}&interval=${interval}&range=${range}`),
     getMoroccoQuote: (symbol) => api.get(`/market/ma-quote?symbol=${symbol}`),
+    // Server-Sent Events: onQuote(delta) per update; returns a close function.
+    // The server ends streams periodically and EventSource reconnects, so
+    // onError only fires once the browser gives up or reconnects keep failing
+    streamQuotes: (symbols, onQuote, onError) => {
+        const source = new EventSource(`${API_URL}/market/stream?symbols=${symbols.join(',')}`)
+        let failures = 0
+        source.addEventListener('open', () => { failures = 0 })
+        source.addEventListener('quote', (event) => onQuote(JSON.parse(event.data)))
+        source.onerror = () => {
+            failures += 1
+            if (source.readyState === EventSource.CLOSED || failures >= MAX_STREAM_RECONNECTS) {
+                source.close()
+                if (onError) onError()
+            }
+        }
+        return () => source.close()
+    },
     getCalendar: (limit, impact) => {
         let url = '/market/calendar?'
         if (limit) url += `limit=${limit}&`
@@ -74,11 +96,16 @@ export const marketAPI = {
 
 export const tradesAPI = {
     create: (data) => api.post('/trades', data),
-    getByChallenge: (challengeId) => api.get(`/trades?challenge_id=${challengeId}`),
+    getOrder: (orderId, wait = 0) => api.get(`/trades/orders/${orderId}?wait=${wait}`),
+    getByChallenge: (challengeId, params = {}) =>
+        api.get('/trades', { params: { challenge_id: challengeId, ...params } }),
 }
 
 export const leaderboardAPI = {
     getMonthlyTop10: () => api.get('/leaderboard/monthly-top10'),
+    getTop: (period = 'monthly', limit = 10) =>
+        api.get('/leaderboard/top', { params: { period, limit } }),
+    getMyRank: (period = 'monthly') => api.get('/leaderboard/my-rank', { params: { period } }),
 }
 
 export const adminAPI = {